@@ -1,6 +1,15 @@
+# THIRDPARTY
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        # FIRSTPARTY
+        from api.metrics import on_connection_created
+
+        # Подсчёт SQL-запросов для метрики эндпоинтов аутентификации
+        connection_created.connect(on_connection_created)
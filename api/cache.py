@@ -0,0 +1,298 @@
+# api/cache.py
+# STDLIB
+import asyncio
+from collections import OrderedDict
+import hashlib
+import logging
+import time
+from typing import Awaitable, Callable
+
+# THIRDPARTY
+from django.conf import settings
+from django.core.cache import caches
+
+# FIRSTPARTY
+from api.metrics import TEXT_CACHE_EVENTS
+from api.singleflight import get_single_flight
+
+
+logger = logging.getLogger(__name__)
+
+
+def _record(event: str) -> None:
+    """Увеличивает счётчик события кэша (метрика Prometheus)."""
+    TEXT_CACHE_EVENTS.labels(event).inc()
+
+
+def text_etag(text: str) -> str:
+    """
+    Сильный ETag текста документа: хэш его содержимого.
+
+    :param text: Текст документа.
+    :return: ETag в кавычках.
+    """
+    return f'"{hashlib.blake2b(text.encode(), digest_size=16).hexdigest()}"'
+
+
+class CacheEntry:
+    """
+    Закэшированный текст документа, время его получения из FastAPI, ETag и
+    время изменения (из ответа FastAPI или вычисленные прокси).
+    """
+
+    __slots__ = ("text", "stored_at", "size", "etag", "last_modified")
+
+    def __init__(
+        self,
+        text: str,
+        stored_at: float,
+        etag: str | None = None,
+        last_modified: float | None = None,
+    ):
+        self.text = text
+        self.stored_at = stored_at
+        self.size = len(text.encode())
+        self.etag = etag or text_etag(text)
+        self.last_modified = last_modified or stored_at
+
+
+class LRUCacheBackend:
+    """
+    Кэш в памяти процесса с вытеснением давно неиспользуемых записей
+    по суммарному размеру текстов в байтах.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+
+    async def get(self, key: str) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        # Слишком большие тексты не кэшируются, чтобы не вытеснить весь кэш
+        if entry.size > self.max_bytes:
+            return
+        await self.delete(key)
+        self._entries[key] = entry
+        self.size += entry.size
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.size
+            _record("evictions")
+
+    async def delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+
+class DjangoCacheBackend:
+    """
+    Кэш на основе бэкенда Django из CACHES (например, Redis через
+    django-redis). Вытеснение записей выполняет сам бэкенд (maxmemory-policy
+    для Redis).
+    """
+
+    def __init__(self, alias: str, timeout: float):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    async def get(self, key: str) -> CacheEntry | None:
+        data = await self.cache.aget(key)
+        if data is None:
+            return None
+        return CacheEntry(
+            data["text"],
+            data["stored_at"],
+            data.get("etag"),
+            data.get("last_modified"),
+        )
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        await self.cache.aset(
+            key,
+            {
+                "text": entry.text,
+                "stored_at": entry.stored_at,
+                "etag": entry.etag,
+                "last_modified": entry.last_modified,
+            },
+            self.timeout,
+        )
+
+    async def delete(self, key: str) -> None:
+        await self.cache.adelete(key)
+
+    async def clear(self) -> None:
+        await self.cache.aclear()
+
+
+class DocumentTextCache:
+    """
+    Read-through кэш текстов документов по doc_id.
+
+    Свежая запись (моложе TTL) отдаётся сразу. Устаревшая запись (моложе
+    TTL + STALE_TTL) тоже отдаётся сразу, а в фоне запускается её обновление
+    (stale-while-revalidate). При промахе текст загружается из FastAPI.
+
+    Для ключей с незавершённой загрузкой хранится поколение: invalidate()
+    увеличивает его, и текст, загруженный до инвалидации, не кэшируется.
+    Поколения локальны для воркера: инвалидация в другом воркере (общий
+    бэкенд django) не отменяет запись загрузки, начатой здесь.
+    """
+
+    def __init__(self, backend, ttl: float, stale_ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._refreshing: dict[str, asyncio.Task] = {}
+        # Число незавершённых загрузок и поколение ключа (только пока загрузки
+        # идут)
+        self._fetching: dict[str, int] = {}
+        self._generations: dict[str, int] = {}
+
+    @staticmethod
+    def key(doc_id: int) -> str:
+        return f"document_text:{doc_id}"
+
+    async def get_or_fetch(
+        self, doc_id: int, fetch: Callable[[], Awaitable[CacheEntry]]
+    ) -> CacheEntry:
+        """
+        Возвращает текст документа из кэша или загружает его через fetch.
+
+        :param doc_id: ID документа.
+        :param fetch: Корутина, загружающая текст из FastAPI. Исключения не
+                      кэшируются.
+        :return: Запись с текстом документа и его ETag.
+        """
+        key = self.key(doc_id)
+        entry = await self.backend.get(key)
+        if entry is not None:
+            age = time.time() - entry.stored_at
+            if age < self.ttl:
+                _record("hits")
+                return entry
+            if age < self.ttl + self.stale_ttl:
+                _record("stale_hits")
+                self._revalidate(key, fetch)
+                return entry
+
+        _record("misses")
+        return await self._fetch_and_set(key, fetch)
+
+    async def _fetch_and_set(
+        self, key: str, fetch: Callable[[], Awaitable[CacheEntry]]
+    ) -> CacheEntry:
+        """
+        Загружает текст и сохраняет его, если ключ не инвалидирован за время
+        загрузки.
+
+        :param key: Ключ кэша.
+        :param fetch: Корутина, загружающая текст из FastAPI.
+        :return: Загруженная запись (даже если она не сохранена).
+        """
+        generation = self._generations.get(key, 0)
+        self._fetching[key] = self._fetching.get(key, 0) + 1
+        try:
+            entry = await fetch()
+            if self._generations.get(key, 0) == generation:
+                await self.backend.set(key, entry)
+            return entry
+        finally:
+            self._fetching[key] -= 1
+            if not self._fetching[key]:
+                del self._fetching[key]
+                self._generations.pop(key, None)
+
+    def _revalidate(
+        self, key: str, fetch: Callable[[], Awaitable[CacheEntry]]
+    ) -> None:
+        """Запускает фоновое обновление записи, если оно ещё не запущено."""
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                await self._fetch_and_set(key, fetch)
+                _record("refreshes")
+            except Exception as e:
+                logger.warning("Не удалось обновить кэш %s: %s", key, e)
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    async def invalidate(self, doc_id: int) -> None:
+        """
+        Удаляет текст документа из кэша (после удаления или анализа документа).
+
+        :param doc_id: ID документа.
+        """
+        key = self.key(doc_id)
+        if key in self._fetching:
+            self._generations[key] = self._generations.get(key, 0) + 1
+        task = self._refreshing.pop(key, None)
+        if task is not None:
+            task.cancel()
+        await self.backend.delete(key)
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+
+_text_cache: DocumentTextCache | None = None
+
+
+def get_text_cache() -> DocumentTextCache | None:
+    """
+    Возвращает кэш текстов документов, настроенный через DOCUMENT_TEXT_CACHE.
+
+    :return: Экземпляр кэша или None, если кэш отключён.
+    """
+    global _text_cache
+
+    config = settings.DOCUMENT_TEXT_CACHE
+    if config["BACKEND"] == "none":
+        return None
+    if _text_cache is None:
+        if config["BACKEND"] == "django":
+            backend = DjangoCacheBackend(
+                config["CACHE_ALIAS"],
+                timeout=config["TTL"] + config["STALE_TTL"],
+            )
+        else:
+            backend = LRUCacheBackend(config["MAX_BYTES"])
+        _text_cache = DocumentTextCache(
+            backend, ttl=config["TTL"], stale_ttl=config["STALE_TTL"]
+        )
+    return _text_cache
+
+
+def text_flight_key(doc_id: int) -> str:
+    """Ключ объединения запросов текста документа (api.singleflight)."""
+    return f"text:{doc_id}"
+
+
+async def invalidate_text(doc_id: int) -> None:
+    """
+    Удаляет текст документа из кэша, если кэш включён. Запросы текста после
+    инвалидации не присоединяются к загрузке, начатой до неё.
+
+    :param doc_id: ID документа.
+    """
+    single_flight = get_single_flight()
+    if single_flight is not None:
+        await single_flight.forget(text_flight_key(doc_id))
+    text_cache = get_text_cache()
+    if text_cache is not None:
+        await text_cache.invalidate(doc_id)
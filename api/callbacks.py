@@ -0,0 +1,163 @@
+# api/callbacks.py
+# STDLIB
+import asyncio
+import ipaddress
+import logging
+import socket
+from urllib.parse import urlsplit
+
+# THIRDPARTY
+from django.conf import settings
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+# Клиент callback отдельно от клиента FastAPI: свой пул, без редиректов и
+# прокси
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+class CallbackNotAllowed(Exception):
+    """callback_url указывает на недопустимый адрес."""
+
+
+def _host_allowed(host: str) -> bool:
+    """
+    Проверяет хост по ANALYSIS_JOBS["CALLBACK_ALLOWED_HOSTS"].
+
+    :param host: Хост из callback_url в нижнем регистре.
+    :return: True, если хост разрешён (".example.com" — домен и поддомены).
+    """
+    for allowed in settings.ANALYSIS_JOBS["CALLBACK_ALLOWED_HOSTS"]:
+        if allowed.startswith("."):
+            if host == allowed[1:] or host.endswith(allowed):
+                return True
+        elif host == allowed:
+            return True
+    return False
+
+
+def _is_public(address: str) -> bool:
+    # Зона IPv6 (fe80::1%eth0) на проверку не влияет
+    return ipaddress.ip_address(address.split("%", 1)[0]).is_global
+
+
+def check_callback_url(url: str) -> None:
+    """
+    Проверяет callback_url без обращения к DNS (при создании задачи).
+
+    Допускается только https. Если задан CALLBACK_ALLOWED_HOSTS, хост
+    должен входить в список; иначе IP-адрес в URL должен быть публичным,
+    а имя хоста проверяется при отправке (resolve_callback_address).
+
+    :param url: Адрес callback.
+    :raises CallbackNotAllowed: Если адрес недопустим.
+    """
+    parts = urlsplit(url)
+    if parts.scheme != "https":
+        raise CallbackNotAllowed("callback_url должен использовать https.")
+    host = (parts.hostname or "").lower()
+    if not host or parts.username or parts.password:
+        raise CallbackNotAllowed("Некорректный хост callback_url.")
+    if settings.ANALYSIS_JOBS["CALLBACK_ALLOWED_HOSTS"]:
+        if not _host_allowed(host):
+            raise CallbackNotAllowed("Хост callback_url не разрешён.")
+        return
+    try:
+        public = _is_public(host)
+    except ValueError:
+        # Имя хоста: адреса проверяются при отправке
+        return
+    if not public:
+        raise CallbackNotAllowed("callback_url указывает на внутренний адрес.")
+
+
+async def _resolve(host: str, port: int) -> list[str]:
+    infos = await asyncio.get_running_loop().getaddrinfo(
+        host, port, type=socket.SOCK_STREAM
+    )
+    return [info[4][0] for info in infos]
+
+
+async def resolve_callback_address(url: str) -> str | None:
+    """
+    Проверяет callback_url перед отправкой и выбирает адрес соединения.
+
+    :param url: Адрес callback.
+    :return: Проверенный публичный IP-адрес или None для хоста из
+             CALLBACK_ALLOWED_HOSTS (соединение по имени).
+    :raises CallbackNotAllowed: Если адрес недопустим или хост разрешается
+             во внутренний адрес.
+    """
+    check_callback_url(url)
+    if settings.ANALYSIS_JOBS["CALLBACK_ALLOWED_HOSTS"]:
+        return None
+    parts = urlsplit(url)
+    try:
+        addresses = await _resolve(parts.hostname, parts.port or 443)
+    except OSError as e:
+        raise CallbackNotAllowed(f"Хост callback_url не найден: {e}") from e
+    # Все адреса хоста должны быть публичными: иначе соединение может уйти
+    # на внутренний адрес из того же ответа DNS
+    if not addresses or not all(_is_public(address) for address in addresses):
+        raise CallbackNotAllowed("callback_url указывает на внутренний адрес.")
+    return addresses[0]
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Возвращает HTTP-клиент callback текущего воркера (создаётся при первом
+    обращении или в новом цикле событий).
+
+    :return: Клиент без редиректов и без прокси из окружения.
+    """
+    global _client, _client_loop
+
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            follow_redirects=False,
+            trust_env=False,
+            timeout=settings.ANALYSIS_JOBS["CALLBACK_TIMEOUT"],
+        )
+        _client_loop = loop
+    return _client
+
+
+async def send_callback(url: str, payload: dict) -> httpx.Response:
+    """
+    Отправляет результат задачи на callback_url.
+
+    Соединение устанавливается с адресом, проверенным
+    resolve_callback_address, а не с результатом повторного разрешения
+    имени (DNS rebinding); имя хоста передаётся в Host и SNI, сертификат
+    проверяется по нему.
+
+    :param url: Адрес callback.
+    :param payload: Тело запроса (JSON).
+    :return: Ответ клиента.
+    :raises CallbackNotAllowed: Если адрес недопустим.
+    :raises httpx.HTTPError: При ошибке соединения.
+    """
+    address = await resolve_callback_address(url)
+    target = httpx.URL(url)
+    headers, extensions = {}, {}
+    if address is not None:
+        headers["Host"] = target.netloc.decode("ascii")
+        extensions["sni_hostname"] = target.host
+        target = target.copy_with(host=address)
+    return await get_client().post(
+        target, json=payload, headers=headers, extensions=extensions
+    )
+
+
+async def shutdown() -> None:
+    """Закрывает HTTP-клиент callback при остановке воркера."""
+    global _client, _client_loop
+
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
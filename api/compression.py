@@ -0,0 +1,210 @@
+# api/compression.py
+# STDLIB
+import time
+from typing import AsyncIterator, Iterator
+import zlib
+
+# THIRDPARTY
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+# FIRSTPARTY
+from api.metrics import COMPRESSION_BYTES, COMPRESSION_LATENCY
+
+
+# brotli и zstd необязательны: без пакетов доступен только gzip
+try:
+    # THIRDPARTY
+    import brotli
+except ImportError:
+    try:
+        # THIRDPARTY
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    # THIRDPARTY
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class GzipCompressor:
+    """Потоковое сжатие gzip (zlib с заголовком gzip)."""
+
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class BrotliCompressor:
+    """Потоковое сжатие brotli (пакет brotli или brotlicffi)."""
+
+    def __init__(self, level: int):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class ZstdCompressor:
+    """Потоковое сжатие zstd (пакет zstandard)."""
+
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+# Кодировки Content-Encoding, для которых установлены библиотеки
+COMPRESSORS = {"gzip": GzipCompressor}
+if brotli is not None:
+    COMPRESSORS["br"] = BrotliCompressor
+if zstandard is not None:
+    COMPRESSORS["zstd"] = ZstdCompressor
+
+
+def get_compressor(encoding: str):
+    """
+    Создаёт компрессор с уровнем сжатия из RESPONSE_COMPRESSION["LEVELS"].
+
+    :param encoding: Кодировка из COMPRESSORS.
+    :return: Компрессор с методами compress, flush и finish.
+    """
+    return COMPRESSORS[encoding](
+        settings.RESPONSE_COMPRESSION["LEVELS"][encoding]
+    )
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """
+    Выбирает кодировку ответа по заголовку Accept-Encoding.
+
+    Выбирается кодировка с наибольшим q; при равных q — первая в
+    RESPONSE_COMPRESSION["ALGORITHMS"]. Кодировки без установленной
+    библиотеки не предлагаются.
+
+    :param accept_encoding: Значение заголовка Accept-Encoding.
+    :return: Кодировка или None, если ответ не нужно сжимать.
+    """
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _sep, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            key, _sep, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in settings.RESPONSE_COMPRESSION["ALGORITHMS"]:
+        if encoding not in COMPRESSORS:
+            continue
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def _compress_chunk(
+    encoding: str, compressor, data: bytes, final: bool
+) -> bytes:
+    started = time.perf_counter()
+    compressed = compressor.compress(data) + (
+        compressor.finish() if final else compressor.flush()
+    )
+    COMPRESSION_LATENCY.labels(encoding).observe(time.perf_counter() - started)
+    COMPRESSION_BYTES.labels(encoding, "original").inc(len(data))
+    COMPRESSION_BYTES.labels(encoding, "compressed").inc(len(compressed))
+    return compressed
+
+
+def compress(encoding: str, data: bytes) -> bytes:
+    """
+    Сжимает тело ответа целиком.
+
+    :param encoding: Кодировка из COMPRESSORS.
+    :param data: Тело ответа.
+    :return: Сжатое тело.
+    """
+    return _compress_chunk(
+        encoding, get_compressor(encoding), data, final=True
+    )
+
+
+async def acompress(encoding: str, data: bytes) -> bytes:
+    """
+    Асинхронный вариант compress: тела от
+    RESPONSE_COMPRESSION["OFFLOAD_MIN_SIZE"] сжимаются в потоке, чтобы не
+    занимать цикл событий.
+    """
+    if len(data) >= settings.RESPONSE_COMPRESSION["OFFLOAD_MIN_SIZE"]:
+        return await sync_to_async(compress, thread_sensitive=False)(
+            encoding, data
+        )
+    return compress(encoding, data)
+
+
+def compress_stream(encoding: str, stream: Iterator[bytes]) -> Iterator[bytes]:
+    """
+    Сжимает потоковый ответ. Каждый чанк сбрасывается (flush), чтобы клиент
+    получал данные по мере поступления, а не после конца ответа.
+
+    :param encoding: Кодировка из COMPRESSORS.
+    :param stream: Чанки тела ответа.
+    :return: Чанки сжатого тела.
+    """
+    compressor = get_compressor(encoding)
+    for chunk in stream:
+        if data := _compress_chunk(encoding, compressor, chunk, final=False):
+            yield data
+    yield _compress_chunk(encoding, compressor, b"", final=True)
+
+
+async def acompress_stream(
+    encoding: str, stream: AsyncIterator[bytes]
+) -> AsyncIterator[bytes]:
+    """
+    Асинхронный вариант compress_stream: чанки от OFFLOAD_MIN_SIZE сжимаются в
+    потоке.
+    """
+    compressor = get_compressor(encoding)
+    offload_min_size = settings.RESPONSE_COMPRESSION["OFFLOAD_MIN_SIZE"]
+    compress_chunk = sync_to_async(_compress_chunk, thread_sensitive=False)
+    async for chunk in stream:
+        if len(chunk) >= offload_min_size:
+            data = await compress_chunk(encoding, compressor, chunk, False)
+        else:
+            data = _compress_chunk(encoding, compressor, chunk, final=False)
+        if data:
+            yield data
+    yield _compress_chunk(encoding, compressor, b"", final=True)
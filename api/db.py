@@ -0,0 +1,45 @@
+# api/db.py
+# STDLIB
+import logging
+
+# THIRDPARTY
+from asgiref.sync import sync_to_async
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+def _pools() -> list:
+    """Пулы соединений psycopg баз данных с OPTIONS["pool"]."""
+    pools = []
+    for alias in connections:
+        pool = getattr(connections[alias], "pool", None)
+        if pool is not None:
+            pools.append(pool)
+    return pools
+
+
+async def startup() -> None:
+    """
+    Открывает пулы соединений при старте воркера: MIN_SIZE соединений
+    создаются в фоне, и первые запросы не ждут подключения к БД.
+    """
+    for pool in _pools():
+        pool.open(wait=False)
+        logger.info(
+            "Пул соединений с БД открыт (%s–%s).", pool.min_size, pool.max_size
+        )
+
+
+def _close_pools() -> None:
+    for alias in connections:
+        connection = connections[alias]
+        if alias in getattr(connection, "_connection_pools", {}):
+            connection.close_pool()
+
+
+async def shutdown() -> None:
+    """Закрывает пулы соединений с БД при остановке воркера."""
+    # Закрытие пула ждёт завершения его фоновых потоков
+    await sync_to_async(_close_pools, thread_sensitive=False)()
@@ -1,21 +1,56 @@
 # api/decorators.py
-import jwt
-import logging
+# STDLIB
 from functools import wraps
+import logging
+import time
 
+# THIRDPARTY
 from django.conf import settings
+import jwt
 from rest_framework.response import Response
 
+# FIRSTPARTY
+from api.metrics import JWT_VERIFY_LATENCY
+from api.token_cache import token_cache
+
+
 logger = logging.getLogger(__name__)
 
 
+def decode_token(token: str) -> dict:
+    """
+    Проверяет подпись JWT и возвращает его пейлоад.
+
+    Уже проверенные токены берутся из кэша без повторной проверки подписи.
+
+    :param token: JWT из заголовка Authorization.
+    :return: Пейлоад токена.
+    :raises jwt.InvalidTokenError: Если токен невалиден или истёк.
+    """
+    started = time.perf_counter()
+    use_cache = settings.JWT_VERIFY_CACHE["ENABLED"]
+    payload = token_cache.get(token) if use_cache else None
+    cache_result = "hit" if payload is not None else "miss"
+    if payload is None:
+        # Проверяем/декодируем токен БЕЗ обращения к БД
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+        if use_cache:
+            token_cache.set(token, payload)
+    JWT_VERIFY_LATENCY.labels(cache_result).observe(
+        time.perf_counter() - started
+    )
+    return payload
+
+
 def token_required(func):
     """
     Декоратор, который проверяет наличие и валидность JWT-токена
     в заголовке Authorization (формат 'Bearer <token>').
 
-    :param func: Основная функция, которую нужно выполнить после проверки токена.
-    :return: Ответ 401, если токен не предоставлен или невалиден. Иначе вызов функции.
+    :param func: Основная функция, которую нужно выполнить после проверки
+                 токена.
+    :return: Ответ 401, если токен не предоставлен или невалиден. Иначе вызов
+             функции.
     """
 
     @wraps(func)
@@ -42,16 +77,19 @@ def token_required(func):
             return Response({"error": "Токен не предоставлен."}, status=401)
 
         try:
-            # Проверяем/декодируем токен БЕЗ обращения к БД
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-            logger.info(f"JWT-пейлоад: {payload}")
+            payload = decode_token(token)
         except jwt.ExpiredSignatureError:
             logger.error("Срок действия токена истёк.")
-            return Response({"error": "Срок действия токена истёк."}, status=401)
+            return Response(
+                {"error": "Срок действия токена истёк."}, status=401
+            )
         except jwt.InvalidTokenError:
             logger.error("Невалидный токен.")
             return Response({"error": "Невалидный токен."}, status=401)
 
+        # Пейлоад токена доступен представлению (например, user_id владельца)
+        request.jwt_payload = payload
+
         # Если токен валиден, передаём управление в основную функцию
         return await func(self, request, *args, **kwargs)
 
@@ -0,0 +1,171 @@
+# api/documents.py
+# STDLIB
+import base64
+import binascii
+from collections import OrderedDict
+
+# THIRDPARTY
+from django.conf import settings
+
+# FIRSTPARTY
+from api.models import Document
+
+
+class DocumentOwnerCache:
+    """
+    Ограниченный кэш владельцев документов в памяти воркера: doc_id -> user_id.
+
+    Хранятся только найденные владельцы: документ, загруженный в другом
+    воркере, не должен получить 404 из-за устаревшего отрицательного ответа.
+    Владелец документа не меняется, поэтому записи не устаревают; удалённый
+    документ убирается из кэша своего воркера (forget), а в остальных его
+    владелец получит ответ FastAPI об отсутствии документа.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[int, int] = OrderedDict()
+
+    def get(self, doc_id: int) -> int | None:
+        user_id = self._entries.get(doc_id)
+        if user_id is not None:
+            self._entries.move_to_end(doc_id)
+        return user_id
+
+    def set(self, doc_id: int, user_id: int) -> None:
+        self._entries[doc_id] = user_id
+        self._entries.move_to_end(doc_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def forget(self, doc_id: int) -> None:
+        self._entries.pop(doc_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+owner_cache = DocumentOwnerCache(
+    max_size=settings.DOCUMENT_OWNERSHIP["CACHE_SIZE"]
+)
+
+
+async def has_access(doc_id: int, user_id: int) -> bool:
+    """
+    Проверяет доступ пользователя к документу: по кэшу владельцев или
+    одним запросом по уникальному индексу doc_id.
+
+    Документ, которого нет в таблице Document (загружен до её появления или
+    в обход прокси), владельца не имеет и доступен, как до проверки
+    владельцев; отказ получает только документ другого пользователя.
+
+    :param doc_id: ID документа в FastAPI.
+    :param user_id: ID пользователя из JWT (число или строка).
+    :return: False, если документ принадлежит другому пользователю и
+             проверка включена (DOCUMENT_OWNERSHIP["ENFORCE"]).
+    """
+    if not settings.DOCUMENT_OWNERSHIP["ENFORCE"]:
+        return True
+    owner_id = owner_cache.get(doc_id)
+    if owner_id is None:
+        owner_id = (
+            await Document.objects.filter(doc_id=doc_id)
+            .values_list("user_id", flat=True)
+            .afirst()
+        )
+        if owner_id is None:
+            return True
+        owner_cache.set(doc_id, owner_id)
+    # simplejwt передаёт user_id в пейлоаде строкой
+    return owner_id == int(user_id)
+
+
+async def add_document(
+    doc_id: int, user_id: int, name: str, size: int
+) -> None:
+    """
+    Сохраняет владельца загруженного документа.
+
+    :param doc_id: ID документа в FastAPI.
+    :param user_id: ID пользователя из JWT.
+    :param name: Имя файла.
+    :param size: Размер файла в байтах.
+    """
+    # Документ уже может быть сохранён (повторный ответ FastAPI с тем же id)
+    await Document.objects.abulk_create(
+        [Document(doc_id=doc_id, user_id=user_id, name=name[:255], size=size)],
+        ignore_conflicts=True,
+    )
+    owner_cache.set(doc_id, int(user_id))
+
+
+async def remove_document(doc_id: int) -> None:
+    """Удаляет запись об удалённом в FastAPI документе."""
+    owner_cache.forget(doc_id)
+    await Document.objects.filter(doc_id=doc_id).adelete()
+
+
+async def mark_analyzed(doc_id: int) -> None:
+    """Отмечает документ, отправленный на анализ."""
+    await Document.objects.filter(
+        doc_id=doc_id, status=Document.Status.UPLOADED
+    ).aupdate(status=Document.Status.ANALYZED)
+
+
+def encode_cursor(last_id: int) -> str:
+    """Курсор следующей страницы: id последнего документа на странице."""
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Разбирает курсор страницы.
+
+    :param cursor: Курсор из ссылки next.
+    :return: id последнего документа предыдущей страницы.
+    :raises ValueError: Если курсор некорректен.
+    """
+    try:
+        value = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id = int(value.decode())
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(cursor) from e
+    # id — bigint в БД
+    if not 0 < last_id < 1 << 63:
+        raise ValueError(cursor)
+    return last_id
+
+
+async def list_documents(
+    user_id: int,
+    limit: int,
+    cursor: int | None = None,
+    status: str | None = None,
+) -> tuple[list[Document], int | None]:
+    """
+    Страница документов пользователя от новых к старым.
+
+    Пагинация по курсору (keyset): страница выбирается условием id < курсора
+    по индексу (user_id, id), поэтому её стоимость не зависит от номера
+    страницы, в отличие от OFFSET.
+
+    :param user_id: ID пользователя из JWT.
+    :param limit: Размер страницы.
+    :param cursor: id последнего документа предыдущей страницы.
+    :param status: Фильтр по статусу документа.
+    :return: Документы страницы и id для курсора следующей страницы (None —
+             страница последняя).
+    """
+    queryset = Document.objects.filter(user_id=user_id)
+    if status is not None:
+        queryset = queryset.filter(status=status)
+    if cursor is not None:
+        queryset = queryset.filter(id__lt=cursor)
+    # Лишняя запись показывает, есть ли следующая страница
+    documents = [
+        document async for document in queryset.order_by("-id")[: limit + 1]
+    ]
+    if len(documents) > limit:
+        documents = documents[:limit]
+        return documents, documents[-1].id
+    return documents, None
@@ -0,0 +1,17 @@
+# api/hashers.py
+# THIRDPARTY
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2 с числом итераций из PASSWORD_HASHING["ITERATIONS"].
+
+    Алгоритм тот же (pbkdf2_sha256), поэтому ранее созданные хэши проверяются
+    без изменений, а хэши с другой стоимостью обновляются при входе.
+    """
+
+    @property
+    def iterations(self) -> int:
+        return settings.PASSWORD_HASHING["ITERATIONS"] or super().iterations
@@ -0,0 +1,92 @@
+# api/hashing.py
+# STDLIB
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import logging
+from typing import Any, Callable
+
+# THIRDPARTY
+from django.conf import settings
+
+# FIRSTPARTY
+from api.metrics import PASSWORD_HASH_PENDING, PASSWORD_HASH_REJECTED
+
+
+logger = logging.getLogger(__name__)
+
+
+class HashingOverloaded(Exception):
+    """Очередь хэширования паролей переполнена."""
+
+
+class PasswordHashPool:
+    """
+    Ограниченный пул потоков для хэширования и проверки паролей.
+
+    PBKDF2, bcrypt, scrypt и Argon2 освобождают GIL на время вычислений,
+    поэтому хэширование в потоках не останавливает цикл событий воркера.
+    Одновременно выполняется не более workers операций, ещё max_queue ждут
+    в очереди; остальные сразу отклоняются с HashingOverloaded.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hash"
+        )
+        self.limit = workers + max_queue
+        self.pending = 0
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Выполняет fn(*args) в пуле.
+
+        :param fn: Функция хэширования (make_password, check_password).
+        :param args: Аргументы функции.
+        :return: Результат fn.
+        :raises HashingOverloaded: Если очередь заполнена.
+        """
+        if self.pending >= self.limit:
+            PASSWORD_HASH_REJECTED.inc()
+            raise HashingOverloaded("Очередь хэширования паролей переполнена.")
+
+        self.pending += 1
+        PASSWORD_HASH_PENDING.inc()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, partial(fn, *args)
+            )
+        finally:
+            self.pending -= 1
+            PASSWORD_HASH_PENDING.dec()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: PasswordHashPool | None = None
+
+
+def get_hash_pool() -> PasswordHashPool:
+    """
+    Возвращает пул хэширования паролей текущего воркера.
+
+    :return: Экземпляр PasswordHashPool, настроенный через PASSWORD_HASHING.
+    """
+    global _pool
+
+    if _pool is None:
+        config = settings.PASSWORD_HASHING
+        _pool = PasswordHashPool(config["WORKERS"], config["MAX_QUEUE"])
+    return _pool
+
+
+async def shutdown() -> None:
+    """Останавливает пул хэширования при остановке воркера."""
+    global _pool
+
+    if _pool is not None:
+        _pool.close()
+        logger.info("Пул хэширования паролей остановлен.")
+    _pool = None
@@ -0,0 +1,182 @@
+# api/jobs.py
+# STDLIB
+import asyncio
+import contextlib
+from datetime import timedelta
+import logging
+import uuid
+
+# THIRDPARTY
+from django.conf import settings
+from django.utils import timezone
+import httpx
+
+# FIRSTPARTY
+from api.callbacks import CallbackNotAllowed, send_callback
+from api.models import AnalysisJob
+from api.serializers import AnalysisJobSerializer
+from api.services import analyze_document
+
+
+logger = logging.getLogger(__name__)
+
+# Запущенные задачи воркера (ссылки нужны, чтобы задачи не собрал GC)
+_tasks: set[asyncio.Task] = set()
+# Цикл событий воркера и ограничение числа одновременных анализов; создаются
+# в startup (lifespan), чтобы задачи не были привязаны к циклу запроса
+_loop: asyncio.AbstractEventLoop | None = None
+_semaphore: asyncio.Semaphore | None = None
+
+
+def accepting_jobs() -> bool:
+    """
+    Проверяет, можно ли запускать задачи в фоне: startup выполнен в цикле
+    событий текущего запроса. Без lifespan (runserver, WSGI) цикл запроса
+    закрывается вместе с ним и фоновая задача осталась бы в статусе pending.
+
+    :return: True, если submit_analysis_job доступен.
+    """
+    try:
+        return _loop is asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+
+
+async def run_analysis_job(job_id: uuid.UUID) -> None:
+    """
+    Выполняет задачу анализа: отправляет документ в FastAPI, сохраняет
+    результат и, если указан callback_url, уведомляет клиента.
+
+    :param job_id: ID задачи.
+    """
+    job = await AnalysisJob.objects.aget(id=job_id)
+
+    try:
+        # Без lifespan задача выполняется в запросе, число которых ограничено
+        # сервером
+        async with _semaphore or contextlib.nullcontext():
+            job.status = AnalysisJob.Status.RUNNING
+            await job.asave(update_fields=["status", "updated_at"])
+            try:
+                job.result, job.status_code = await analyze_document(
+                    job.doc_id
+                )
+            except Exception as e:
+                logger.error("Ошибка задачи анализа %s: %s", job_id, e)
+                job.result = {"message": f"Ошибка соединения с FastAPI: {e}"}
+                job.status_code = 502
+    except asyncio.CancelledError:
+        # Остановка воркера (shutdown): задача не должна остаться
+        # pending/running
+        job.status = AnalysisJob.Status.FAILED
+        job.status_code = 503
+        job.result = {"message": "Задача прервана остановкой воркера."}
+        await job.asave(
+            update_fields=["status", "status_code", "result", "updated_at"]
+        )
+        logger.warning(
+            "Задача анализа %s прервана остановкой воркера.", job_id
+        )
+        raise
+
+    job.status = (
+        AnalysisJob.Status.SUCCEEDED
+        if job.status_code < 400
+        else AnalysisJob.Status.FAILED
+    )
+    await job.asave(
+        update_fields=["status", "status_code", "result", "updated_at"]
+    )
+    logger.info("Задача анализа %s завершена: %s", job_id, job.status)
+
+    if job.callback_url:
+        await _notify(job)
+
+
+async def _notify(job: AnalysisJob) -> None:
+    """
+    Отправляет результат задачи на callback_url клиента.
+
+    :param job: Завершённая задача.
+    """
+    try:
+        response = await send_callback(
+            job.callback_url, AnalysisJobSerializer(job).data
+        )
+        logger.info(
+            "Callback задачи %s: статус=%s", job.id, response.status_code
+        )
+    except (CallbackNotAllowed, httpx.HTTPError) as e:
+        logger.warning(
+            "Не удалось отправить callback задачи %s: %s", job.id, e
+        )
+
+
+def submit_analysis_job(job: AnalysisJob) -> None:
+    """
+    Запускает задачу анализа в фоне в цикле событий воркера (только если
+    accepting_jobs()).
+
+    :param job: Созданная задача в статусе pending.
+    """
+    task = _loop.create_task(run_analysis_job(job.id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def startup() -> None:
+    """
+    Разрешает фоновые задачи в цикле событий воркера и завершает с ошибкой
+    задачи, оставшиеся от остановленных или аварийно завершённых воркеров:
+    pending/running без изменений дольше ANALYSIS_JOBS["STALE_TIMEOUT"]
+    секунд.
+    """
+    global _loop, _semaphore
+
+    _loop = asyncio.get_running_loop()
+    _semaphore = asyncio.Semaphore(settings.ANALYSIS_JOBS["CONCURRENCY"])
+
+    stale_before = timezone.now() - timedelta(
+        seconds=settings.ANALYSIS_JOBS["STALE_TIMEOUT"]
+    )
+    try:
+        reaped = await AnalysisJob.objects.filter(
+            status__in=[
+                AnalysisJob.Status.PENDING,
+                AnalysisJob.Status.RUNNING,
+            ],
+            updated_at__lt=stale_before,
+        ).aupdate(
+            status=AnalysisJob.Status.FAILED,
+            status_code=503,
+            result={"message": "Задача прервана: воркер остановлен."},
+            updated_at=timezone.now(),
+        )
+    except Exception:
+        # Недоступная БД не должна мешать старту воркера: задачи завершит
+        # следующий
+        logger.exception("Не удалось завершить зависшие задачи анализа.")
+        return
+    if reaped:
+        logger.warning("Завершено зависших задач анализа: %s.", reaped)
+
+
+async def shutdown() -> None:
+    """
+    Дожидается завершения запущенных задач при остановке воркера;
+    незавершённые за SHUTDOWN_TIMEOUT отменяются и отмечаются failed.
+    """
+    global _loop, _semaphore
+
+    # Новые задачи выполняются в запросе, пока воркер не остановится
+    _loop = _semaphore = None
+    if not _tasks:
+        return
+    logger.info("Ожидание завершения задач анализа: %s", len(_tasks))
+    _, pending = await asyncio.wait(
+        set(_tasks), timeout=settings.ANALYSIS_JOBS["SHUTDOWN_TIMEOUT"]
+    )
+    for task in pending:
+        task.cancel()
+    # Отменённые задачи сохраняют статус failed до закрытия соединений с БД
+    await asyncio.gather(*pending, return_exceptions=True)
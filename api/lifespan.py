@@ -0,0 +1,80 @@
+# api/lifespan.py
+# STDLIB
+import logging
+
+# FIRSTPARTY
+from api import (
+    callbacks,
+    db,
+    hashing,
+    jobs,
+    metrics,
+    ratelimit,
+    singleflight,
+    tokens,
+    uploads,
+    upstream,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Хуки, выполняемые при старте и остановке воркера (в порядке регистрации)
+STARTUP_HOOKS = [
+    singleflight.startup,
+    ratelimit.startup,
+    db.startup,
+    upstream.startup,
+    tokens.startup,
+    uploads.startup,
+    jobs.startup,
+]
+SHUTDOWN_HOOKS = [
+    jobs.shutdown,
+    callbacks.shutdown,
+    tokens.shutdown,
+    uploads.shutdown,
+    upstream.shutdown,
+    hashing.shutdown,
+    ratelimit.shutdown,
+    db.shutdown,
+    metrics.shutdown,
+]
+
+
+class LifespanMiddleware:
+    """
+    ASGI-обёртка, обрабатывающая протокол lifespan.
+
+    Django не поддерживает lifespan-события, поэтому они перехватываются здесь,
+    а все остальные запросы передаются в приложение Django.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "lifespan":
+            return await self.app(scope, receive, send)
+
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    for hook in STARTUP_HOOKS:
+                        await hook()
+                except Exception as e:
+                    logger.exception("Ошибка при старте воркера.")
+                    await send(
+                        {"type": "lifespan.startup.failed", "message": str(e)}
+                    )
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for hook in SHUTDOWN_HOOKS:
+                    try:
+                        await hook()
+                    except Exception:
+                        logger.exception("Ошибка при остановке воркера.")
+                await send({"type": "lifespan.shutdown.complete"})
+                return
@@ -0,0 +1,182 @@
+# api/log.py
+# STDLIB
+import atexit
+from contextvars import ContextVar
+from datetime import datetime, timezone
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import random
+import sys
+import traceback
+
+# THIRDPARTY
+from django.conf import settings
+
+
+# Идентификатор текущего запроса (X-Request-ID), см.
+# api.middleware.LoggingMiddleware
+request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+REDACTED = "[REDACTED]"
+
+# Атрибуты LogRecord, которые не выводятся как дополнительные поля
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "request_id",
+}
+
+
+def truncate(value: str, max_length: int | None = None) -> str:
+    """
+    Обрезает строку до max_length символов (по умолчанию
+    LOG_SETTINGS["BODY_MAX_LENGTH"]).
+
+    :param value: Исходная строка.
+    :param max_length: Максимальная длина.
+    :return: Строка не длиннее max_length с пометкой об обрезке.
+    """
+    max_length = max_length or settings.LOG_SETTINGS["BODY_MAX_LENGTH"]
+    if len(value) <= max_length:
+        return value
+    return (
+        f"{value[:max_length]}...[{len(value) - max_length} символов обрезано]"
+    )
+
+
+def redact(value):
+    """
+    Заменяет значения секретных полей (пароли, токены) на [REDACTED].
+
+    :param value: Словарь, список или скаляр.
+    :return: Копия значения без секретов.
+    """
+    if isinstance(value, dict):
+        fields = settings.LOG_SETTINGS["REDACT_FIELDS"]
+        return {
+            key: REDACTED if str(key).lower() in fields else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+def should_log_body() -> bool:
+    """
+    Решает, логировать ли тело ответа для текущего запроса (выборка с
+    вероятностью LOG_SETTINGS["BODY_SAMPLE_RATE"], только при уровне DEBUG).
+
+    :return: True, если тело нужно залогировать.
+    """
+    rate = settings.LOG_SETTINGS["BODY_SAMPLE_RATE"]
+    return rate > 0 and random.random() < rate
+
+
+class RequestIdFilter(logging.Filter):
+    """Добавляет в запись идентификатор текущего запроса."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Форматирует запись в одну строку JSON.
+
+    Поля, переданные через extra, выводятся отдельными ключами (с маскировкой
+    секретов), сообщение обрезается до LOG_SETTINGS["MESSAGE_MAX_LENGTH"].
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": truncate(
+                record.getMessage(),
+                settings.LOG_SETTINGS["MESSAGE_MAX_LENGTH"],
+            ),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        extra = {
+            key: value
+            for key, value in vars(record).items()
+            if key not in _RECORD_ATTRS
+        }
+        entry.update(redact(extra))
+        if record.exc_info:
+            entry["exception"] = "".join(
+                traceback.format_exception(*record.exc_info)
+            )
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class NonBlockingHandler(QueueHandler):
+    """
+    Обработчик, передающий записи в очередь; форматирование и вывод
+    выполняются фоновым потоком QueueListener.
+
+    При переполнении очереди (queue_size) записи отбрасываются, а не
+    блокируют цикл событий; число отброшенных записей — в dropped.
+    """
+
+    def __init__(
+        self, handlers: list[logging.Handler], queue_size: int = 10000
+    ):
+        super().__init__(queue.Queue(queue_size))
+        self.dropped = 0
+        self.listener = QueueListener(
+            self.queue, *handlers, respect_handler_level=True
+        )
+        self.listener.start()
+        # Перед выходом процесса записываются все записи из очереди
+        atexit.register(self.stop)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Запись остаётся в процессе: форматирование откладывается до фонового
+        # потока
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self) -> None:
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def close(self) -> None:
+        self.stop()
+        super().close()
+
+
+def build_handler(
+    queue_size: int = 10000, output_format: str = "json"
+) -> NonBlockingHandler:
+    """
+    Фабрика обработчика для LOGGING: неблокирующий вывод в stdout.
+
+    :param queue_size: Размер очереди записей.
+    :param output_format: "json" или "text".
+    :return: Экземпляр NonBlockingHandler.
+    """
+    target = logging.StreamHandler(sys.stdout)
+    if output_format == "json":
+        target.setFormatter(JsonFormatter())
+    else:
+        target.setFormatter(
+            logging.Formatter(
+                "{asctime} {levelname} {name} [{request_id}] {message}",
+                style="{",
+            )
+        )
+    return NonBlockingHandler([target], queue_size=queue_size)
@@ -0,0 +1,25 @@
+# api/management/commands/purge_expired_tokens.py
+# THIRDPARTY
+from django.core.management.base import BaseCommand
+
+# FIRSTPARTY
+from api.tokens import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = "Удаляет истёкшие refresh-токены из чёрного списка пачками."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help=(
+                "Размер пачки "
+                '(по умолчанию TOKEN_BLACKLIST["PURGE_BATCH_SIZE"]).'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        purged = purge_expired_tokens(options["batch_size"])
+        self.stdout.write(f"Удалено истёкших токенов: {purged}.")
@@ -0,0 +1,25 @@
+# api/management/commands/purge_expired_uploads.py
+# THIRDPARTY
+from django.core.management.base import BaseCommand
+
+# FIRSTPARTY
+from api.uploads import purge_expired_uploads
+
+
+class Command(BaseCommand):
+    help = "Удаляет незавершённые загрузки по частям с истёкшим сроком."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help=(
+                "Размер пачки "
+                '(по умолчанию CHUNKED_UPLOAD["PURGE_BATCH_SIZE"]).'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        purged = purge_expired_uploads(options["batch_size"])
+        self.stdout.write(f"Удалено незавершённых загрузок: {purged}.")
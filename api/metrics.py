@@ -0,0 +1,161 @@
+# api/metrics.py
+# STDLIB
+from contextvars import ContextVar
+import os
+
+# THIRDPARTY
+from prometheus_client import Counter, Gauge, Histogram, multiprocess
+
+
+# При нескольких воркерах метрики пишутся в PROMETHEUS_MULTIPROC_DIR и
+# объединяются при экспорте /metrics (django_prometheus.exports)
+
+# Размеры тел: от 1 КБ до 1 ГБ
+SIZE_BUCKETS = (
+    1 << 10,
+    1 << 14,
+    1 << 17,
+    1 << 20,
+    1 << 23,
+    1 << 26,
+    1 << 28,
+    1 << 30,
+)
+
+# Запросы к FastAPI
+UPSTREAM_LATENCY = Histogram(
+    "proxy_upstream_request_duration_seconds",
+    "Длительность запроса к FastAPI (одна попытка) по операциям.",
+    ["operation", "outcome"],
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "proxy_upstream_requests_in_flight",
+    "Запросы к FastAPI, выполняющиеся в данный момент.",
+    ["operation"],
+    multiprocess_mode="livesum",
+)
+UPSTREAM_RETRIES = Counter(
+    "proxy_upstream_retries_total",
+    "Повторы запросов к FastAPI.",
+    ["operation"],
+)
+UPSTREAM_RETRY_BUDGET_EXHAUSTED = Counter(
+    "proxy_upstream_retry_budget_exhausted_total",
+    "Повторы, пропущенные из-за исчерпанного бюджета повторов.",
+)
+UPSTREAM_SHORT_CIRCUITED = Counter(
+    "proxy_upstream_short_circuited_total",
+    "Запросы, отклонённые разомкнутым выключателем.",
+)
+BREAKER_OPEN = Gauge(
+    "proxy_upstream_breaker_open",
+    "Выключатель FastAPI разомкнут (1) или замкнут (0).",
+    multiprocess_mode="livemax",
+)
+
+# Размеры загружаемых файлов и ответов
+UPLOAD_SIZE = Histogram(
+    "proxy_upload_size_bytes",
+    "Размер загружаемых документов.",
+    buckets=SIZE_BUCKETS,
+)
+UPLOAD_DEDUPLICATION = Counter(
+    "proxy_upload_deduplication_total",
+    "Проверки загрузок по SHA-256: найден уже загруженный документ (hit) "
+    "или нет (miss).",
+    ["result"],
+)
+RESPONSE_SIZE = Histogram(
+    "proxy_response_size_bytes",
+    "Размер тела ответа по маршрутам (без потоковых ответов).",
+    ["view"],
+    buckets=SIZE_BUCKETS,
+)
+
+# Сжатие ответов (api.compression)
+COMPRESSION_BYTES = Counter(
+    "proxy_response_compression_bytes_total",
+    "Байты тел ответов до (original) и после (compressed) сжатия "
+    "по кодировкам.",
+    ["encoding", "body"],
+)
+COMPRESSION_LATENCY = Histogram(
+    "proxy_response_compression_duration_seconds",
+    "Время сжатия тела ответа или чанка потокового ответа.",
+    ["encoding"],
+    buckets=(0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5),
+)
+
+# Аутентификация
+JWT_VERIFY_LATENCY = Histogram(
+    "proxy_jwt_verify_duration_seconds",
+    "Время проверки JWT в token_required.",
+    ["cache"],
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01),
+)
+AUTH_DB_QUERIES = Histogram(
+    "proxy_auth_db_queries",
+    "Число запросов к БД на один запрос к эндпоинтам аутентификации.",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21),
+)
+PASSWORD_HASH_PENDING = Gauge(
+    "proxy_password_hash_pending",
+    "Операции хэширования паролей в пуле (выполняются и ждут в очереди).",
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "proxy_password_hash_rejected_total",
+    "Запросы, отклонённые из-за переполнения очереди хэширования (429).",
+)
+
+# Ограничение частоты запросов
+RATE_LIMITED = Counter(
+    "proxy_rate_limited_total",
+    "Запросы, отклонённые с 429 по частоте (rate) или числу одновременных "
+    "(in_flight).",
+    ["route", "reason"],
+)
+
+# Кэш текстов и объединение запросов
+TEXT_CACHE_EVENTS = Counter(
+    "proxy_text_cache_events_total",
+    "События кэша текстов документов "
+    "(hits, misses, stale_hits, evictions, refreshes).",
+    ["event"],
+)
+SINGLE_FLIGHT_SHARED = Counter(
+    "proxy_single_flight_shared_total",
+    "Запросы к FastAPI, объединённые с уже выполняющимися.",
+    ["scope"],
+)
+
+# Число SQL-запросов в рамках текущего HTTP-запроса (для AUTH_DB_QUERIES)
+db_queries: ContextVar[list[int] | None] = ContextVar(
+    "db_queries", default=None
+)
+
+
+def count_queries(execute, sql, params, many, context):
+    """Обёртка execute_wrapper, считающая запросы текущего HTTP-запроса."""
+    counter = db_queries.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def on_connection_created(sender, connection, **kwargs):
+    """Подключает счётчик запросов к каждому новому соединению с БД."""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+async def shutdown() -> None:
+    """
+    Помечает процесс завершённым для сборщика метрик нескольких воркеров.
+
+    Значения live-метрик (livesum, livemax) завершённого воркера перестают
+    учитываться в /metrics.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,257 @@
+# api/middleware.py
+# STDLIB
+import logging
+import re
+import time
+import uuid
+
+# THIRDPARTY
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+# FIRSTPARTY
+from api.compression import (
+    acompress,
+    acompress_stream,
+    compress,
+    compress_stream,
+    negotiate,
+)
+from api.log import request_id
+from api.metrics import AUTH_DB_QUERIES, RESPONSE_SIZE, db_queries
+
+
+logger = logging.getLogger("api.access")
+
+# Допустимый X-Request-ID от клиента или балансировщика
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Маршруты аутентификации, для которых считается число запросов к БД
+AUTH_VIEWS = {
+    "register_user",
+    "token_obtain_pair",
+    "token_refresh",
+    "token_verify",
+}
+
+
+class MetricsMiddleware:
+    """
+    Метрики прокси: размер тела ответа по маршрутам и число запросов к БД
+    на эндпоинтах аутентификации.
+
+    Длительность и число запросов по маршрутам собирает django_prometheus.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = [0]
+        token = db_queries.set(counter)
+        try:
+            response = self.get_response(request)
+        finally:
+            db_queries.reset(token)
+        self._observe(request, response, counter[0])
+        return response
+
+    async def __acall__(self, request):
+        counter = [0]
+        token = db_queries.set(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            db_queries.reset(token)
+        self._observe(request, response, counter[0])
+        return response
+
+    @staticmethod
+    def _observe(request, response, queries: int) -> None:
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return
+        view = match.view_name
+        if not response.streaming:
+            RESPONSE_SIZE.labels(view).observe(len(response.content))
+        if view in AUTH_VIEWS:
+            AUTH_DB_QUERIES.labels(view).observe(queries)
+
+
+class LoggingMiddleware:
+    """
+    Идентификатор запроса и журнал доступа.
+
+    Берёт X-Request-ID из запроса (или создаёт новый), делает его доступным
+    всем записям лога запроса (api.log.request_id), возвращает в ответе и
+    пишет одну структурированную запись о запросе.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token, started = self._start(request)
+        try:
+            response = self.get_response(request)
+            self._finish(request, response, started)
+        finally:
+            request_id.reset(token)
+        return response
+
+    async def __acall__(self, request):
+        token, started = self._start(request)
+        try:
+            response = await self.get_response(request)
+            self._finish(request, response, started)
+        finally:
+            request_id.reset(token)
+        return response
+
+    @staticmethod
+    def _start(request):
+        value = request.headers.get("X-Request-ID", "")
+        if not REQUEST_ID_PATTERN.match(value):
+            value = uuid.uuid4().hex
+        return request_id.set(value), time.perf_counter()
+
+    @staticmethod
+    def _finish(request, response, started: float) -> None:
+        response["X-Request-ID"] = request_id.get()
+        logger.info(
+            "%s %s %s",
+            request.method,
+            request.path,
+            response.status_code,
+            extra={
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "duration_ms": round(
+                    (time.perf_counter() - started) * 1000, 2
+                ),
+            },
+        )
+
+
+class CompressionMiddleware:
+    """
+    Сжатие ответов (gzip, brotli, zstd) по Accept-Encoding, в том числе
+    потоковых: текст документа передаётся клиенту сжатым по мере получения
+    из FastAPI.
+
+    Не сжимаются ответы меньше MIN_SIZE, уже сжатые (Content-Encoding),
+    частичные (206), с Cache-Control: no-transform и ответы эндпоинтов
+    аутентификации: токены рядом с данными запроса в сжатом теле уязвимы
+    для атак по размеру ответа (BREACH). Настройки — RESPONSE_COMPRESSION.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        encoding = self._encoding(request, response)
+        if encoding is None:
+            return response
+        if response.streaming:
+            return self._streaming(response, encoding)
+        return self._replace(
+            response, encoding, compress(encoding, response.content)
+        )
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        encoding = self._encoding(request, response)
+        if encoding is None:
+            return response
+        if response.streaming:
+            return self._streaming(response, encoding)
+        return self._replace(
+            response, encoding, await acompress(encoding, response.content)
+        )
+
+    @staticmethod
+    def _encoding(request, response) -> str | None:
+        config = settings.RESPONSE_COMPRESSION
+        if not config["ENABLED"] or response.status_code in (204, 206, 304):
+            return None
+        if response.has_header("Content-Encoding") or response.has_header(
+            "Content-Range"
+        ):
+            return None
+        if "no-transform" in response.get("Cache-Control", ""):
+            return None
+        match = getattr(request, "resolver_match", None)
+        if match is not None and match.view_name in AUTH_VIEWS:
+            return None
+        content_type = (
+            response.get("Content-Type", "").split(";")[0].strip().lower()
+        )
+        if not content_type.startswith(tuple(config["CONTENT_TYPES"])):
+            return None
+        if response.streaming:
+            size = response.get("Content-Length", "")
+            if size.isdigit() and int(size) < config["MIN_SIZE"]:
+                return None
+        elif len(response.content) < config["MIN_SIZE"]:
+            return None
+        # Ответ зависит от Accept-Encoding, даже если этот клиент сжатие не
+        # принимает
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return negotiate(request.headers.get("Accept-Encoding", ""))
+
+    @staticmethod
+    def _weaken_etag(response) -> None:
+        # Сжатое тело не совпадает побайтно с исходным: ETag становится слабым
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = f"W/{etag}"
+
+    def _replace(self, response, encoding: str, compressed: bytes):
+        # Сжатие не окупилось (уже сжатые или случайные данные)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        self._weaken_etag(response)
+        return response
+
+    def _streaming(self, response, encoding: str):
+        # Асинхронное тело остаётся асинхронным и при синхронной цепочке
+        # middleware
+        if response.is_async:
+            response.streaming_content = acompress_stream(
+                encoding, response.streaming_content
+            )
+        else:
+            response.streaming_content = compress_stream(
+                encoding, response.streaming_content
+            )
+        del response["Content-Length"]
+        response["Content-Encoding"] = encoding
+        self._weaken_etag(response)
+        return response
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.4 on 2026-10-17 17:21
+
+# STDLIB
+import uuid
+
+# THIRDPARTY
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_delete_users"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnalysisJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("doc_id", models.PositiveBigIntegerField()),
+                ("user_id", models.BigIntegerField(db_index=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "В очереди"),
+                            ("running", "Выполняется"),
+                            ("succeeded", "Выполнена"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "status_code",
+                    models.PositiveSmallIntegerField(blank=True, null=True),
+                ),
+                ("result", models.JSONField(blank=True, null=True)),
+                ("callback_url", models.URLField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
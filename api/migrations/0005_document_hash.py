@@ -0,0 +1,41 @@
+# Generated by Django 5.1.4 on 2026-10-17 17:55
+
+# THIRDPARTY
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_chunked_upload"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentHash",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("user_id", models.BigIntegerField()),
+                ("sha256", models.CharField(max_length=64)),
+                ("doc_id", models.PositiveBigIntegerField(db_index=True)),
+                ("size", models.PositiveBigIntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user_id", "sha256"),
+                        name="unique_user_document_hash",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.1.4 on 2026-10-17 18:39
+
+# THIRDPARTY
+from django.db import migrations, models
+
+
+def backfill_documents(apps, schema_editor):
+    """
+    Владельцы документов, загруженных до появления Document: из завершённых
+    загрузок по частям и хэшей дедупликации.
+    """
+    Document = apps.get_model("api", "Document")
+    ChunkedUpload = apps.get_model("api", "ChunkedUpload")
+    DocumentHash = apps.get_model("api", "DocumentHash")
+
+    documents = {}
+    for doc_id, user_id, size in DocumentHash.objects.values_list(
+        "doc_id", "user_id", "size"
+    ):
+        documents[doc_id] = Document(
+            doc_id=doc_id, user_id=user_id, name="", size=size
+        )
+    uploads = ChunkedUpload.objects.filter(doc_id__isnull=False).values_list(
+        "doc_id", "user_id", "filename", "size"
+    )
+    for doc_id, user_id, filename, size in uploads:
+        documents[doc_id] = Document(
+            doc_id=doc_id, user_id=user_id, name=filename, size=size
+        )
+    Document.objects.bulk_create(
+        documents.values(), batch_size=1000, ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_document_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Document",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("user_id", models.BigIntegerField()),
+                ("doc_id", models.PositiveBigIntegerField(unique=True)),
+                ("name", models.CharField(max_length=255)),
+                ("size", models.PositiveBigIntegerField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("uploaded", "Загружен"),
+                            ("analyzed", "Отправлен на анализ"),
+                        ],
+                        default="uploaded",
+                        max_length=16,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user_id", "id"], name="document_user_id_idx"
+                    ),
+                    models.Index(
+                        fields=["user_id", "status", "id"],
+                        name="document_user_status_id_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,177 @@
+# STDLIB
+from datetime import datetime, timedelta
+import uuid
+
+# THIRDPARTY
+from django.conf import settings
+from django.db import models
+
+
+class AnalysisJob(models.Model):
+    """Асинхронная задача анализа документа в FastAPI."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "В очереди"
+        RUNNING = "running", "Выполняется"
+        SUCCEEDED = "succeeded", "Выполнена"
+        FAILED = "failed", "Ошибка"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    doc_id = models.PositiveBigIntegerField()
+    # ID пользователя из JWT (user_id), создавшего задачу
+    user_id = models.BigIntegerField(db_index=True)
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.PENDING
+    )
+    # Код и тело ответа FastAPI (в формате ответа AnalyzeDocumentView)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    callback_url = models.URLField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"AnalysisJob({self.id}, doc_id={self.doc_id}, {self.status})"
+
+
+class ChunkedUpload(models.Model):
+    """
+    Возобновляемая загрузка документа по частям.
+
+    Части хранятся на диске (CHUNKED_UPLOAD["DIR"]/<id>/<номер>.part), их
+    размеры и контрольные суммы — в UploadChunk.
+    """
+
+    class Status(models.TextChoices):
+        ACTIVE = "active", "Загружается"
+        COMPLETING = "completing", "Отправляется в FastAPI"
+        COMPLETED = "completed", "Завершена"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # ID пользователя из JWT (user_id), начавшего загрузку
+    user_id = models.BigIntegerField(db_index=True)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=255, blank=True)
+    size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.ACTIVE
+    )
+    # ID документа в FastAPI после завершения загрузки
+    doc_id = models.PositiveBigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def chunk_count(self) -> int:
+        """Число частей файла."""
+        return -(-self.size // self.chunk_size)
+
+    @property
+    def expires_at(self) -> datetime:
+        """
+        Срок завершения загрузки (CHUNKED_UPLOAD["EXPIRE_AFTER"]): позже
+        незавершённая загрузка удаляется (api.uploads.purge_expired_uploads).
+        """
+        expire_after = settings.CHUNKED_UPLOAD["EXPIRE_AFTER"]
+        return self.created_at + timedelta(seconds=expire_after)
+
+    def chunk_length(self, index: int) -> int:
+        """
+        Ожидаемый размер части: chunk_size, кроме последней.
+
+        :param index: Номер части, начиная с 0.
+        :return: Размер части в байтах.
+        """
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    def __str__(self) -> str:
+        return f"ChunkedUpload({self.id}, {self.filename}, {self.status})"
+
+
+class UploadChunk(models.Model):
+    """Принятая часть загрузки и её контрольная сумма SHA-256."""
+
+    upload = models.ForeignKey(
+        ChunkedUpload, on_delete=models.CASCADE, related_name="chunks"
+    )
+    index = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["upload", "index"], name="unique_upload_chunk"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"UploadChunk({self.upload_id}, {self.index})"
+
+
+class DocumentHash(models.Model):
+    """
+    SHA-256 содержимого загруженного документа и его ID в FastAPI.
+
+    Используется для дедупликации загрузок (DOCUMENT_UPLOAD["DEDUPLICATE"]):
+    повторная загрузка того же файла пользователем возвращает существующий ID.
+    """
+
+    # ID пользователя из JWT (user_id), загрузившего документ
+    user_id = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    doc_id = models.PositiveBigIntegerField(db_index=True)
+    size = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user_id", "sha256"], name="unique_user_document_hash"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"DocumentHash({self.sha256[:12]}, doc_id={self.doc_id})"
+
+
+class Document(models.Model):
+    """
+    Документ, загруженный через прокси: владелец и ID в FastAPI.
+
+    По нему проверяется доступ к документу (api.documents.has_access) и
+    строится список документов пользователя (v1/docs/, постранично по курсору).
+    """
+
+    class Status(models.TextChoices):
+        UPLOADED = "uploaded", "Загружен"
+        ANALYZED = "analyzed", "Отправлен на анализ"
+
+    # ID пользователя из JWT (user_id), загрузившего документ
+    user_id = models.BigIntegerField()
+    # ID документа в FastAPI
+    doc_id = models.PositiveBigIntegerField(unique=True)
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.UPLOADED
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Список документов пользователя по убыванию id (курсор — id)
+            models.Index(
+                fields=["user_id", "id"], name="document_user_id_idx"
+            ),
+            models.Index(
+                fields=["user_id", "status", "id"],
+                name="document_user_status_id_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Document({self.doc_id}, {self.name}, {self.status})"
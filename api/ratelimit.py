@@ -0,0 +1,366 @@
+# api/ratelimit.py
+# STDLIB
+import asyncio
+import json
+import logging
+import math
+import time
+
+# THIRDPARTY
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import Resolver404, resolve
+import jwt
+
+# FIRSTPARTY
+from api.decorators import decode_token
+from api.metrics import RATE_LIMITED
+
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryRateLimitBackend:
+    """
+    Token bucket и счётчики запросов в обработке в памяти воркера.
+
+    Лимиты действуют отдельно в каждом воркере; для общих лимитов
+    нескольких воркеров используется RedisRateLimitBackend.
+
+    Полная корзина не отличается от отсутствующей, поэтому раз в
+    SWEEP_INTERVAL секунд корзины, успевшие пополниться до ёмкости,
+    удаляются (как PEXPIRE в Redis): память ограничена числом недавно
+    активных пользователей.
+    """
+
+    SWEEP_INTERVAL = 60.0
+
+    def __init__(self):
+        # Ключ -> (токены, время обновления, время пополнения до ёмкости)
+        self._buckets: dict[str, tuple[float, float, float]] = {}
+        self._in_flight: dict[str, int] = {}
+        self._swept_at = time.monotonic()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """
+        Забирает один токен из корзины.
+
+        :param key: Ключ корзины (маршрут и пользователь).
+        :param rate: Пополнение корзины, токенов в секунду.
+        :param burst: Ёмкость корзины.
+        :return: 0, если токен получен, иначе секунды до появления токена.
+        """
+        now = time.monotonic()
+        if now - self._swept_at >= self.SWEEP_INTERVAL:
+            self._sweep(now)
+        tokens, updated, _full_at = self._buckets.get(key, (burst, now, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens < 1:
+            wait = (1 - tokens) / rate
+        else:
+            tokens -= 1
+        self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+        return wait
+
+    def _sweep(self, now: float) -> None:
+        self._buckets = {
+            key: bucket
+            for key, bucket in self._buckets.items()
+            if bucket[2] > now
+        }
+        self._swept_at = now
+
+    async def acquire(self, key: str, limit: int) -> bool:
+        """
+        Занимает слот запроса в обработке.
+
+        :param key: Ключ пользователя.
+        :param limit: Максимум одновременных запросов.
+        :return: True, если слот получен.
+        """
+        if self._in_flight.get(key, 0) >= limit:
+            return False
+        self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        return True
+
+    async def release(self, key: str) -> None:
+        count = self._in_flight.get(key, 0) - 1
+        if count > 0:
+            self._in_flight[key] = count
+        else:
+            self._in_flight.pop(key, None)
+
+
+# Атомарное обновление token bucket в Redis: KEYS[1] — корзина, ARGV —
+# скорость, ёмкость, текущее время. Возвращает ожидание в мс (0 — разрешено)
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call("HMGET", KEYS[1], "tokens", "updated")
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens < 1 then
+    wait = math.ceil((1 - tokens) / rate * 1000)
+else
+    tokens = tokens - 1
+end
+redis.call("HSET", KEYS[1], "tokens", tokens, "updated", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return wait
+"""
+
+# Занимает слот, если счётчик меньше лимита. KEYS[1] — счётчик, ARGV — лимит и
+# TTL
+ACQUIRE_SCRIPT = """
+local count = tonumber(redis.call("GET", KEYS[1]) or "0")
+if count >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call("INCR", KEYS[1])
+redis.call("EXPIRE", KEYS[1], ARGV[2])
+return 1
+"""
+
+# Освобождает слот, не уводя счётчик ниже нуля (например, после истечения
+# IN_FLIGHT_TTL счётчик уже удалён). KEYS[1] — счётчик
+RELEASE_SCRIPT = """
+local count = tonumber(redis.call("GET", KEYS[1]) or "0")
+if count <= 1 then
+    redis.call("DEL", KEYS[1])
+    return 0
+end
+return redis.call("DECR", KEYS[1])
+"""
+
+
+class RedisRateLimitBackend:
+    """
+    Token bucket и счётчики запросов в обработке в Redis, общие для всех
+    воркеров.
+
+    Счётчик запросов в обработке живёт не дольше IN_FLIGHT_TTL секунд, чтобы
+    слоты аварийно завершённого воркера не занимали лимит навсегда.
+    """
+
+    def __init__(self, url: str, in_flight_ttl: int):
+        self.url = url
+        self.in_flight_ttl = in_flight_ttl
+        self._client = None
+        self._client_loop: asyncio.AbstractEventLoop | None = None
+
+    def _redis(self):
+        # Клиент redis.asyncio привязан к циклу событий, в котором создан
+        # THIRDPARTY
+        import redis.asyncio as redis
+
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = redis.from_url(self.url)
+            self._client_loop = loop
+        return self._client
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        wait_ms = await self._redis().eval(
+            TOKEN_BUCKET_SCRIPT,
+            1,
+            f"ratelimit:bucket:{key}",
+            rate,
+            burst,
+            time.time(),
+        )
+        return int(wait_ms) / 1000
+
+    async def acquire(self, key: str, limit: int) -> bool:
+        acquired = await self._redis().eval(
+            ACQUIRE_SCRIPT,
+            1,
+            f"ratelimit:inflight:{key}",
+            limit,
+            self.in_flight_ttl,
+        )
+        return bool(acquired)
+
+    async def release(self, key: str) -> None:
+        await self._redis().eval(
+            RELEASE_SCRIPT, 1, f"ratelimit:inflight:{key}"
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+
+
+_backend = None
+
+
+def check_routes(routes: dict) -> None:
+    """
+    Проверяет лимиты маршрутов RATE_LIMIT["ROUTES"].
+
+    :param routes: Лимиты по маршрутам.
+    :raises ImproperlyConfigured: Если RATE не больше 0 или BURST меньше 1
+             (корзина никогда не пополнится или не вместит ни одного запроса).
+    """
+    for route, limits in routes.items():
+        try:
+            rate, burst = float(limits["RATE"]), float(limits["BURST"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ImproperlyConfigured(
+                f'RATE_LIMIT["ROUTES"][{route!r}]: нужны числа RATE и BURST.'
+            ) from e
+        if not rate > 0 or not burst >= 1:
+            raise ImproperlyConfigured(
+                f'RATE_LIMIT["ROUTES"][{route!r}]: '
+                "нужны RATE > 0 и BURST >= 1, "
+                f"заданы {rate} и {burst}."
+            )
+
+
+def get_backend():
+    """
+    Возвращает хранилище лимитов, настроенное через RATE_LIMIT["BACKEND"].
+
+    :return: MemoryRateLimitBackend или RedisRateLimitBackend.
+    :raises ImproperlyConfigured: Если лимиты маршрутов некорректны.
+    """
+    global _backend
+
+    if _backend is None:
+        config = settings.RATE_LIMIT
+        check_routes(config["ROUTES"])
+        if config["BACKEND"] == "redis":
+            _backend = RedisRateLimitBackend(
+                config["REDIS_URL"], config["IN_FLIGHT_TTL"]
+            )
+        else:
+            _backend = MemoryRateLimitBackend()
+    return _backend
+
+
+async def startup() -> None:
+    """
+    Проверяет лимиты маршрутов при старте воркера, а не при первом запросе.
+    """
+    if settings.RATE_LIMIT["ENABLED"]:
+        get_backend()
+
+
+async def shutdown() -> None:
+    """Закрывает соединение с Redis при остановке воркера."""
+    global _backend
+
+    if isinstance(_backend, RedisRateLimitBackend):
+        await _backend.close()
+    _backend = None
+
+
+def _user_id(scope) -> str | None:
+    """
+    user_id из JWT в заголовке Authorization или None, если токен невалиден.
+    """
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            auth_header = value.decode("latin-1")
+            break
+    else:
+        return None
+    if not auth_header.startswith("Bearer "):
+        return None
+    try:
+        payload = decode_token(auth_header.removeprefix("Bearer ").strip())
+    except jwt.InvalidTokenError:
+        # Невалидный токен отклонит token_required
+        return None
+    user_id = payload.get("user_id")
+    return str(user_id) if user_id is not None else None
+
+
+async def _reject(send, retry_after: float) -> None:
+    body = json.dumps(
+        {"message": "Слишком много запросов, повторите позже."},
+        ensure_ascii=False,
+    ).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """
+    ASGI-обёртка, ограничивающая частоту и число одновременных запросов
+    пользователя к маршрутам документов.
+
+    Проверка выполняется до передачи запроса в Django, поэтому отклонённый
+    запрос (429 с Retry-After) не читает тело и не обращается к FastAPI.
+    Частота ограничивается token bucket на пару маршрут + user_id
+    (RATE_LIMIT["ROUTES"]), число одновременных запросов пользователя ко всем
+    этим маршрутам — RATE_LIMIT["MAX_IN_FLIGHT"].
+
+    Лимит с ключом "маршрут:МЕТОД" (например "upload_doc:GET") применяется
+    вместо лимита маршрута для запросов этим методом; "IN_FLIGHT": False
+    исключает такие запросы из ограничения одновременных.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        config = settings.RATE_LIMIT
+        if scope["type"] != "http" or not config["ENABLED"]:
+            return await self.app(scope, receive, send)
+
+        path = scope["path"].removeprefix(scope.get("root_path", ""))
+        try:
+            route = resolve(path).url_name
+        except Resolver404:
+            return await self.app(scope, receive, send)
+        method_route = f"{route}:{scope['method']}"
+        if method_route in config["ROUTES"]:
+            route = method_route
+        limits = config["ROUTES"].get(route)
+        user_id = _user_id(scope) if limits is not None else None
+        if user_id is None:
+            return await self.app(scope, receive, send)
+
+        backend = get_backend()
+        wait = await backend.take(
+            f"{route}:{user_id}", limits["RATE"], limits["BURST"]
+        )
+        if wait:
+            RATE_LIMITED.labels(route, "rate").inc()
+            logger.warning(
+                "Превышена частота запросов %s пользователем %s.",
+                route,
+                user_id,
+            )
+            return await _reject(send, wait)
+
+        max_in_flight = config["MAX_IN_FLIGHT"]
+        if not max_in_flight or not limits.get("IN_FLIGHT", True):
+            return await self.app(scope, receive, send)
+        if not await backend.acquire(user_id, max_in_flight):
+            RATE_LIMITED.labels(route, "in_flight").inc()
+            logger.warning(
+                "Превышено число одновременных запросов пользователем %s.",
+                user_id,
+            )
+            return await _reject(send, config["IN_FLIGHT_RETRY_AFTER"])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await backend.release(user_id)
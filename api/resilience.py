@@ -0,0 +1,259 @@
+# api/resilience.py
+# STDLIB
+import asyncio
+import logging
+import random
+import time
+
+# THIRDPARTY
+from django.conf import settings
+import httpx
+
+# FIRSTPARTY
+from api.metrics import (
+    BREAKER_OPEN,
+    UPSTREAM_IN_FLIGHT,
+    UPSTREAM_LATENCY,
+    UPSTREAM_RETRIES,
+    UPSTREAM_RETRY_BUDGET_EXHAUSTED,
+    UPSTREAM_SHORT_CIRCUITED,
+)
+from api.upstream import get_client
+
+
+logger = logging.getLogger(__name__)
+
+# Операции, которые безопасно повторять (идемпотентные запросы)
+IDEMPOTENT_OPERATIONS = {"text", "delete"}
+
+# Ответы FastAPI, означающие перегрузку или недоступность (повторяются и
+# учитываются автоматическим выключателем)
+UNAVAILABLE_STATUSES = {502, 503, 504}
+
+
+class UpstreamUnavailable(Exception):
+    """FastAPI недоступен: выключатель разомкнут или исчерпаны попытки."""
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель для FastAPI.
+
+    После FAILURE_THRESHOLD ошибок подряд размыкается и сразу отклоняет
+    запросы в течение RESET_TIMEOUT секунд. Затем пропускает один пробный
+    запрос (half_open): при успехе замыкается, при ошибке снова размыкается.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """
+        Проверяет, можно ли отправить запрос в FastAPI.
+
+        :return: True, если запрос разрешён.
+        """
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info("Выключатель FastAPI замкнут.")
+            BREAKER_OPEN.set(0)
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        probe_failed = self.state == self.HALF_OPEN
+        if probe_failed or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("Выключатель FastAPI разомкнут.")
+                BREAKER_OPEN.set(1)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release_probe(self) -> None:
+        """
+        Снимает флаг пробного запроса, если он был отменён без результата.
+        """
+        self._probe_in_flight = False
+
+
+class RetryBudget:
+    """
+    Бюджет повторов: каждый запрос пополняет бюджет на RATIO, каждый повтор
+    расходует единицу. Ограничивает долю повторов, чтобы они не усиливали
+    нагрузку на перегруженный FastAPI.
+    """
+
+    def __init__(self, ratio: float, min_tokens: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = min_tokens
+
+    def deposit(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+_breaker: CircuitBreaker | None = None
+_retry_budget: RetryBudget | None = None
+
+
+def get_breaker() -> CircuitBreaker:
+    """
+    Возвращает выключатель FastAPI, настроенный через FASTAPI_RESILIENCE.
+
+    :return: Экземпляр CircuitBreaker воркера.
+    """
+    global _breaker
+
+    if _breaker is None:
+        config = settings.FASTAPI_RESILIENCE
+        _breaker = CircuitBreaker(
+            failure_threshold=config["BREAKER_FAILURE_THRESHOLD"],
+            reset_timeout=config["BREAKER_RESET_TIMEOUT"],
+        )
+    return _breaker
+
+
+def get_retry_budget() -> RetryBudget:
+    """
+    Возвращает бюджет повторов, настроенный через FASTAPI_RESILIENCE.
+
+    :return: Экземпляр RetryBudget воркера.
+    """
+    global _retry_budget
+
+    if _retry_budget is None:
+        config = settings.FASTAPI_RESILIENCE
+        _retry_budget = RetryBudget(
+            ratio=config["RETRY_BUDGET_RATIO"],
+            min_tokens=config["RETRY_BUDGET_MIN"],
+            max_tokens=config["RETRY_BUDGET_MAX"],
+        )
+    return _retry_budget
+
+
+def _timeout(operation: str) -> httpx.Timeout:
+    """Таймаут запроса для операции (upload, analyze, text, delete)."""
+    config = settings.FASTAPI_RESILIENCE
+    return httpx.Timeout(
+        config["TIMEOUTS"].get(operation, config["DEFAULT_TIMEOUT"]),
+        connect=config["CONNECT_TIMEOUT"],
+    )
+
+
+async def _backoff(attempt: int) -> None:
+    """Пауза перед повтором: экспоненциальная задержка с полным джиттером."""
+    config = settings.FASTAPI_RESILIENCE
+    delay = min(config["BACKOFF_MAX"], config["BACKOFF_BASE"] * 2**attempt)
+    await asyncio.sleep(random.uniform(0, delay))
+
+
+async def upstream_request(
+    operation: str, method: str, url: str, stream: bool = False, **kwargs
+) -> httpx.Response:
+    """
+    Выполняет запрос к FastAPI с таймаутом операции, повторами и выключателем.
+
+    Повторяются только идемпотентные операции (text, delete) при ошибках
+    соединения, таймаутах и ответах 502/503/504, в пределах бюджета повторов.
+
+    :param operation: Имя операции (upload, analyze, text, delete).
+    :param method: HTTP-метод (get, post, delete).
+    :param url: URL FastAPI.
+    :param stream: Вернуть ответ без чтения тела (для потоковой передачи).
+    :param kwargs: Дополнительные аргументы запроса httpx.
+    :return: Ответ FastAPI.
+    :raises UpstreamUnavailable: Если выключатель разомкнут или FastAPI
+                                 недоступен.
+    """
+    client = get_client()
+    breaker = get_breaker()
+    retry_budget = get_retry_budget()
+    retries = 0
+    if operation in IDEMPOTENT_OPERATIONS:
+        retries = settings.FASTAPI_RESILIENCE["RETRIES"]
+    retry_budget.deposit()
+
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            UPSTREAM_SHORT_CIRCUITED.inc()
+            raise UpstreamUnavailable("FastAPI временно недоступен.")
+
+        error = None
+        outcome = "error"
+        started = time.perf_counter()
+        in_flight = UPSTREAM_IN_FLIGHT.labels(operation)
+        in_flight.inc()
+        try:
+            if stream:
+                request = client.build_request(
+                    method.upper(), url, timeout=_timeout(operation), **kwargs
+                )
+                response = await client.send(request, stream=True)
+            else:
+                response = await getattr(client, method)(
+                    url, timeout=_timeout(operation), **kwargs
+                )
+        except httpx.TransportError as e:
+            error = e
+            breaker.record_failure()
+        except BaseException:
+            breaker.release_probe()
+            raise
+        else:
+            outcome = str(response.status_code)
+            if response.status_code not in UNAVAILABLE_STATUSES:
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+        finally:
+            in_flight.dec()
+            UPSTREAM_LATENCY.labels(operation, outcome).observe(
+                time.perf_counter() - started
+            )
+
+        if attempt >= retries or not retry_budget.withdraw():
+            if attempt < retries:
+                UPSTREAM_RETRY_BUDGET_EXHAUSTED.inc()
+            if error is not None:
+                logger.error("FastAPI недоступен (%s): %r", operation, error)
+                raise UpstreamUnavailable("FastAPI недоступен.") from error
+            return response
+
+        if error is None and stream:
+            await response.aclose()
+        attempt += 1
+        UPSTREAM_RETRIES.labels(operation).inc()
+        logger.warning(
+            "Повтор запроса %s в FastAPI, попытка %s.", operation, attempt
+        )
+        await _backoff(attempt)
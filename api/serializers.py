@@ -1,33 +1,224 @@
+# THIRDPARTY
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
-from api.services import create_user
+
+# FIRSTPARTY
+from api.callbacks import CallbackNotAllowed, check_callback_url
+from api.models import AnalysisJob, ChunkedUpload, Document
 
 
 class UserRegistrationSerializer(serializers.Serializer):
-    """Сериализатор для регистрации пользователя."""
+    """
+    Сериализатор для регистрации пользователя.
+
+    Уникальность имени не проверяется отдельным запросом: её обеспечивает
+    ограничение БД при создании пользователя (services.create_user).
+    """
+
+    username = serializers.CharField(
+        required=True, max_length=User._meta.get_field("username").max_length
+    )
+    password = serializers.CharField(write_only=True, required=True)
+
+
+class TokenObtainSerializer(serializers.Serializer):
+    """Сериализатор учётных данных для получения пары токенов."""
+
+    default_error_messages = {
+        "no_active_account": _(
+            "No active account found with the given credentials"
+        )
+    }
+
     username = serializers.CharField(required=True)
     password = serializers.CharField(write_only=True, required=True)
 
-    def validate_username(self, value: str) -> str:
+
+class TokenRefreshSerializer(serializers.Serializer):
+    """Сериализатор запроса на обновление токенов."""
+
+    refresh = serializers.CharField(required=True)
+
+
+class TokenVerifySerializer(serializers.Serializer):
+    """Сериализатор запроса на проверку токена."""
+
+    token = serializers.CharField(required=True)
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    """Сериализатор одной операции пакетного запроса."""
+
+    op = serializers.ChoiceField(
+        choices=["upload", "analyze", "text", "delete"]
+    )
+    doc_id = serializers.IntegerField(required=False, min_value=1)
+    file = serializers.CharField(required=False)
+
+    def validate(self, attrs: dict) -> dict:
         """
-        Проверяет, что имя пользователя уникально.
+        Проверяет, что у операции указан doc_id или, для upload, имя поля с
+        файлом.
 
-        :param value: Введённое имя пользователя.
-        :return: Имя пользователя, если проверка прошла успешно.
-        :raises serializers.ValidationError: Если пользователь с таким именем уже существует.
+        :param attrs: Данные операции.
+        :return: Данные операции, если проверка прошла успешно.
+        :raises serializers.ValidationError: Если нужное поле не указано.
         """
+        if attrs["op"] == "upload":
+            if not attrs.get("file"):
+                raise serializers.ValidationError(
+                    "Для upload нужно указать поле file."
+                )
+        elif not attrs.get("doc_id"):
+            raise serializers.ValidationError(
+                "Для операции нужно указать doc_id."
+            )
+        return attrs
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    """Сериализатор пакетного запроса операций с документами."""
+
+    operations = serializers.ListField(
+        child=BatchOperationSerializer(),
+        allow_empty=False,
+        max_length=settings.DOCUMENT_BATCH["MAX_OPERATIONS"],
+    )
+
+
+class AnalyzeRequestSerializer(serializers.Serializer):
+    """Сериализатор параметров асинхронного анализа документа."""
 
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError("Пользователь с таким именем уже существует.")
+    callback_url = serializers.URLField(
+        required=False, allow_blank=True, default=""
+    )
+
+    def validate_callback_url(self, value: str) -> str:
+        """
+        Допускает только https-адреса вне внутренней сети (api.callbacks).
+        """
+        if value:
+            try:
+                check_callback_url(value)
+            except CallbackNotAllowed as e:
+                raise serializers.ValidationError(str(e)) from e
         return value
 
-    def create(self, validated_data: dict) -> User:
+
+class AnalysisJobSerializer(serializers.ModelSerializer):
+    """Сериализатор задачи анализа документа."""
+
+    class Meta:
+        model = AnalysisJob
+        fields = [
+            "id",
+            "doc_id",
+            "status",
+            "status_code",
+            "result",
+            "callback_url",
+            "created_at",
+            "updated_at",
+        ]
+
+
+class DocumentSerializer(serializers.ModelSerializer):
+    """Сериализатор документа пользователя в списке v1/docs/."""
+
+    id = serializers.IntegerField(source="doc_id", read_only=True)
+
+    class Meta:
+        model = Document
+        fields = ["id", "name", "size", "status", "created_at", "updated_at"]
+
+
+class DocumentListQuerySerializer(serializers.Serializer):
+    """Сериализатор параметров списка документов (?limit=&cursor=&status=)."""
+
+    limit = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=settings.DOCUMENT_OWNERSHIP["MAX_PAGE_SIZE"],
+        default=settings.DOCUMENT_OWNERSHIP["PAGE_SIZE"],
+    )
+    cursor = serializers.CharField(required=False)
+    status = serializers.ChoiceField(
+        choices=Document.Status.choices, required=False
+    )
+
+
+class ChunkedUploadCreateSerializer(serializers.Serializer):
+    """Сериализатор параметров новой загрузки по частям."""
+
+    filename = serializers.CharField(max_length=255)
+    content_type = serializers.CharField(
+        max_length=255, required=False, allow_blank=True, default=""
+    )
+    size = serializers.IntegerField(
+        min_value=1, max_value=settings.CHUNKED_UPLOAD["MAX_SIZE"]
+    )
+    chunk_size = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=settings.CHUNKED_UPLOAD["MAX_CHUNK_SIZE"],
+        default=settings.CHUNKED_UPLOAD["CHUNK_SIZE"],
+    )
+
+    def validate(self, attrs: dict) -> dict:
         """
-        Создаёт нового пользователя на основе проверенных данных.
+        Проверяет размер части (не меньше CHUNKED_UPLOAD["MIN_CHUNK_SIZE"];
+        последняя часть — остаток файла и может быть меньше) и число частей
+        (не больше CHUNKED_UPLOAD["MAX_CHUNK_COUNT"]).
 
-        :param validated_data: Проверенные данные пользователя.
-        :return: Созданный объект пользователя.
+        :param attrs: Параметры загрузки.
+        :return: Параметры загрузки, если проверка прошла успешно.
+        :raises serializers.ValidationError: Если части слишком малы или их
+                                             слишком много.
         """
-        return create_user(
-            username=validated_data["username"], password=validated_data["password"]
-        )
+        min_chunk_size = settings.CHUNKED_UPLOAD["MIN_CHUNK_SIZE"]
+        if attrs["chunk_size"] < min_chunk_size:
+            raise serializers.ValidationError(
+                {
+                    "chunk_size": "Размер части должен быть не меньше "
+                    f"{min_chunk_size} байт."
+                }
+            )
+        max_chunk_count = settings.CHUNKED_UPLOAD["MAX_CHUNK_COUNT"]
+        chunk_count = -(-attrs["size"] // attrs["chunk_size"])
+        if chunk_count > max_chunk_count:
+            raise serializers.ValidationError(
+                {
+                    "chunk_size": "Частей не может быть больше "
+                    f"{max_chunk_count}: увеличьте размер части."
+                }
+            )
+        return attrs
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    """Сериализатор состояния загрузки по частям с номерами принятых частей."""
+
+    chunk_count = serializers.IntegerField(read_only=True)
+    received_chunks = serializers.SerializerMethodField()
+    expires_at = serializers.DateTimeField(read_only=True)
+
+    class Meta:
+        model = ChunkedUpload
+        fields = [
+            "id",
+            "filename",
+            "size",
+            "chunk_size",
+            "chunk_count",
+            "received_chunks",
+            "status",
+            "doc_id",
+            "created_at",
+            "updated_at",
+            "expires_at",
+        ]
+
+    def get_received_chunks(self, upload: ChunkedUpload) -> list[int]:
+        return self.context.get("received_chunks", [])
@@ -1,29 +1,565 @@
+# STDLIB
+import asyncio
+from functools import partial
+import hashlib
+import json
 import logging
+import os
+import time
 
+# THIRDPARTY
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    check_password,
+    identify_hasher,
+    make_password,
+)
 from django.contrib.auth.models import User
-from django.contrib.auth.hashers import make_password
-from django.db import transaction
+from django.core.files.uploadedfile import UploadedFile
+from django.db import IntegrityError, transaction
+from django.utils.http import parse_http_date_safe
+from django.utils.translation import gettext_lazy as _
+import httpx
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+
+# FIRSTPARTY
+from api.cache import (
+    CacheEntry,
+    get_text_cache,
+    invalidate_text,
+    text_flight_key,
+)
+from api.documents import (
+    add_document,
+    has_access,
+    mark_analyzed,
+    remove_document,
+)
+from api.hashing import get_hash_pool
+from api.log import redact, should_log_body, truncate
+from api.metrics import UPLOAD_DEDUPLICATION, UPLOAD_SIZE
+from api.models import DocumentHash
+from api.resilience import UpstreamUnavailable, upstream_request
+from api.singleflight import get_single_flight
+from api.streaming import MultipartFileStream
+from api.tokens import RefreshToken, is_blacklisted
+from api.upstream import UpstreamError
+
 
 logger = logging.getLogger(__name__)
 
+# URL FastAPI
+FASTAPI_URL = os.getenv("FASTAPI_URL", "http://127.0.0.1:8000/")
+
+
+class UserAlreadyExists(Exception):
+    """Пользователь с таким именем уже существует."""
+
+
+def _insert_user(username: str, password_hash: str) -> User:
+    if transaction.get_connection().in_atomic_block:
+        # Точка сохранения: ошибка уникальности не ломает внешнюю транзакцию
+        with transaction.atomic():
+            return User.objects.create(
+                username=username, password=password_hash
+            )
+    # В режиме autocommit INSERT выполняется без BEGIN/COMMIT
+    return User.objects.create(username=username, password=password_hash)
 
-def create_user(username: str, password: str) -> User:
+
+async def create_user(username: str, password: str) -> User:
     """
-    Создаёт нового пользователя в транзакции.
+    Создаёт нового пользователя одним INSERT.
+
+    Уникальность имени проверяет ограничение БД, а не отдельный запрос,
+    поэтому проверка не расходится с вставкой при одновременных регистрациях.
 
     :param username: Имя пользователя для нового аккаунта.
     :param password: Пароль для нового пользователя (в незашифрованном виде).
     :return: Созданный объект пользователя.
+    :raises UserAlreadyExists: Если имя пользователя уже занято.
+    :raises HashingOverloaded: Если очередь хэширования паролей переполнена.
     """
+    logger.info("Создание пользователя с именем '%s'.", username)
+    # Хэширование пароля нагружает CPU, поэтому выполняется в отдельном пуле
+    password_hash = await get_hash_pool().run(make_password, password)
     try:
-        with transaction.atomic():
-            logger.info(f"Создание пользователя с именем '{username}'.")
-            user = User.objects.create(
-                username=username,
-                password=make_password(password)
+        user = await sync_to_async(_insert_user)(username, password_hash)
+    except IntegrityError:
+        logger.info("Пользователь '%s' уже существует.", username)
+        raise UserAlreadyExists(username)
+    logger.info("Пользователь '%s' успешно создан.", username)
+    return user
+
+
+async def authenticate_user(username: str, password: str) -> User | None:
+    """
+    Проверяет учётные данные пользователя, не блокируя цикл событий.
+
+    Повторяет ModelBackend.authenticate: пароль проверяется в пуле хэширования,
+    для несуществующего пользователя пароль тоже хэшируется (одинаковое время
+    ответа), хэш с устаревшими параметрами обновляется.
+
+    :param username: Имя пользователя.
+    :param password: Пароль (в незашифрованном виде).
+    :return: Активный пользователь или None, если данные неверны.
+    :raises HashingOverloaded: Если очередь хэширования паролей переполнена.
+    """
+    pool = get_hash_pool()
+    user = await User.objects.filter(username=username).afirst()
+    if user is None:
+        await pool.run(make_password, password)
+        return None
+
+    if not await pool.run(check_password, password, user.password):
+        return None
+    if not user.is_active:
+        return None
+
+    if identify_hasher(user.password).must_update(user.password):
+        user.password = await pool.run(make_password, password)
+        await user.asave(update_fields=["password"])
+        logger.info("Хэш пароля пользователя '%s' обновлён.", username)
+    return user
+
+
+async def refresh_tokens(token: str) -> dict:
+    """
+    Выдаёт новый access-токен по refresh-токену (и новый refresh-токен при
+    ROTATE_REFRESH_TOKENS), повторяя TokenRefreshSerializer simplejwt.
+
+    :param token: Refresh-токен.
+    :return: access и, при ротации, refresh.
+    :raises TokenError: Если токен невалиден, истёк или уже использован.
+    :raises AuthenticationFailed: Если пользователь удалён или неактивен.
+    """
+    refresh = await RefreshToken.averified(token)
+
+    user_id = refresh.payload.get(jwt_settings.USER_ID_CLAIM)
+    if user_id:
+        user = await User.objects.filter(
+            **{jwt_settings.USER_ID_FIELD: user_id}
+        ).afirst()
+        if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                _("No active account found for the given token."),
+                "no_active_account",
+            )
+
+    data = {"access": str(refresh.access_token)}
+    if jwt_settings.ROTATE_REFRESH_TOKENS:
+        await refresh.arotate()
+        data["refresh"] = str(refresh)
+    return data
+
+
+async def verify_token(token: str) -> None:
+    """
+    Проверяет подпись, срок действия и (при BLACKLIST_AFTER_ROTATION)
+    чёрный список токена любого типа, повторяя TokenVerifySerializer simplejwt.
+
+    :param token: Access- или refresh-токен.
+    :raises TokenError: Если токен невалиден или истёк.
+    :raises ValidationError: Если токен в чёрном списке.
+    """
+    untyped = UntypedToken(token)
+    if jwt_settings.BLACKLIST_AFTER_ROTATION:
+        if await is_blacklisted(untyped.get(jwt_settings.JTI_CLAIM)):
+            raise ValidationError(_("Token is blacklisted"))
+
+
+def _log_response(operation: str, response: httpx.Response) -> None:
+    """
+    Логирует ответ FastAPI: статус и размер тела. Само тело (обрезанное, без
+    секретов) логируется только на уровне DEBUG и выборочно, см. LOG_SETTINGS.
+
+    :param operation: Имя операции (upload, analyze, text, delete).
+    :param response: Ответ FastAPI.
+    """
+    logger.info(
+        "Ответ от FastAPI (%s): статус=%s",
+        operation,
+        response.status_code,
+        extra={
+            "operation": operation,
+            "status": response.status_code,
+            "size": len(response.content),
+        },
+    )
+    if logger.isEnabledFor(logging.DEBUG) and should_log_body():
+        try:
+            body = json.dumps(redact(response.json()), ensure_ascii=False)
+        except ValueError:
+            body = response.text
+        logger.debug("Тело ответа FastAPI (%s): %s", operation, truncate(body))
+
+
+def error_result(
+    response: httpx.Response, default_message: str
+) -> tuple[dict, int]:
+    """
+    Формирует результат операции по ответу FastAPI с ошибкой.
+
+    Тело ошибки может быть не JSON (страница прокси перед FastAPI) или JSON
+    без объекта — тогда в сообщение попадает текст ответа.
+
+    :param response: Ответ FastAPI.
+    :param default_message: Сообщение, если FastAPI не вернул своё.
+    :return: Данные ответа и HTTP-статус.
+    """
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    if isinstance(body, dict):
+        error_message = body.get("message", default_message)
+    else:
+        error_message = truncate(response.text.strip()) or default_message
+    return {
+        "message": f"Error from FastAPI: {error_message}"
+    }, response.status_code
+
+
+def _unavailable_result(error: UpstreamUnavailable) -> tuple[dict, int]:
+    """
+    Формирует результат операции, если FastAPI недоступен.
+
+    :param error: Ошибка слоя устойчивости.
+    :return: Данные ответа и HTTP-статус 503.
+    """
+    return {"message": str(error)}, status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+def _sha256(file_obj: UploadedFile, chunk_size: int) -> str:
+    """
+    Считает SHA-256 файла, читая его чанками (память не зависит от размера
+    файла).
+
+    :param file_obj: Загруженный файл.
+    :param chunk_size: Размер чанка.
+    :return: SHA-256 в hex.
+    """
+    digest = hashlib.sha256()
+    for chunk in file_obj.chunks(chunk_size):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def upload_document(
+    file_obj: UploadedFile,
+    streaming: bool | None = None,
+    user_id: int | None = None,
+) -> tuple[dict, int]:
+    """
+    Загружает документ в FastAPI.
+
+    Если включена дедупликация (DOCUMENT_UPLOAD["DEDUPLICATE"]) и указан
+    пользователь, файл с уже загруженным им содержимым (по SHA-256) не
+    отправляется: возвращается ID существующего документа со статусом 200.
+
+    :param file_obj: Загруженный файл (или api.uploads.ChunkedFile).
+    :param streaming: Отправлять файл потоком; по умолчанию
+                      DOCUMENT_UPLOAD["STREAMING"].
+    :param user_id: ID пользователя из JWT (владелец документа, дедупликация).
+    :return: Данные ответа (id документа) и HTTP-статус.
+    """
+    logger.info("Принят файл: %s, размер: %s", file_obj.name, file_obj.size)
+    UPLOAD_SIZE.observe(file_obj.size)
+
+    sha256 = None
+    if user_id is not None and settings.DOCUMENT_UPLOAD["DEDUPLICATE"]:
+        # Хэширование большого файла — работа CPU и диска, не в цикле событий
+        sha256 = await sync_to_async(_sha256, thread_sensitive=False)(
+            file_obj, settings.DOCUMENT_UPLOAD["CHUNK_SIZE"]
+        )
+        doc_id = (
+            await DocumentHash.objects.filter(user_id=user_id, sha256=sha256)
+            .values_list("doc_id", flat=True)
+            .afirst()
+        )
+        if doc_id is not None:
+            UPLOAD_DEDUPLICATION.labels("hit").inc()
+            logger.info(
+                "Файл %s уже загружен: документ %s.", file_obj.name, doc_id
             )
-            logger.info(f"Пользователь '{username}' успешно создан.")
-        return user
-    except Exception as e:
-        logger.error(f"Ошибка при создании пользователя '{username}': {e}")
-        raise ValueError("Не удалось создать пользователя.")
+            return {
+                "id": doc_id,
+                "message": "Документ уже загружен.",
+                "duplicate": True,
+            }, status.HTTP_200_OK
+        UPLOAD_DEDUPLICATION.labels("miss").inc()
+
+    # Ссылка на загрузку
+    upload_url = f"{FASTAPI_URL}documents"
+    logger.debug("Отправка файла в FastAPI: %s", upload_url)
+
+    if streaming is None:
+        streaming = settings.DOCUMENT_UPLOAD["STREAMING"]
+    if streaming:
+        # Потоковая отправка: файл передаётся чанками, не загружаясь в память
+        # целиком
+        stream = MultipartFileStream(
+            file_obj, chunk_size=settings.DOCUMENT_UPLOAD["CHUNK_SIZE"]
+        )
+        request_kwargs = {"content": stream, "headers": stream.headers}
+    else:
+        # Чтение содержимого файла
+        content = file_obj.read()
+        file_obj.seek(0)
+        request_kwargs = {"files": {"file": (file_obj.name, content)}}
+
+    # Отправка запроса
+    try:
+        response = await upstream_request(
+            "upload", "post", upload_url, **request_kwargs
+        )
+    except UpstreamUnavailable as e:
+        return _unavailable_result(e)
+
+    _log_response("upload", response)
+
+    # Обработка ответа
+    if response.status_code not in [200, 201]:
+        return error_result(response, "Ошибка загрузки.")
+
+    doc_id = response.json().get("id")
+    # Проверка, что id был получен
+    if not doc_id:
+        return {
+            "message": "ID документа не получен."
+        }, status.HTTP_500_INTERNAL_SERVER_ERROR
+
+    if user_id is not None:
+        await add_document(doc_id, user_id, file_obj.name, file_obj.size)
+    if sha256 is not None:
+        # Одновременная загрузка того же файла могла уже сохранить хэш
+        await DocumentHash.objects.abulk_create(
+            [
+                DocumentHash(
+                    user_id=user_id,
+                    sha256=sha256,
+                    doc_id=doc_id,
+                    size=file_obj.size,
+                )
+            ],
+            ignore_conflicts=True,
+        )
+    return {
+        "id": doc_id,
+        "message": "Документ успешно загружен.",
+    }, status.HTTP_201_CREATED
+
+
+async def analyze_document(doc_id: int) -> tuple[dict, int]:
+    """
+    Отправляет документ на анализ в FastAPI.
+
+    :param doc_id: ID документа.
+    :return: Данные ответа и HTTP-статус.
+    """
+    analyze_url = f"{FASTAPI_URL}documents/{doc_id}/analyze"
+    logger.debug(
+        "Отправка запроса на анализ %s в FastAPI: %s", doc_id, analyze_url
+    )
+
+    # Отправка запроса
+    try:
+        response = await upstream_request("analyze", "post", analyze_url)
+    except UpstreamUnavailable as e:
+        return _unavailable_result(e)
+
+    _log_response("analyze", response)
+
+    # Обработка ответа
+    if response.status_code not in [200, 201]:
+        return error_result(response, "Ошибка анализа.")
+
+    # Результат анализа может изменить текст документа
+    await invalidate_text(doc_id)
+    await mark_analyzed(doc_id)
+    return {
+        "message": "Документ успешно отправлен на анализ."
+    }, status.HTTP_200_OK
+
+
+async def fetch_document_text(doc_id: int) -> CacheEntry:
+    """
+    Получает текст документа через кэш текстов или напрямую из FastAPI.
+
+    ETag и Last-Modified берутся из ответа FastAPI (слабые ETag не
+    используются), иначе ETag вычисляется по тексту, а временем изменения
+    считается время получения текста.
+
+    :param doc_id: ID документа.
+    :return: Запись с текстом документа, ETag и временем изменения.
+    :raises UpstreamError: Если FastAPI вернул ошибку.
+    :raises UpstreamUnavailable: Если FastAPI недоступен.
+    """
+    text_url = f"{FASTAPI_URL}documents/{doc_id}/text"
+    logger.debug(
+        "Запрос на получение текста %s в FastAPI: %s", doc_id, text_url
+    )
+
+    async def fetch_text() -> CacheEntry:
+        # Отправка запроса
+        response = await upstream_request("text", "get", text_url)
+
+        _log_response("text", response)
+        if response.status_code not in [200, 201]:
+            raise UpstreamError(response)
+        etag = response.headers.get("ETag")
+        return CacheEntry(
+            response.json().get("text", "Текст недоступен."),
+            time.time(),
+            etag=etag if etag and not etag.startswith("W/") else None,
+            last_modified=parse_http_date_safe(
+                response.headers.get("Last-Modified", "")
+            ),
+        )
+
+    # Одновременные запросы текста одного документа объединяются в один
+    single_flight = get_single_flight()
+    if single_flight is not None:
+        fetch = partial(
+            single_flight.do, text_flight_key(doc_id), fetch_text
+        )
+    else:
+        fetch = fetch_text
+
+    text_cache = get_text_cache()
+    if text_cache is not None:
+        return await text_cache.get_or_fetch(doc_id, fetch)
+    return await fetch()
+
+
+async def read_document_text(
+    doc_id: int,
+) -> tuple[CacheEntry | None, dict, int]:
+    """
+    Получает текст документа вместе с его ETag и временем изменения.
+
+    :param doc_id: ID документа.
+    :return: Запись с текстом (None при ошибке), данные ответа и HTTP-статус.
+    """
+    try:
+        entry = await fetch_document_text(doc_id)
+    except UpstreamError as e:
+        return None, *error_result(e.response, "Ошибка получения текста.")
+    except UpstreamUnavailable as e:
+        return None, *_unavailable_result(e)
+    return (
+        entry,
+        {"text": entry.text, "message": "Текст успешно получен."},
+        status.HTTP_200_OK,
+    )
+
+
+async def get_document_text(doc_id: int) -> tuple[dict, int]:
+    """
+    Получает текст документа.
+
+    :param doc_id: ID документа.
+    :return: Данные ответа (текст) и HTTP-статус.
+    """
+    _, data, status_code = await read_document_text(doc_id)
+    return data, status_code
+
+
+async def delete_document(doc_id: int) -> tuple[dict, int]:
+    """
+    Удаляет документ в FastAPI.
+
+    :param doc_id: ID документа.
+    :return: Данные ответа и HTTP-статус.
+    """
+    delete_url = f"{FASTAPI_URL}documents/{doc_id}"
+    logger.debug(
+        "Запрос на удаление doc_id=%s в FastAPI: %s", doc_id, delete_url
+    )
+
+    # Отправка запроса
+    try:
+        response = await upstream_request("delete", "delete", delete_url)
+    except UpstreamUnavailable as e:
+        return _unavailable_result(e)
+
+    _log_response("delete", response)
+
+    # Обработка ответа
+    if response.status_code not in [200, 204]:
+        return error_result(response, "Ошибка удаления.")
+
+    await invalidate_text(doc_id)
+    # Удалённый документ больше не должен находиться дедупликацией загрузок
+    await DocumentHash.objects.filter(doc_id=doc_id).adelete()
+    await remove_document(doc_id)
+    return {"message": "Документ успешно удален."}, status.HTTP_200_OK
+
+
+# Операции пакетного запроса над существующими документами
+BATCH_OPERATIONS = {
+    "analyze": analyze_document,
+    "text": get_document_text,
+    "delete": delete_document,
+}
+
+
+async def run_batch(
+    operations: list[dict], files: dict, user_id: int | None = None
+) -> list[dict]:
+    """
+    Выполняет операции пакетного запроса параллельно с ограничением
+    конкурентности.
+
+    :param operations: Проверенные операции (op, doc_id или file).
+    :param files: Загруженные файлы запроса (для операций upload).
+    :param user_id: ID пользователя из JWT (владелец документов).
+    :return: Результаты в порядке операций, включая ошибочные.
+    """
+    semaphore = asyncio.Semaphore(settings.DOCUMENT_BATCH["CONCURRENCY"])
+
+    async def run(index: int, operation: dict) -> dict:
+        async with semaphore:
+            try:
+                if operation["op"] == "upload":
+                    data, status_code = await upload_document(
+                        files[operation["file"]], user_id=user_id
+                    )
+                elif user_id is not None and not await has_access(
+                    operation["doc_id"], user_id
+                ):
+                    data = {"message": "Документ не найден."}
+                    status_code = status.HTTP_404_NOT_FOUND
+                else:
+                    handler = BATCH_OPERATIONS[operation["op"]]
+                    data, status_code = await handler(operation["doc_id"])
+            except httpx.HTTPError as e:
+                logger.error(
+                    "Ошибка операции %s в пакете: %s", operation["op"], e
+                )
+                data = {"message": f"Ошибка соединения с FastAPI: {e}"}
+                status_code = status.HTTP_502_BAD_GATEWAY
+            except Exception:
+                # Ошибка одной операции (БД, неожиданный ответ) не должна
+                # прерывать gather и превращать весь пакет в 500
+                logger.exception(
+                    "Ошибка операции %s в пакете.", operation["op"]
+                )
+                data = {"message": "Внутренняя ошибка операции."}
+                status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+        return {
+            "index": index,
+            "op": operation["op"],
+            "doc_id": operation.get("doc_id"),
+            "status": status_code,
+            **data,
+        }
+
+    return await asyncio.gather(
+        *(run(i, op) for i, op in enumerate(operations))
+    )
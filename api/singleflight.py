@@ -0,0 +1,219 @@
+# api/singleflight.py
+# STDLIB
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+import uuid
+
+# THIRDPARTY
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+# FIRSTPARTY
+from api.metrics import SINGLE_FLIGHT_SHARED
+
+
+logger = logging.getLogger(__name__)
+
+# Счётчики объединения запросов
+stats = {"leaders": 0, "shared": 0, "remote_shared": 0}
+
+# Снятие блокировки только её владельцем: блокировка, истёкшая по таймауту и
+# захваченная другим воркером, не удаляется
+RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых одновременных запросов в пределах воркера.
+
+    Первый вызов с ключом выполняет запрос, остальные вызовы с тем же ключом,
+    пришедшие до его завершения, ожидают тот же результат (или исключение).
+    Завершённые запросы не запоминаются, поэтому устаревших данных нет.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет fn или присоединяется к уже выполняющемуся вызову с тем же
+        ключом.
+
+        :param key: Ключ запроса (например, text:<doc_id>).
+        :param fn: Корутина, выполняющая запрос.
+        :return: Результат fn.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            stats["leaders"] += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            stats["shared"] += 1
+            SINGLE_FLIGHT_SHARED.labels("worker").inc()
+        # shield: отмена одного из ожидающих не отменяет общий запрос
+        return await asyncio.shield(task)
+
+    async def forget(self, key: str) -> None:
+        """
+        Отвязывает выполняющийся запрос от ключа (например, после
+        инвалидации данных): уже ожидающие получат его результат, а новые
+        вызовы выполнят запрос заново.
+
+        :param key: Ключ запроса.
+        """
+        self._calls.pop(key, None)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+
+class RedisSingleFlight(SingleFlight):
+    """
+    Объединение запросов между воркерами через блокировку в Redis.
+
+    Воркер, захвативший блокировку, выполняет запрос и публикует результат
+    под ключом, уникальным для этого запроса. Остальные воркеры ждут
+    результат, пока блокировка существует; если лидер завершился с ошибкой,
+    они выполняют запрос сами.
+
+    Значение блокировки — ID запроса лидера; снимается она сравнением с ним
+    (RELEASE_SCRIPT), поэтому нужен кэш django-redis.
+    """
+
+    def __init__(self, alias: str, lock_timeout: float, poll_interval: float):
+        super().__init__()
+        self.cache = caches[alias]
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+
+    def _release(self, lock_key: str, flight_id: str) -> None:
+        client = self.cache.client
+        client.get_client(write=True).eval(
+            RELEASE_SCRIPT,
+            1,
+            client.make_key(lock_key),
+            client.encode(flight_id),
+        )
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        return await super().do(key, lambda: self._do_remote(key, fn))
+
+    async def forget(self, key: str) -> None:
+        # Без блокировки воркеры, ждущие лидера, не дождавшись результата,
+        # выполнят запрос сами; сам лидер блокировку уже не снимет (чужое
+        # значение RELEASE_SCRIPT не удаляет)
+        await super().forget(key)
+        await self.cache.adelete(f"singleflight:lock:{key}")
+
+    async def _do_remote(
+        self, key: str, fn: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        lock_key = f"singleflight:lock:{key}"
+        flight_id = uuid.uuid4().hex
+
+        if await self.cache.aadd(lock_key, flight_id, self.lock_timeout):
+            try:
+                result = await fn()
+                await self.cache.aset(
+                    f"singleflight:result:{flight_id}",
+                    result,
+                    self.lock_timeout,
+                )
+                return result
+            finally:
+                await sync_to_async(self._release, thread_sensitive=False)(
+                    lock_key, flight_id
+                )
+
+        # Запрос уже выполняет другой воркер: ждём его результат
+        deadline = time.monotonic() + self.lock_timeout
+        leader_id = await self.cache.aget(lock_key)
+        while leader_id is not None and time.monotonic() < deadline:
+            result = await self.cache.aget(f"singleflight:result:{leader_id}")
+            if result is not None:
+                stats["remote_shared"] += 1
+                SINGLE_FLIGHT_SHARED.labels("cluster").inc()
+                return result
+            await asyncio.sleep(self.poll_interval)
+            # Лидер мог опубликовать результат и снять блокировку между
+            # проверками
+            current_id = await self.cache.aget(lock_key)
+            if current_id != leader_id:
+                result = await self.cache.aget(
+                    f"singleflight:result:{leader_id}"
+                )
+                if result is not None:
+                    stats["remote_shared"] += 1
+                    SINGLE_FLIGHT_SHARED.labels("cluster").inc()
+                    return result
+                leader_id = current_id
+
+        return await fn()
+
+
+_single_flight: SingleFlight | None = None
+
+
+def _check_shared_cache(alias: str) -> None:
+    """
+    Проверяет, что кэш для блокировок общий для воркеров (django-redis).
+
+    :param alias: Алиас кэша из CACHES.
+    :raises ImproperlyConfigured: Если кэш локальный (например, locmem по
+             умолчанию без REDIS_URL) — объединение между воркерами с ним
+             молча не работало бы.
+    """
+    try:
+        # THIRDPARTY
+        from django_redis.cache import RedisCache
+    except ImportError:
+        RedisCache = None
+    if RedisCache is None or not isinstance(caches[alias], RedisCache):
+        raise ImproperlyConfigured(
+            "SINGLE_FLIGHT_REDIS требует кэш django-redis, "
+            f"а CACHES[{alias!r}] — {type(caches[alias]).__name__}."
+        )
+
+
+def get_single_flight() -> SingleFlight | None:
+    """
+    Возвращает объединитель запросов, настроенный через SINGLE_FLIGHT.
+
+    :return: Экземпляр SingleFlight или None, если объединение отключено.
+    """
+    global _single_flight
+
+    config = settings.SINGLE_FLIGHT
+    if not config["ENABLED"]:
+        return None
+    if _single_flight is None:
+        if config["REDIS"]:
+            _check_shared_cache(config["CACHE_ALIAS"])
+            _single_flight = RedisSingleFlight(
+                config["CACHE_ALIAS"],
+                lock_timeout=config["LOCK_TIMEOUT"],
+                poll_interval=config["POLL_INTERVAL"],
+            )
+        else:
+            _single_flight = SingleFlight()
+    return _single_flight
+
+
+async def startup() -> None:
+    """
+    Проверяет настройку SINGLE_FLIGHT при старте воркера, а не при первом
+    запросе.
+    """
+    get_single_flight()
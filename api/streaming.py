@@ -0,0 +1,123 @@
+# api/streaming.py
+# STDLIB
+from typing import AsyncIterator
+import uuid
+
+# THIRDPARTY
+from asgiref.sync import sync_to_async
+from django.core.files.uploadedfile import UploadedFile
+from django.http import StreamingHttpResponse
+import httpx
+
+
+def _quote(value: str) -> str:
+    """
+    Экранирует значение параметра заголовка multipart (как это делает httpx).
+
+    :param value: Исходное значение (например, имя файла).
+    :return: Экранированное значение.
+    """
+    return (
+        value.replace("\\", "\\\\")
+        .replace('"', "%22")
+        .replace("\r", "%0D")
+        .replace("\n", "%0A")
+    )
+
+
+class MultipartFileStream:
+    """
+    Потоковое multipart/form-data тело с одним файлом.
+
+    Файл читается фиксированными чанками прямо из загруженного объекта
+    (для больших файлов Django хранит его во временном файле на диске),
+    поэтому пиковое потребление памяти ограничено размером чанка.
+    """
+
+    def __init__(
+        self,
+        file_obj: UploadedFile,
+        field_name: str = "file",
+        chunk_size: int = 64 * 1024,
+    ):
+        self.file_obj = file_obj
+        self.chunk_size = chunk_size
+        self.boundary = uuid.uuid4().hex
+        filename = _quote(file_obj.name or "upload")
+        content_type = getattr(file_obj, "content_type", None)
+        content_type = content_type or "application/octet-stream"
+        self.head = (
+            f"--{self.boundary}\r\n"
+            f"Content-Disposition: form-data; "
+            f'name="{_quote(field_name)}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+        self.tail = f"\r\n--{self.boundary}--\r\n".encode()
+
+    @property
+    def headers(self) -> dict:
+        """
+        Заголовки запроса: тип содержимого с границей и точная длина тела.
+        """
+        return {
+            "Content-Type": f"multipart/form-data; boundary={self.boundary}",
+            "Content-Length": str(
+                len(self.head) + self.file_obj.size + len(self.tail)
+            ),
+        }
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        """
+        Асинхронно отдаёт тело запроса чанками.
+
+        :return: Асинхронный итератор по частям тела.
+        """
+        yield self.head
+        # Чтение файла блокирующее: каждый чанк читается в потоке, чтобы не
+        # останавливать цикл событий на диске
+        chunks = iter(self.file_obj.chunks(self.chunk_size))
+        read = sync_to_async(next, thread_sensitive=False)
+        while (chunk := await read(chunks, None)) is not None:
+            yield chunk
+        yield self.tail
+
+
+# Заголовки ответа FastAPI, которые передаются клиенту без изменений
+PASSTHROUGH_HEADERS = (
+    "Content-Type",
+    "Content-Length",
+    "Content-Encoding",
+    "Content-Range",
+    "Accept-Ranges",
+    "ETag",
+    "Last-Modified",
+    "Cache-Control",
+)
+
+
+def streaming_passthrough(response: httpx.Response) -> StreamingHttpResponse:
+    """
+    Передаёт тело ответа FastAPI клиенту по мере получения, без буферизации.
+
+    Тело отдаётся «как есть» (без декодирования и повторной сериализации),
+    соединение с FastAPI закрывается после отправки последнего чанка
+    или при обрыве соединения клиентом.
+
+    :param response: Ответ FastAPI, полученный с stream=True.
+    :return: Потоковый HTTP-ответ Django.
+    """
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            async for chunk in response.aiter_raw():
+                yield chunk
+        finally:
+            await response.aclose()
+
+    streaming_response = StreamingHttpResponse(
+        body(), status=response.status_code
+    )
+    for header in PASSTHROUGH_HEADERS:
+        if header in response.headers:
+            streaming_response[header] = response.headers[header]
+    return streaming_response
@@ -0,0 +1,85 @@
+# api/token_cache.py
+# STDLIB
+from collections import OrderedDict
+import hashlib
+import time
+
+# THIRDPARTY
+from django.conf import settings
+
+
+class VerifiedTokenCache:
+    """
+    Ограниченный кэш уже проверенных JWT-токенов.
+
+    Ключ — SHA-256 от токена (сам токен в памяти не хранится), значение —
+    декодированный пейлоад. Запись действует с nbf токена (не раньше момента
+    проверки) до истечения exp, но не дольше ttl секунд; при переполнении
+    вытесняются давно не использовавшиеся записи.
+
+    Кэш свой у каждого воркера и о чёрном списке не знает: запись
+    отозванного токена живёт до ttl — это верхняя граница окна, в котором
+    кэш отвечает иначе, чем проверка без него.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        # Ключ -> (пейлоад, начало действия, окончание действия)
+        self._entries: OrderedDict[str, tuple[dict, float, float]] = (
+            OrderedDict()
+        )
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> dict | None:
+        """
+        Возвращает пейлоад ранее проверенного токена.
+
+        :param token: JWT-токен из заголовка Authorization.
+        :return: Пейлоад или None, если токена нет в кэше, он истёк или ещё
+                 не действует.
+        """
+        key = self.digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        payload, not_before, expires_at = entry
+        now = time.time()
+        if now < not_before or expires_at <= now:
+            # Токен проверится заново и получит ту же ошибку, что без кэша
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def set(self, token: str, payload: dict) -> None:
+        """
+        Сохраняет пейлоад успешно проверенного токена.
+
+        :param token: JWT-токен.
+        :param payload: Декодированный пейлоад токена.
+        """
+        if "exp" not in payload:
+            return
+        key = self.digest(token)
+        now = time.time()
+        self._entries.pop(key, None)
+        self._entries[key] = (
+            payload,
+            max(payload.get("nbf", now), now),
+            min(payload["exp"], now + self.ttl),
+        )
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+token_cache = VerifiedTokenCache(
+    max_size=settings.JWT_VERIFY_CACHE["MAX_SIZE"],
+    ttl=settings.JWT_VERIFY_CACHE["TTL"],
+)
@@ -0,0 +1,388 @@
+# api/tokens.py
+# STDLIB
+import asyncio
+import hashlib
+import logging
+import math
+import random
+import threading
+import time
+
+# THIRDPARTY
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Фильтр Блума: «точно нет» или «возможно есть» с долей ложных
+    срабатываний error_rate при числе элементов не больше capacity.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(math.ceil(self.size / 8))
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Двойное хэширование: k позиций из двух 64-битных половин одного хэша
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return (
+            (first + i * second) % self.size for i in range(self.hash_count)
+        )
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class BlacklistFilter:
+    """
+    Фильтр jti чёрного списка refresh-токенов в памяти воркера.
+
+    Отрицательный ответ («токена точно нет в чёрном списке») позволяет не
+    обращаться к БД при каждом обновлении токена; положительный проверяется
+    запросом к BlacklistedToken. Токены, занесённые в список другими
+    воркерами, подгружаются не реже раза в SYNC_INTERVAL секунд (только новые
+    записи, по возрастанию id). Ёмкость фильтра — ближайшая степень двойки
+    больше числа записей в таблице (не меньше FILTER_CAPACITY). Фильтр
+    перестраивается, только когда загруженных записей становится больше
+    ёмкости или после очистки (удалённые записи из фильтра Блума иначе
+    не убрать).
+
+    Синхронизацию выполняет один поток, остальные тем временем пользуются
+    текущим фильтром. Блокировка _lock защищает только запись битов и не
+    удерживается во время запросов к БД: add вызывается из цикла событий.
+    """
+
+    def __init__(self):
+        self._bloom: BloomFilter | None = None
+        self._last_id = 0
+        # Число записей БД, загруженных в фильтр (jti, добавленные этим
+        # воркером через add, попадут в него и при синхронизации)
+        self._loaded = 0
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def might_contain(self, jti: str) -> bool:
+        """
+        Проверяет, может ли jti быть в чёрном списке.
+
+        :param jti: Идентификатор токена.
+        :return: False, если токена точно нет в чёрном списке.
+        """
+        if self._stale():
+            self._sync()
+        return self._contains(jti)
+
+    async def amight_contain(self, jti: str) -> bool:
+        """
+        Асинхронный вариант might_contain: БД запрашивается, только если
+        фильтр пора синхронизировать.
+        """
+        if self._stale():
+            await sync_to_async(self._sync)()
+        return self._contains(jti)
+
+    def _contains(self, jti: str) -> bool:
+        bloom = self._bloom
+        # Фильтр сброшен другим потоком (очистка) — проверка уйдёт в БД
+        return bloom is None or jti in bloom
+
+    def add(self, jti: str) -> None:
+        """Добавляет jti, занесённый в чёрный список этим воркером."""
+        bloom = self._bloom
+        if bloom is not None:
+            with self._lock:
+                bloom.add(jti)
+
+    def reset(self) -> None:
+        """
+        Сбрасывает фильтр: при следующей проверке он строится заново из БД.
+        """
+        self._bloom = None
+
+    def _stale(self) -> bool:
+        age = time.monotonic() - self._synced_at
+        interval = settings.TOKEN_BLACKLIST["SYNC_INTERVAL"]
+        return self._bloom is None or age >= interval
+
+    def _sync(self) -> None:
+        # Пока фильтра нет, проверки ждут его построения; иначе синхронизацию
+        # пропускаем, если её уже выполняет другой поток
+        if not self._sync_lock.acquire(blocking=self._bloom is None):
+            return
+        try:
+            if not self._stale():
+                return
+            bloom, last_id, loaded = self._bloom, self._last_id, self._loaded
+            if bloom is None or loaded > bloom.capacity:
+                bloom, last_id, loaded = self._build(), 0, 0
+            rows = (
+                BlacklistedToken.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "token__jti")
+                .iterator()
+            )
+            for row_id, jti in rows:
+                with self._lock:
+                    bloom.add(jti)
+                last_id = row_id
+                loaded += 1
+            self._bloom, self._last_id = bloom, last_id
+            self._loaded = loaded
+            self._synced_at = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
+    @staticmethod
+    def _build() -> BloomFilter:
+        # Ёмкость с запасом до следующей степени двойки: перестройка
+        # понадобится, только когда таблица вырастет вдвое
+        config = settings.TOKEN_BLACKLIST
+        count = BlacklistedToken.objects.count()
+        capacity = max(config["FILTER_CAPACITY"], 1 << count.bit_length())
+        return BloomFilter(capacity, config["FILTER_ERROR_RATE"])
+
+
+blacklist_filter = BlacklistFilter()
+
+
+class RefreshToken(BaseRefreshToken):
+    """
+    Refresh-токен simplejwt с чёрным списком, рассчитанным на нагрузку.
+
+    Выданные токены не записываются в OutstandingToken: запись создаётся
+    только при занесении токена в чёрный список, поэтому вход и регистрация
+    не пишут в БД, а таблицы растут лишь на число ротаций. Проверка чёрного
+    списка сначала обращается к blacklist_filter.
+    """
+
+    def __init__(
+        self, token=None, verify: bool = True, check_blacklist: bool = True
+    ):
+        # check_blacklist=False — чёрный список проверит вызывающий код
+        # (в асинхронном коде: acheck_blacklist)
+        self._check_blacklist = check_blacklist
+        super().__init__(token, verify)
+
+    @classmethod
+    def for_user(cls, user) -> "RefreshToken":
+        return Token.for_user.__func__(cls, user)
+
+    @classmethod
+    async def averified(cls, token: str) -> "RefreshToken":
+        """
+        Создаёт токен из строки в асинхронном коде: подпись, срок и тип
+        проверяются без БД, чёрный список — через async ORM.
+
+        :param token: Refresh-токен.
+        :return: Проверенный токен.
+        :raises TokenError: Если токен невалиден, истёк или в чёрном списке.
+        """
+        refresh = cls(token, check_blacklist=False)
+        await refresh.acheck_blacklist()
+        return refresh
+
+    def check_blacklist(self) -> None:
+        if not self._check_blacklist:
+            return
+        if not settings.TOKEN_BLACKLIST["FILTER"]:
+            return super().check_blacklist()
+        if blacklist_filter.might_contain(
+            self.payload[api_settings.JTI_CLAIM]
+        ):
+            super().check_blacklist()
+
+    async def acheck_blacklist(self) -> None:
+        """
+        Асинхронная проверка чёрного списка.
+
+        :raises TokenError: Если токен в чёрном списке.
+        """
+        if await is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def _outstanding_defaults(self) -> dict:
+        return {
+            "user_id": self.payload.get(api_settings.USER_ID_CLAIM),
+            "created_at": self.current_time,
+            "token": str(self),
+            "expires_at": datetime_from_epoch(self.payload["exp"]),
+        }
+
+    def blacklist(self) -> tuple[BlacklistedToken, bool]:
+        """
+        Заносит токен в чёрный список.
+
+        :return: Запись чёрного списка и True, если токен занесён этим вызовом.
+        """
+        jti = self.payload[api_settings.JTI_CLAIM]
+        token, _created = OutstandingToken.objects.get_or_create(
+            jti=jti, defaults=self._outstanding_defaults()
+        )
+        blacklisted, created = BlacklistedToken.objects.get_or_create(
+            token=token
+        )
+        blacklist_filter.add(jti)
+        return blacklisted, created
+
+    async def ablacklist(self) -> tuple[BlacklistedToken, bool]:
+        """Асинхронный вариант blacklist."""
+        jti = self.payload[api_settings.JTI_CLAIM]
+        token, _created = await OutstandingToken.objects.aget_or_create(
+            jti=jti, defaults=self._outstanding_defaults()
+        )
+        blacklisted, created = await BlacklistedToken.objects.aget_or_create(
+            token=token
+        )
+        blacklist_filter.add(jti)
+        return blacklisted, created
+
+    def rotate(self) -> None:
+        """
+        Ротация: заносит токен в чёрный список (BLACKLIST_AFTER_ROTATION) и
+        выдаёт вместо него новый (jti, exp, iat).
+
+        Занесение в список — атомарная проверка повторного использования: если
+        тот же токен уже обновил другой запрос (в том числе в другом воркере),
+        get_or_create не создаст запись и ротация будет отклонена.
+
+        :raises TokenError: Если токен уже занесён в чёрный список.
+        """
+        if api_settings.BLACKLIST_AFTER_ROTATION:
+            _blacklisted, created = self.blacklist()
+            if not created:
+                raise TokenError(_("Token is blacklisted"))
+        self.set_jti()
+        self.set_exp()
+        self.set_iat()
+
+    async def arotate(self) -> None:
+        """Асинхронный вариант rotate."""
+        if api_settings.BLACKLIST_AFTER_ROTATION:
+            _blacklisted, created = await self.ablacklist()
+            if not created:
+                raise TokenError(_("Token is blacklisted"))
+        self.set_jti()
+        self.set_exp()
+        self.set_iat()
+
+
+async def is_blacklisted(jti: str) -> bool:
+    """
+    Проверяет, занесён ли jti в чёрный список. Если blacklist_filter
+    отвечает «точно нет», БД не запрашивается.
+
+    :param jti: Идентификатор токена.
+    :return: True, если токен в чёрном списке.
+    """
+    if settings.TOKEN_BLACKLIST[
+        "FILTER"
+    ] and not await blacklist_filter.amight_contain(jti):
+        return False
+    return await BlacklistedToken.objects.filter(token__jti=jti).aexists()
+
+
+def purge_expired_tokens(batch_size: int | None = None) -> int:
+    """
+    Удаляет истёкшие токены из OutstandingToken и BlacklistedToken пачками,
+    чтобы не держать долгих блокировок и не раздувать транзакции.
+
+    :param batch_size: Размер пачки (по умолчанию
+                       TOKEN_BLACKLIST["PURGE_BATCH_SIZE"]).
+    :return: Число удалённых токенов.
+    """
+    batch_size = batch_size or settings.TOKEN_BLACKLIST["PURGE_BATCH_SIZE"]
+    now = timezone.now()
+    purged = 0
+    while True:
+        ids = list(
+            # Обход по первичному ключу: индекса по expires_at в таблице
+            # simplejwt нет, а истёкшие токены — самые старые записи
+            OutstandingToken.objects.filter(expires_at__lt=now)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        # Записи BlacklistedToken удаляются каскадно
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        purged += len(ids)
+    if purged:
+        logger.info("Удалено истёкших токенов: %s.", purged)
+        blacklist_filter.reset()
+    return purged
+
+
+_purge_task: asyncio.Task | None = None
+
+
+def _purge() -> None:
+    try:
+        purge_expired_tokens()
+    finally:
+        # Соединение потока исполнителя не закрывается сигналом конца запроса:
+        # закрываем (возвращаем в пул) явно
+        connection.close()
+
+
+async def _purge_periodically(interval: float) -> None:
+    # Случайная задержка разводит очистку разных воркеров во времени
+    await asyncio.sleep(random.uniform(0, interval))
+    while True:
+        try:
+            await sync_to_async(_purge, thread_sensitive=False)()
+        except Exception:
+            logger.exception("Ошибка очистки чёрного списка токенов.")
+        await asyncio.sleep(interval)
+
+
+async def startup() -> None:
+    """
+    Запускает периодическую очистку истёкших токенов
+    (TOKEN_BLACKLIST["PURGE_INTERVAL"]).
+    """
+    global _purge_task
+
+    interval = settings.TOKEN_BLACKLIST["PURGE_INTERVAL"]
+    if interval > 0 and _purge_task is None:
+        _purge_task = asyncio.create_task(_purge_periodically(interval))
+
+
+async def shutdown() -> None:
+    """Останавливает периодическую очистку."""
+    global _purge_task
+
+    if _purge_task is not None:
+        _purge_task.cancel()
+        _purge_task = None
@@ -0,0 +1,83 @@
+# api/tracing.py
+# STDLIB
+import random
+from urllib.parse import urlsplit
+
+# THIRDPARTY
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+
+def _route_rate(path: str) -> float:
+    """
+    Доля трассируемых запросов маршрута: SENTRY["ROUTE_SAMPLE_RATES"] по имени
+    маршрута (url_name) или SENTRY["TRACES_SAMPLE_RATE"].
+    """
+    config = settings.SENTRY
+    try:
+        route = resolve(path).url_name
+    except Resolver404:
+        route = None
+    return config["ROUTE_SAMPLE_RATES"].get(
+        route, config["TRACES_SAMPLE_RATE"]
+    )
+
+
+def _path(sampling_context: dict) -> str:
+    """Путь запроса, для которого начинается транзакция."""
+    scope = sampling_context.get("asgi_scope")
+    if scope is not None:
+        return scope["path"].removeprefix(scope.get("root_path", ""))
+    environ = sampling_context.get("wsgi_environ") or {}
+    return environ.get("PATH_INFO", "")
+
+
+def traces_sampler(sampling_context: dict) -> float:
+    """
+    Доля трассируемых транзакций для запроса (traces_sampler Sentry).
+
+    Решение вызывающего сервиса (заголовок sentry-trace) сохраняется, чтобы
+    трассы не рвались. Иначе доля берётся по маршруту (0 — не трассировать,
+    например /metrics). Статус ответа на этом этапе ещё не известен, поэтому
+    при SENTRY["ERROR_TRACES_SAMPLE_RATE"] выше доли маршрута записывается
+    больше транзакций, а лишние успешные отбрасывает before_send_transaction.
+
+    :param sampling_context: Контекст выборки от Sentry SDK.
+    :return: Вероятность записи транзакции, от 0 до 1.
+    """
+    parent_sampled = sampling_context.get("parent_sampled")
+    if parent_sampled is not None:
+        return float(parent_sampled)
+
+    rate = _route_rate(_path(sampling_context))
+    if not rate:
+        return 0.0
+    return max(rate, settings.SENTRY["ERROR_TRACES_SAMPLE_RATE"])
+
+
+def before_send_transaction(event: dict, hint: dict) -> dict | None:
+    """
+    Оставляет транзакции с ответом 5xx с долей ERROR_TRACES_SAMPLE_RATE, а
+    успешные — с долей маршрута (см. traces_sampler).
+
+    :param event: Транзакция.
+    :param hint: Подсказка Sentry SDK.
+    :return: Транзакция или None, если её не нужно отправлять.
+    """
+    error_rate = settings.SENTRY["ERROR_TRACES_SAMPLE_RATE"]
+    if not error_rate:
+        return event
+
+    trace = event.get("contexts", {}).get("trace", {})
+    if trace.get("parent_span_id"):
+        # Выборку определил вызывающий сервис
+        return event
+    status_code = trace.get("data", {}).get("http.response.status_code")
+    if status_code is not None and int(status_code) >= 500:
+        return event
+
+    path = urlsplit(event.get("request", {}).get("url", "")).path
+    rate = _route_rate(path)
+    if rate >= error_rate or random.random() < rate / error_rate:
+        return event
+    return None
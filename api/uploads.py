@@ -0,0 +1,284 @@
+# api/uploads.py
+# STDLIB
+import asyncio
+from datetime import timedelta
+import hashlib
+import logging
+import os
+from pathlib import Path
+import random
+import shutil
+from typing import BinaryIO, Iterator
+import uuid
+
+# THIRDPARTY
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from rest_framework import status
+
+# FIRSTPARTY
+from api.models import ChunkedUpload, UploadChunk
+from api.services import upload_document
+
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkChecksumMismatch(Exception):
+    """Контрольная сумма принятой части не совпала с переданной клиентом."""
+
+
+def upload_dir(upload_id: uuid.UUID) -> Path:
+    """Каталог с частями загрузки."""
+    return Path(settings.CHUNKED_UPLOAD["DIR"]) / str(upload_id)
+
+
+def chunk_path(upload_id: uuid.UUID, index: int) -> Path:
+    """Файл части загрузки."""
+    return upload_dir(upload_id) / f"{index}.part"
+
+
+def write_chunk(
+    upload_id: uuid.UUID,
+    index: int,
+    stream: BinaryIO,
+    length: int,
+    sha256: str,
+) -> None:
+    """
+    Записывает часть на диск, считая SHA-256 по мере чтения тела запроса.
+
+    Часть пишется во временный файл и переименовывается только после проверки
+    контрольной суммы, поэтому параллельные и повторные запросы с той же частью
+    (в том числе из разных воркеров) не оставляют на диске повреждённых данных.
+    Выполняется в потоке: чтение тела и запись на диск блокирующие.
+
+    :param upload_id: ID загрузки.
+    :param index: Номер части.
+    :param stream: Тело запроса.
+    :param length: Ожидаемый размер части.
+    :param sha256: Контрольная сумма части от клиента (hex).
+    :raises ChunkChecksumMismatch: Если размер или контрольная сумма не
+                                   совпали.
+    """
+    path = chunk_path(upload_id, index)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    digest = hashlib.sha256()
+    received = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            block_size = settings.DOCUMENT_UPLOAD["CHUNK_SIZE"]
+            while received <= length:
+                block = stream.read(block_size)
+                if not block:
+                    break
+                digest.update(block)
+                f.write(block)
+                received += len(block)
+        if received != length or digest.hexdigest() != sha256.lower():
+            raise ChunkChecksumMismatch(
+                f"Часть {index}: получено {received} байт, "
+                f"ожидалось {length}, "
+                f"или контрольная сумма не совпала."
+            )
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def delete_chunks(upload_id: uuid.UUID) -> None:
+    """Удаляет части загрузки с диска."""
+    shutil.rmtree(upload_dir(upload_id), ignore_errors=True)
+
+
+async def adelete_chunks(upload_id: uuid.UUID) -> None:
+    """Асинхронный вариант delete_chunks: удаление выполняется в потоке."""
+    await sync_to_async(delete_chunks, thread_sensitive=False)(upload_id)
+
+
+async def active_upload_count(user_id: int) -> int:
+    """
+    Число незавершённых загрузок пользователя, срок которых не истёк.
+
+    :param user_id: ID пользователя из JWT.
+    :return: Число загрузок.
+    """
+    expire_after = settings.CHUNKED_UPLOAD["EXPIRE_AFTER"]
+    cutoff = timezone.now() - timedelta(seconds=expire_after)
+    return await ChunkedUpload.objects.filter(
+        user_id=user_id,
+        status=ChunkedUpload.Status.ACTIVE,
+        created_at__gte=cutoff,
+    ).acount()
+
+
+class ChunkedFile:
+    """
+    Файл, собранный из частей на диске, с интерфейсом UploadedFile,
+    который нужен MultipartFileStream (name, size, content_type, chunks).
+    """
+
+    def __init__(self, upload: ChunkedUpload):
+        self.upload = upload
+        self.name = upload.filename
+        self.size = upload.size
+        self.content_type = upload.content_type or None
+
+    def chunks(self, chunk_size: int) -> Iterator[bytes]:
+        """
+        Читает части по порядку блоками chunk_size. Чтение блокирующее:
+        MultipartFileStream запрашивает блоки в потоке.
+
+        :param chunk_size: Размер блока.
+        :return: Итератор по блокам файла.
+        """
+        for index in range(self.upload.chunk_count):
+            with open(chunk_path(self.upload.id, index), "rb") as f:
+                while block := f.read(chunk_size):
+                    yield block
+
+
+async def complete_upload(upload: ChunkedUpload) -> tuple[dict, int]:
+    """
+    Отправляет собранный из частей файл в FastAPI.
+
+    Загрузка переводится в статус completing одним UPDATE, поэтому
+    одновременные запросы на завершение не отправят файл дважды. При ошибке
+    FastAPI загрузка возвращается в статус active и завершение можно повторить.
+
+    :param upload: Загрузка пользователя.
+    :return: Данные ответа и HTTP-статус.
+    """
+    if upload.status == ChunkedUpload.Status.COMPLETED:
+        return {
+            "id": upload.doc_id,
+            "message": "Документ успешно загружен.",
+        }, status.HTTP_200_OK
+
+    received = await UploadChunk.objects.filter(upload=upload).acount()
+    if received != upload.chunk_count:
+        return {
+            "message": f"Получено частей: {received} из {upload.chunk_count}."
+        }, status.HTTP_409_CONFLICT
+
+    claimed = await ChunkedUpload.objects.filter(
+        id=upload.id, status=ChunkedUpload.Status.ACTIVE
+    ).aupdate(status=ChunkedUpload.Status.COMPLETING)
+    if not claimed:
+        return {
+            "message": "Загрузка уже завершается."
+        }, status.HTTP_409_CONFLICT
+
+    try:
+        data, status_code = await upload_document(
+            ChunkedFile(upload), streaming=True, user_id=upload.user_id
+        )
+    except BaseException:
+        await ChunkedUpload.objects.filter(id=upload.id).aupdate(
+            status=ChunkedUpload.Status.ACTIVE
+        )
+        raise
+
+    # 200 — такой файл уже загружен (дедупликация), см. upload_document
+    if status_code not in (status.HTTP_200_OK, status.HTTP_201_CREATED):
+        await ChunkedUpload.objects.filter(id=upload.id).aupdate(
+            status=ChunkedUpload.Status.ACTIVE
+        )
+        return data, status_code
+
+    upload.status = ChunkedUpload.Status.COMPLETED
+    upload.doc_id = data["id"]
+    await upload.asave(update_fields=["status", "doc_id", "updated_at"])
+    await UploadChunk.objects.filter(upload=upload).adelete()
+    await adelete_chunks(upload.id)
+    logger.info(
+        "Загрузка %s завершена: документ %s.", upload.id, upload.doc_id
+    )
+    return data, status_code
+
+
+def purge_expired_uploads(batch_size: int | None = None) -> int:
+    """
+    Удаляет незавершённые загрузки старше CHUNKED_UPLOAD["EXPIRE_AFTER"]
+    вместе с частями на диске.
+
+    Удаляются только загрузки в статусе active: завершаемая в этот момент
+    загрузка (completing) не трогается.
+
+    :param batch_size: Размер пачки (по умолчанию
+                       CHUNKED_UPLOAD["PURGE_BATCH_SIZE"]).
+    :return: Число удалённых загрузок.
+    """
+    config = settings.CHUNKED_UPLOAD
+    batch_size = batch_size or config["PURGE_BATCH_SIZE"]
+    cutoff = timezone.now() - timedelta(seconds=config["EXPIRE_AFTER"])
+    expired = ChunkedUpload.objects.filter(
+        status=ChunkedUpload.Status.ACTIVE, created_at__lt=cutoff
+    )
+    purged = 0
+    while True:
+        ids = list(expired.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            break
+        # Записи UploadChunk удаляются каскадно. Загрузку, которую успели
+        # начать завершать, DELETE пропустит — её части остаются на диске
+        expired.filter(id__in=ids).delete()
+        kept = set(
+            ChunkedUpload.objects.filter(id__in=ids).values_list(
+                "id", flat=True
+            )
+        )
+        for upload_id in ids:
+            if upload_id not in kept:
+                delete_chunks(upload_id)
+                purged += 1
+    if purged:
+        logger.info("Удалено незавершённых загрузок: %s.", purged)
+    return purged
+
+
+_purge_task: asyncio.Task | None = None
+
+
+def _purge() -> None:
+    try:
+        purge_expired_uploads()
+    finally:
+        # Соединение потока исполнителя не закрывается сигналом конца запроса:
+        # закрываем (возвращаем в пул) явно
+        connection.close()
+
+
+async def _purge_periodically(interval: float) -> None:
+    # Случайная задержка разводит очистку разных воркеров во времени
+    await asyncio.sleep(random.uniform(0, interval))
+    while True:
+        try:
+            await sync_to_async(_purge, thread_sensitive=False)()
+        except Exception:
+            logger.exception("Ошибка очистки незавершённых загрузок.")
+        await asyncio.sleep(interval)
+
+
+async def startup() -> None:
+    """
+    Запускает периодическую очистку незавершённых загрузок
+    (CHUNKED_UPLOAD["PURGE_INTERVAL"]).
+    """
+    global _purge_task
+
+    interval = settings.CHUNKED_UPLOAD["PURGE_INTERVAL"]
+    if interval > 0 and _purge_task is None:
+        _purge_task = asyncio.create_task(_purge_periodically(interval))
+
+
+async def shutdown() -> None:
+    """Останавливает периодическую очистку."""
+    global _purge_task
+
+    if _purge_task is not None:
+        _purge_task.cancel()
+        _purge_task = None
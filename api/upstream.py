@@ -0,0 +1,88 @@
+# api/upstream.py
+# STDLIB
+import asyncio
+import importlib.util
+import logging
+
+# THIRDPARTY
+from django.conf import settings
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+# Общий клиент FastAPI на процесс (воркер) и цикл событий, к которому он
+# привязан
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+class UpstreamError(Exception):
+    """Ответ FastAPI с кодом ошибки."""
+
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"FastAPI вернул статус {response.status_code}")
+        self.response = response
+
+
+def _build_client() -> httpx.AsyncClient:
+    """
+    Создаёт HTTP-клиент FastAPI с пулом соединений из настроек.
+
+    :return: Новый экземпляр httpx.AsyncClient.
+    """
+    config = settings.FASTAPI_CLIENT
+    limits = httpx.Limits(
+        max_connections=config["MAX_CONNECTIONS"],
+        max_keepalive_connections=config["MAX_KEEPALIVE_CONNECTIONS"],
+        keepalive_expiry=config["KEEPALIVE_EXPIRY"],
+    )
+
+    # HTTP/2 включается только по явному запросу и при наличии пакета h2
+    http2 = config["HTTP2"]
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning(
+            "HTTP/2 запрошен, но пакет h2 не установлен. "
+            "Используется HTTP/1.1."
+        )
+        http2 = False
+
+    return httpx.AsyncClient(limits=limits, http2=http2)
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Возвращает общий HTTP-клиент FastAPI для текущего воркера.
+
+    Клиент создаётся при старте ASGI-приложения (см. api.lifespan).
+    Если клиента ещё нет или он привязан к другому циклу событий
+    (например, при запуске через runserver или в тестах), создаётся новый.
+
+    :return: Экземпляр httpx.AsyncClient с общим пулом соединений.
+    """
+    global _client, _client_loop
+
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = _build_client()
+        _client_loop = loop
+    return _client
+
+
+async def startup() -> None:
+    """Создаёт общий HTTP-клиент при старте воркера."""
+    get_client()
+    logger.info("HTTP-клиент FastAPI создан.")
+
+
+async def shutdown() -> None:
+    """
+    Закрывает общий HTTP-клиент и все соединения пула при остановке воркера.
+    """
+    global _client, _client_loop
+
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("HTTP-клиент FastAPI закрыт.")
+    _client = None
+    _client_loop = None
@@ -1,26 +1,67 @@
 # api/urls.py
+# THIRDPARTY
 from django.urls import path
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-    TokenVerifyView,
-)
 
+# LOCALFOLDER
 from .views import (
-    RegisterView,
-    UploadDocumentView,
     AnalyzeDocumentView,
-    GetTextView,
+    BatchDocumentView,
+    ChunkedUploadDetailView,
+    ChunkedUploadView,
+    CompleteUploadView,
     DeleteDocumentView,
+    GetTextView,
+    JobDetailView,
+    RegisterView,
+    TokenObtainView,
+    TokenRefreshView,
+    TokenVerifyView,
+    UploadChunkView,
+    UploadDocumentView,
 )
 
+
 urlpatterns = [
     path("v1/auth/register/", RegisterView.as_view(), name="register_user"),
-    path("v1/auth/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
-    path("v1/auth/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
-    path("v1/auth/token/verify/", TokenVerifyView.as_view(), name="token_verify"),
+    path(
+        "v1/auth/token/", TokenObtainView.as_view(), name="token_obtain_pair"
+    ),
+    path(
+        "v1/auth/token/refresh/",
+        TokenRefreshView.as_view(),
+        name="token_refresh",
+    ),
+    path(
+        "v1/auth/token/verify/", TokenVerifyView.as_view(), name="token_verify"
+    ),
     path("v1/docs/", UploadDocumentView.as_view(), name="upload_doc"),
-    path("v1/docs/<int:doc_id>/analyze/", AnalyzeDocumentView.as_view(), name="analyze_doc"),
+    path("v1/docs/batch/", BatchDocumentView.as_view(), name="batch_docs"),
+    path(
+        "v1/docs/<int:doc_id>/analyze/",
+        AnalyzeDocumentView.as_view(),
+        name="analyze_doc",
+    ),
     path("v1/docs/<int:doc_id>/text/", GetTextView.as_view(), name="get_text"),
-    path("v1/docs/<int:doc_id>/", DeleteDocumentView.as_view(), name="delete_doc"),
+    path(
+        "v1/docs/<int:doc_id>/",
+        DeleteDocumentView.as_view(),
+        name="delete_doc",
+    ),
+    path("v1/jobs/<uuid:job_id>/", JobDetailView.as_view(), name="job_detail"),
+    path("v1/uploads/", ChunkedUploadView.as_view(), name="create_upload"),
+    path(
+        "v1/uploads/<uuid:upload_id>/",
+        ChunkedUploadDetailView.as_view(),
+        name="upload_detail",
+    ),
+    path(
+        "v1/uploads/<uuid:upload_id>/chunks/<int:index>/",
+        UploadChunkView.as_view(),
+        name="upload_chunk",
+    ),
+    path(
+        "v1/uploads/<uuid:upload_id>/complete/",
+        CompleteUploadView.as_view(),
+        name="complete_upload",
+    ),
 ]
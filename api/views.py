@@ -1,38 +1,131 @@
+# STDLIB
+import json
 import logging
-import os
+import re
 
-import httpx
+# THIRDPARTY
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import IntegrityError
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
 from django.utils.decorators import method_decorator
+from django.utils.http import http_date
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework import status, generics
+from drfasyncview import AsyncAPIView
+from rest_framework import status
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 
-from rest_framework_simplejwt.tokens import RefreshToken
-from drfasyncview import AsyncAPIView
+# FIRSTPARTY
 from api.decorators import token_required
-from api.serializers import UserRegistrationSerializer
+from api.documents import (
+    decode_cursor,
+    encode_cursor,
+    has_access,
+    list_documents,
+)
+from api.hashing import HashingOverloaded
+from api.jobs import (
+    accepting_jobs,
+    run_analysis_job,
+    submit_analysis_job,
+)
+from api.models import AnalysisJob, ChunkedUpload, UploadChunk
+from api.resilience import UpstreamUnavailable, upstream_request
+from api.serializers import (
+    AnalysisJobSerializer,
+    AnalyzeRequestSerializer,
+    BatchRequestSerializer,
+    ChunkedUploadCreateSerializer,
+    ChunkedUploadSerializer,
+    DocumentListQuerySerializer,
+    DocumentSerializer,
+    TokenObtainSerializer,
+    TokenRefreshSerializer,
+    TokenVerifySerializer,
+    UserRegistrationSerializer,
+)
+from api.services import (
+    FASTAPI_URL,
+    UserAlreadyExists,
+    analyze_document,
+    authenticate_user,
+    create_user,
+    delete_document,
+    error_result,
+    read_document_text,
+    refresh_tokens,
+    run_batch,
+    upload_document,
+    verify_token,
+)
+from api.streaming import streaming_passthrough
+from api.tokens import RefreshToken
+from api.uploads import (
+    ChunkChecksumMismatch,
+    active_upload_count,
+    adelete_chunks,
+    complete_upload,
+    write_chunk,
+)
+
 
 # Logging
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
-# URL FastAPI
-FASTAPI_URL = os.getenv("FASTAPI_URL", "http://127.0.0.1:8000")
+SHA256_PATTERN = re.compile(r"^[0-9a-fA-F]{64}$")
+
+
+def _query_flag(request, name: str, default: bool) -> bool:
+    """
+    Читает булев флаг из параметров запроса (?name=true).
+
+    :param request: HTTP запрос.
+    :param name: Имя параметра.
+    :param default: Значение по умолчанию, если параметр не передан.
+    :return: Значение флага.
+    """
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    return value.lower() in ["true", "1", "yes"]
+
+
+def _overloaded_response() -> Response:
+    """
+    Ответ 429, если очередь хэширования паролей переполнена.
+
+    :return: HTTP ответ с заголовком Retry-After.
+    """
+    return Response(
+        {"message": "Слишком много запросов, повторите позже."},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={"Retry-After": str(settings.PASSWORD_HASHING["RETRY_AFTER"])},
+    )
+
 
+def _document_not_found() -> Response:
+    # 404, а не 403: чужой документ неотличим от несуществующего
+    return Response(
+        {"message": "Документ не найден."}, status=status.HTTP_404_NOT_FOUND
+    )
 
-class RegisterView(generics.CreateAPIView):
+
+class RegisterView(AsyncAPIView):
     """
     Представление для регистрации пользователя.
-    CreateAPIView для создания нового пользователя и генерации токенов.
+    Создаёт нового пользователя и генерирует токены.
     """
 
     # Права доступа
     permission_classes = [AllowAny]
-    serializer_class = UserRegistrationSerializer
 
-    def create(self, request, *args, **kwargs) -> Response:
+    async def post(self, request, *args, **kwargs) -> Response:
         """
         Метод для обработки запроса на регистрацию.
 
@@ -42,15 +135,23 @@ class RegisterView(generics.CreateAPIView):
         :return: HTTP ответ с данными пользователя и токенами.
         """
         logger.info("Получен запрос на регистрацию.")
+        serializer = UserRegistrationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
         # Создание пользователя
-        response = super().create(request, *args, **kwargs)
-
-        logger.info(f"Пользователь {response.data['username']} зарегистрирован.")
-        # Получение пользователя
-        user = User.objects.get(username=response.data["username"])
+        try:
+            user = await create_user(**serializer.validated_data)
+        except UserAlreadyExists:
+            return Response(
+                {"username": ["Пользователь с таким именем уже существует."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except HashingOverloaded:
+            return _overloaded_response()
+        logger.info("Пользователь %s зарегистрирован.", user.username)
 
-        # Генерация токенов
+        # Генерация токенов для созданного пользователя, без повторного запроса
+        # к БД
         refresh = RefreshToken.for_user(user)
         logger.info("Токены успешно сгенерированы.")
         token_data = {
@@ -58,17 +159,165 @@ class RegisterView(generics.CreateAPIView):
             "access": str(refresh.access_token),
         }
 
-        logger.info(f"Токены успешно добавлены в ответ. {token_data}")
         # Добавление токенов в ответ
-        return Response({**response.data, **token_data}, status=status.HTTP_201_CREATED)
+        return Response(
+            {"username": user.username, **token_data},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class TokenObtainView(AsyncAPIView):
+    """
+    Представление для получения пары токенов (access и refresh) по логину и
+    паролю.
+
+    Пароль проверяется в пуле хэширования, а не в цикле событий.
+    """
+
+    permission_classes = [AllowAny]
+
+    async def post(self, request, *args, **kwargs) -> Response:
+        """
+        Проверка учётных данных и выдача токенов.
+
+        :param request: HTTP запрос с username и password.
+        :return: HTTP ответ с токенами.
+        """
+        serializer = TokenObtainSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            user = await authenticate_user(**serializer.validated_data)
+        except HashingOverloaded:
+            return _overloaded_response()
+        if user is None:
+            return Response(
+                {"detail": serializer.error_messages["no_active_account"]},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        refresh = RefreshToken.for_user(user)
+        if jwt_settings.UPDATE_LAST_LOGIN:
+            await User.objects.filter(pk=user.pk).aupdate(
+                last_login=timezone.now()
+            )
+
+        return Response(
+            {"refresh": str(refresh), "access": str(refresh.access_token)},
+            status=status.HTTP_200_OK,
+        )
+
+
+class TokenRefreshView(AsyncAPIView):
+    """
+    Представление для обновления пары токенов по refresh-токену.
+
+    Асинхронный аналог TokenRefreshView simplejwt с теми же запросом и ответом.
+    """
+
+    permission_classes = [AllowAny]
+
+    def get_authenticate_header(self, request) -> str:
+        # Ошибки токена — 401 с WWW-Authenticate, как в simplejwt
+        return f'{jwt_settings.AUTH_HEADER_TYPES[0]} realm="api"'
+
+    async def post(self, request, *args, **kwargs) -> Response:
+        """
+        Выдача нового access-токена (и refresh-токена при ротации).
+
+        :param request: HTTP запрос с refresh.
+        :return: HTTP ответ с токенами.
+        """
+        serializer = TokenRefreshSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            data = await refresh_tokens(serializer.validated_data["refresh"])
+        except TokenError as e:
+            raise InvalidToken(e.args[0]) from e
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class TokenVerifyView(AsyncAPIView):
+    """
+    Представление для проверки токена.
+
+    Асинхронный аналог TokenVerifyView simplejwt с теми же запросом и ответом.
+    """
+
+    permission_classes = [AllowAny]
+
+    def get_authenticate_header(self, request) -> str:
+        # Ошибки токена — 401 с WWW-Authenticate, как в simplejwt
+        return f'{jwt_settings.AUTH_HEADER_TYPES[0]} realm="api"'
+
+    async def post(self, request, *args, **kwargs) -> Response:
+        """
+        Проверка подписи, срока действия и чёрного списка токена.
+
+        :param request: HTTP запрос с token.
+        :return: Пустой HTTP ответ 200, если токен валиден.
+        """
+        serializer = TokenVerifySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            await verify_token(serializer.validated_data["token"])
+        except TokenError as e:
+            raise InvalidToken(e.args[0]) from e
+        return Response({}, status=status.HTTP_200_OK)
 
 
 @method_decorator(csrf_exempt, name="dispatch")
 class UploadDocumentView(AsyncAPIView):
     """
-    Представление для загрузки документа.
+    Представление для загрузки документа и списка документов пользователя.
     """
 
+    @token_required
+    async def get(self, request, *args, **kwargs) -> Response:
+        """
+        Список документов пользователя от новых к старым
+        (?limit=&cursor=&status=).
+
+        Список строится по локальной таблице Document без запросов в FastAPI.
+        Следующая страница запрашивается по ссылке next.
+
+        :param request: HTTP запрос.
+        :return: HTTP ответ со страницей документов.
+        """
+        serializer = DocumentListQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        cursor = None
+        if "cursor" in params:
+            try:
+                cursor = decode_cursor(params["cursor"])
+            except ValueError:
+                return Response(
+                    {"message": "Некорректный курсор."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        documents, last_id = await list_documents(
+            request.jwt_payload["user_id"],
+            params["limit"],
+            cursor=cursor,
+            status=params.get("status"),
+        )
+        next_url = None
+        if last_id is not None:
+            query = request.GET.copy()
+            query["cursor"] = encode_cursor(last_id)
+            next_url = request.build_absolute_uri(
+                f"{request.path}?{query.urlencode()}"
+            )
+        return Response(
+            {
+                "results": DocumentSerializer(documents, many=True).data,
+                "next": next_url,
+            },
+            status=status.HTTP_200_OK,
+        )
+
     @token_required
     async def post(self, request, *args, **kwargs) -> Response:
         """
@@ -84,50 +333,14 @@ class UploadDocumentView(AsyncAPIView):
         # Проверка, что файл был загружен
         if not file_obj:
             return Response(
-                {"message": "Файл не загружен."}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        logger.info(f"Принят файл: {file_obj.name}, размер: {file_obj.size}")
-        # Ссылка на загрузку
-        upload_url = f"{FASTAPI_URL}documents"
-        logger.info(f"Отправка файла в FastAPI: {upload_url}")
-
-        # Чтение содержимого файла
-        content = file_obj.read()
-        file_obj.seek(0)
-
-        # Отправка запроса
-        async with httpx.AsyncClient() as client:
-            logger.info("TEST")
-            response = await client.post(
-                upload_url,
-                files={"file": (file_obj.name, content)},
+                {"message": "Файл не загружен."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        logger.info(
-            f"Ответ от FastAPI: статус={response.status_code}, тело={response.text}"
+        data, status_code = await upload_document(
+            file_obj, user_id=request.jwt_payload["user_id"]
         )
-
-        # Обработка ответа
-        if response.status_code in [200, 201]:
-            data = response.json()
-            doc_id = data.get("id")
-            # Проверка, что id был получен
-            if not doc_id:
-                return Response(
-                    {"message": "ID документа не получен."},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
-            return Response(
-                {"id": doc_id, "message": "Документ успешно загружен."},
-                status=status.HTTP_201_CREATED,
-            )
-        else:
-            error_message = response.json().get("message", "Ошибка загрузки.")
-            return Response(
-                {"message": f"Error from FastAPI: {error_message}"},
-                status=response.status_code,
-            )
+        return Response(data, status=status_code)
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -141,41 +354,94 @@ class AnalyzeDocumentView(AsyncAPIView):
         """
         Анализ документа.
 
+        В асинхронном режиме (Prefer: respond-async или ?async=true) создаётся
+        задача и сразу возвращается 202 с её ID. Фоновые задачи выполняются
+        только в воркере ASGI с lifespan (api.jobs.startup); без него
+        (runserver, WSGI) задача создаётся и выполняется в самом запросе, и
+        ответ — её результат, как в синхронном режиме.
+
         :param request: HTTP запрос.
         :param doc_id: ID документа.
-        :return: HTTP ответ с результатом анализа.
+        :return: HTTP ответ с результатом анализа или 202 с ID задачи.
         """
 
         # Проверка, что ID документа был получен
         if not doc_id:
             return Response(
-                {"message": "ID документа не получен."}, status=status.HTTP_400_BAD_REQUEST
+                {"message": "ID документа не получен."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not await has_access(doc_id, request.jwt_payload["user_id"]):
+            return _document_not_found()
+
+        # Асинхронный режим: сразу возвращаем 202 и ID задачи
+        prefer_async = "respond-async" in request.headers.get("Prefer", "")
+        if prefer_async or _query_flag(
+            request, "async", settings.ANALYSIS_JOBS["ASYNC_BY_DEFAULT"]
+        ):
+            serializer = AnalyzeRequestSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+
+            job = await AnalysisJob.objects.acreate(
+                doc_id=doc_id,
+                user_id=request.jwt_payload["user_id"],
+                callback_url=serializer.validated_data["callback_url"],
+            )
+            if not accepting_jobs():
+                await run_analysis_job(job.id)
+                await job.arefresh_from_db()
+                return Response(job.result, status=job.status_code)
+
+            submit_analysis_job(job)
+            logger.info(
+                "Создана задача анализа %s для документа %s.", job.id, doc_id
             )
 
-        analyze_url = f"{FASTAPI_URL}documents/{doc_id}/analyze"
-        logger.info(f"Отправка запроса на анализ {doc_id} в FastAPI: {analyze_url}")
+            job_url = reverse("job_detail", kwargs={"job_id": job.id})
+            return Response(
+                {
+                    "job_id": str(job.id),
+                    "status": job.status,
+                    "message": "Задача анализа создана.",
+                },
+                status=status.HTTP_202_ACCEPTED,
+                headers={"Location": job_url},
+            )
 
-        # Отправка запроса
-        async with httpx.AsyncClient() as client:
-            response = await client.post(analyze_url)
+        data, status_code = await analyze_document(doc_id)
+        return Response(data, status=status_code)
 
-        logger.info(
-            f"Ответ от FastAPI на анализ: статус={response.status_code}, тело={response.text}"
-        )
 
-        # Обработка ответа
-        if response.status_code in [200, 201]:
-            return Response(
-                {"message": "Документ успешно отправлен на анализ."},
-                status=status.HTTP_200_OK,
+@method_decorator(csrf_exempt, name="dispatch")
+class JobDetailView(AsyncAPIView):
+    """
+    Представление для получения статуса задачи анализа.
+    """
+
+    @token_required
+    async def get(self, request, job_id, *args, **kwargs) -> Response:
+        """
+        Получение статуса и результата задачи анализа.
+
+        :param request: HTTP запрос.
+        :param job_id: ID задачи.
+        :return: HTTP ответ с данными задачи или 404, если задача не найдена.
+        """
+        try:
+            job = await AnalysisJob.objects.aget(
+                id=job_id, user_id=request.jwt_payload["user_id"]
             )
-        else:
-            error_message = response.json().get("message", "Ошибка анализа.")
+        except AnalysisJob.DoesNotExist:
             return Response(
-                {"message": f"Error from FastAPI: {error_message}"},
-                status=response.status_code,
+                {"message": "Задача не найдена."},
+                status=status.HTTP_404_NOT_FOUND,
             )
 
+        return Response(
+            AnalysisJobSerializer(job).data, status=status.HTTP_200_OK
+        )
+
 
 @method_decorator(csrf_exempt, name="dispatch")
 class GetTextView(AsyncAPIView):
@@ -193,31 +459,96 @@ class GetTextView(AsyncAPIView):
         :return: HTTP ответ с текстом документа.
         """
 
-        text_url = f"{FASTAPI_URL}documents/{doc_id}/text"
-        logger.info(f"Запрос на получение текста {doc_id} в FastAPI: {text_url}")
-
-        # Отправка запроса
-        async with httpx.AsyncClient() as client:
-            response = await client.get(text_url)
+        if not await has_access(doc_id, request.jwt_payload["user_id"]):
+            return _document_not_found()
 
-        logger.info(
-            f"Ответ от FastAPI: статус={response.status_code}, тело={response.text}"
-        )
+        if _query_flag(request, "stream", settings.DOCUMENT_TEXT["STREAMING"]):
+            # Потоковый режим: тело FastAPI передаётся клиенту по мере
+            # получения
+            text_url = f"{FASTAPI_URL}documents/{doc_id}/text"
+            logger.debug(
+                "Потоковый запрос текста %s в FastAPI: %s", doc_id, text_url
+            )
 
-        # Обработка ответа
-        if response.status_code in [200, 201]:
-            data = response.json()
-            text = data.get("text", "Текст недоступен.")
-            return Response(
-                {"text": text, "message": "Текст успешно получен."},
-                status=status.HTTP_200_OK,
+            headers = {
+                name: request.headers[name]
+                for name in ("Range", "If-None-Match", "If-Modified-Since")
+                if name in request.headers
+            }
+            # Тело передаётся без декодирования (aiter_raw), поэтому FastAPI
+            # может сжать его только кодировкой, которую принимает клиент
+            headers["Accept-Encoding"] = request.headers.get(
+                "Accept-Encoding", "identity"
             )
-        else:
-            error_message = response.json().get("message", "Ошибка получения текста.")
-            return Response(
-                {"message": f"Error from FastAPI: {error_message}"},
-                status=response.status_code,
+            try:
+                response = await upstream_request(
+                    "text", "get", text_url, stream=True, headers=headers
+                )
+            except UpstreamUnavailable as e:
+                return Response(
+                    {"message": str(e)},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                )
+            if response.status_code in [200, 206, 304]:
+                streaming_response = streaming_passthrough(response)
+                patch_vary_headers(streaming_response, ("Accept-Encoding",))
+                return streaming_response
+            await response.aread()
+            await response.aclose()
+            data, status_code = error_result(
+                response, "Ошибка получения текста."
+            )
+            return Response(data, status=status_code)
+
+        entry, data, status_code = await read_document_text(doc_id)
+        if entry is None:
+            return Response(data, status=status_code)
+        etag = entry.etag
+
+        # Постраничная выдача текста (?offset=&limit=)
+        paging = (
+            "offset" in request.query_params or "limit" in request.query_params
+        )
+        if paging:
+            text = data["text"]
+            try:
+                offset = int(request.query_params.get("offset", 0))
+                limit = int(request.query_params.get("limit", len(text)))
+            except ValueError:
+                offset = limit = -1
+            if offset < 0 or limit < 0:
+                return Response(
+                    {"message": "Некорректные параметры offset/limit."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            end = offset + limit
+            data.update(
+                text=text[offset:end],
+                offset=offset,
+                limit=limit,
+                total=len(text),
             )
+            # У каждой страницы свой ETag
+            etag = f'{etag[:-1]}-{offset}-{limit}"'
+
+        # Клиент, у которого уже есть этот текст
+        # (If-None-Match/If-Modified-Since), получает 304 без тела; свежий
+        # текст из кэша не запрашивается в FastAPI
+        response = Response(
+            data,
+            status=status_code,
+            headers={
+                "ETag": etag,
+                "Last-Modified": http_date(entry.last_modified),
+                "Cache-Control": "private, no-cache",
+            },
+        )
+        return get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=int(entry.last_modified),
+            response=response,
+        )
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -239,28 +570,304 @@ class DeleteDocumentView(AsyncAPIView):
         # Проверка, что ID документа был получен
         if not doc_id:
             return Response(
-                {"message": "ID документа не получен."}, status=status.HTTP_400_BAD_REQUEST
+                {"message": "ID документа не получен."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        delete_url = f"{FASTAPI_URL}documents/{doc_id}"
-        logger.info(f"Запрос на удаление doc_id={doc_id} в FastAPI: {delete_url}")
+        if not await has_access(doc_id, request.jwt_payload["user_id"]):
+            return _document_not_found()
+
+        data, status_code = await delete_document(doc_id)
+        return Response(data, status=status_code)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class BatchDocumentView(AsyncAPIView):
+    """
+    Представление для пакетных операций с документами.
+    """
+
+    @token_required
+    async def post(self, request, *args, **kwargs) -> Response:
+        """
+        Выполняет список операций (upload, analyze, text, delete) одним
+        запросом.
+
+        Токен проверяется один раз, операции выполняются в FastAPI параллельно
+        с ограничением DOCUMENT_BATCH["CONCURRENCY"]. Ошибка одной операции не
+        прерывает остальные: результат возвращается по каждой операции. Для
+        upload запрос отправляется как multipart, список операций передаётся
+        JSON-строкой в поле operations, а в операции указывается имя поля с
+        файлом.
+
+        :param request: HTTP запрос со списком операций.
+        :return: HTTP ответ с результатами по каждой операции.
+        """
+        data = request.data
+        if "operations" in data and isinstance(data["operations"], str):
+            try:
+                data = {"operations": json.loads(data["operations"])}
+            except ValueError:
+                return Response(
+                    {"message": "Поле operations должно содержать JSON."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        serializer = BatchRequestSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        operations = serializer.validated_data["operations"]
+
+        # Проверка, что файлы для всех операций upload переданы
+        for operation in operations:
+            upload = operation["op"] == "upload"
+            if upload and operation["file"] not in request.FILES:
+                return Response(
+                    {"message": f"Файл {operation['file']} не загружен."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        results = await run_batch(
+            operations, request.FILES, user_id=request.jwt_payload["user_id"]
+        )
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+async def _get_upload(request, upload_id) -> ChunkedUpload | None:
+    """
+    Загрузка по частям текущего пользователя.
+
+    :param request: HTTP запрос с проверенным JWT.
+    :param upload_id: ID загрузки.
+    :return: Загрузка или None, если она не найдена или не завершена в срок
+             (ожидает очистки).
+    """
+    try:
+        upload = await ChunkedUpload.objects.aget(
+            id=upload_id, user_id=request.jwt_payload["user_id"]
+        )
+    except ChunkedUpload.DoesNotExist:
+        return None
+    expired = upload.expires_at <= timezone.now()
+    if upload.status == ChunkedUpload.Status.ACTIVE and expired:
+        return None
+    return upload
+
+
+def _upload_not_found() -> Response:
+    return Response(
+        {"message": "Загрузка не найдена."}, status=status.HTTP_404_NOT_FOUND
+    )
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class ChunkedUploadView(AsyncAPIView):
+    """
+    Представление для начала возобновляемой загрузки по частям.
+
+    Протокол: POST v1/uploads/ возвращает upload_id и размер частей, части
+    отправляются запросами PUT v1/uploads/<id>/chunks/<номер>/ (в любом
+    порядке и параллельно), POST v1/uploads/<id>/complete/ отправляет файл
+    в FastAPI. GET v1/uploads/<id>/ возвращает номера принятых частей, чтобы
+    после обрыва соединения отправить только недостающие. Загрузку нужно
+    завершить до expires_at: позже она удаляется вместе с частями.
+    """
+
+    @token_required
+    async def post(self, request, *args, **kwargs) -> Response:
+        """
+        Создание загрузки.
 
-        # Отправка запроса
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(delete_url)
+        :param request: HTTP запрос с именем, размером файла и (необязательно)
+                        размером части.
+        :return: HTTP ответ с ID загрузки, размером и числом частей или 429,
+                 если у пользователя слишком много незавершённых загрузок.
+        """
+        serializer = ChunkedUploadCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # Ограничение мягкое: параллельные запросы могут его немного превысить
+        max_active = settings.CHUNKED_UPLOAD["MAX_ACTIVE_PER_USER"]
+        active = await active_upload_count(request.jwt_payload["user_id"])
+        if active >= max_active:
+            return Response(
+                {
+                    "message": "Слишком много незавершённых загрузок: "
+                    f"не больше {max_active}."
+                },
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
 
+        upload = await ChunkedUpload.objects.acreate(
+            user_id=request.jwt_payload["user_id"], **serializer.validated_data
+        )
         logger.info(
-            f"Ответ от FastAPI на удаление: статус={response.status_code}, тело={response.text}"
+            "Начата загрузка %s: %s, размер: %s",
+            upload.id,
+            upload.filename,
+            upload.size,
+        )
+        return Response(
+            {
+                "upload_id": str(upload.id),
+                "chunk_size": upload.chunk_size,
+                "chunk_count": upload.chunk_count,
+                "expires_at": upload.expires_at,
+            },
+            status=status.HTTP_201_CREATED,
+            headers={
+                "Location": reverse(
+                    "upload_detail", kwargs={"upload_id": upload.id}
+                )
+            },
         )
 
-        # Обработка ответа
-        if response.status_code in [200, 204]:
+
+@method_decorator(csrf_exempt, name="dispatch")
+class ChunkedUploadDetailView(AsyncAPIView):
+    """
+    Представление для состояния и отмены загрузки по частям.
+    """
+
+    @token_required
+    async def get(self, request, upload_id, *args, **kwargs) -> Response:
+        """
+        Состояние загрузки и номера принятых частей.
+
+        :param request: HTTP запрос.
+        :param upload_id: ID загрузки.
+        :return: HTTP ответ с данными загрузки или 404.
+        """
+        upload = await _get_upload(request, upload_id)
+        if upload is None:
+            return _upload_not_found()
+
+        received_chunks = [
+            index
+            async for index in UploadChunk.objects.filter(upload=upload)
+            .order_by("index")
+            .values_list("index", flat=True)
+        ]
+        serializer = ChunkedUploadSerializer(
+            upload, context={"received_chunks": received_chunks}
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @token_required
+    async def delete(self, request, upload_id, *args, **kwargs) -> Response:
+        """
+        Отмена загрузки: удаляет принятые части.
+
+        :param request: HTTP запрос.
+        :param upload_id: ID загрузки.
+        :return: HTTP ответ 204 или 404.
+        """
+        upload = await _get_upload(request, upload_id)
+        if upload is None:
+            return _upload_not_found()
+
+        await upload.adelete()
+        await adelete_chunks(upload_id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class UploadChunkView(AsyncAPIView):
+    """
+    Представление для приёма части загрузки.
+    """
+
+    @token_required
+    async def put(
+        self, request, upload_id, index: int, *args, **kwargs
+    ) -> Response:
+        """
+        Приём части: тело запроса — байты части, заголовок X-Chunk-SHA256 —
+        её контрольная сумма. Повторная отправка части заменяет её.
+
+        :param request: HTTP запрос.
+        :param upload_id: ID загрузки.
+        :param index: Номер части, начиная с 0.
+        :return: HTTP ответ с размером и контрольной суммой принятой части.
+        """
+        sha256 = request.headers.get("X-Chunk-SHA256", "")
+        if not SHA256_PATTERN.match(sha256):
+            return Response(
+                {
+                    "message": "Заголовок X-Chunk-SHA256 должен содержать "
+                    "SHA-256 части (hex)."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        upload = await _get_upload(request, upload_id)
+        if upload is None:
+            return _upload_not_found()
+        if upload.status != ChunkedUpload.Status.ACTIVE:
+            return Response(
+                {"message": "Загрузка уже завершена."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        if index >= upload.chunk_count:
+            return Response(
+                {
+                    "message": "Номер части должен быть меньше "
+                    f"{upload.chunk_count}."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        length = upload.chunk_length(index)
+        if request.stream is None:
             return Response(
-                {"message": "Документ успешно удален."}, status=status.HTTP_200_OK
+                {"message": "Часть не передана."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            await sync_to_async(write_chunk, thread_sensitive=False)(
+                upload.id, index, request.stream, length, sha256
+            )
+        except ChunkChecksumMismatch as e:
+            return Response(
+                {"message": str(e)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            await UploadChunk.objects.aupdate_or_create(
+                upload=upload,
+                index=index,
+                defaults={"size": length, "sha256": sha256.lower()},
             )
-        else:
-            error_message = response.json().get("message", "Ошибка удаления.")
+        except IntegrityError:
+            # Ту же часть одновременно принял другой запрос
             return Response(
-                {"message": f"Error from FastAPI: {error_message}"},
-                status=response.status_code,
+                {"message": "Часть уже принимается."},
+                status=status.HTTP_409_CONFLICT,
             )
+        return Response(
+            {"index": index, "size": length, "sha256": sha256.lower()},
+            status=status.HTTP_200_OK,
+        )
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class CompleteUploadView(AsyncAPIView):
+    """
+    Представление для завершения загрузки по частям.
+    """
+
+    @token_required
+    async def post(self, request, upload_id, *args, **kwargs) -> Response:
+        """
+        Завершение загрузки: файл из принятых частей отправляется в FastAPI.
+
+        :param request: HTTP запрос.
+        :param upload_id: ID загрузки.
+        :return: HTTP ответ с ID документа или ошибкой (409, если приняты не
+                 все части).
+        """
+        upload = await _get_upload(request, upload_id)
+        if upload is None:
+            return _upload_not_found()
+
+        data, status_code = await complete_upload(upload)
+        return Response(data, status=status_code)
@@ -0,0 +1,91 @@
+# benchmarks/batch_analyze.py
+"""
+Сравнение N отдельных запросов v1/docs/<id>/analyze/ с одним пакетным запросом
+v1/docs/batch/ на N операций analyze. FastAPI имитируется транспортом httpx
+с фиксированной задержкой ответа.
+
+Запуск:
+    SECRET_KEY=x python -m benchmarks.batch_analyze --count 1000 \\
+        --latency-ms 20
+"""
+# STDLIB
+import argparse
+import asyncio
+import json
+import os
+import time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    # THIRDPARTY
+    import django
+
+    django.setup()
+
+    # THIRDPARTY
+    from django.contrib.auth.models import User
+    from django.test import Client
+    import httpx
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    # FIRSTPARTY
+    from api import upstream
+
+    class LatencyTransport(httpx.AsyncBaseTransport):
+        """Фиктивный FastAPI: отвечает 200 после заданной задержки."""
+
+        async def handle_async_request(
+            self, request: httpx.Request
+        ) -> httpx.Response:
+            await asyncio.sleep(args.latency_ms / 1000)
+            return httpx.Response(200, json={})
+
+    upstream._build_client = lambda: httpx.AsyncClient(
+        transport=LatencyTransport()
+    )
+
+    token = str(AccessToken.for_user(User(id=1, username="bench")))
+    client = Client(
+        SERVER_NAME="localhost", HTTP_AUTHORIZATION=f"Bearer {token}"
+    )
+
+    started = time.perf_counter()
+    for doc_id in range(1, args.count + 1):
+        client.post(f"/api/v1/docs/{doc_id}/analyze/")
+    single = time.perf_counter() - started
+
+    operations = [
+        {"op": "analyze", "doc_id": i} for i in range(1, args.count + 1)
+    ]
+    started = time.perf_counter()
+    response = client.post(
+        "/api/v1/docs/batch/",
+        {"operations": operations},
+        content_type="application/json",
+    )
+    batch = time.perf_counter() - started
+    assert all(r["status"] == 200 for r in response.json()["results"])
+
+    print(
+        json.dumps(
+            {
+                "count": args.count,
+                "latency_ms": args.latency_ms,
+                "single_requests_s": round(single, 2),
+                "batch_s": round(batch, 2),
+                "single_ops_per_s": round(args.count / single, 1),
+                "batch_ops_per_s": round(args.count / batch, 1),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
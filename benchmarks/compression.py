@@ -0,0 +1,136 @@
+# benchmarks/compression.py
+"""
+Сжатие тел ответов по кодировкам и уровням: экономия байт и время сжатия.
+
+Тело — JSON с текстом документа заданного размера (слова из словаря в
+случайном порядке, как извлечённый текст, а не повторяющаяся строка).
+Для каждой кодировки, установленной в окружении (gzip; br и zstd — при
+наличии brotli и zstandard), замеряется сжатие тела целиком и потоковое
+сжатие чанками по --chunk-bytes со сбросом после каждого чанка, как в
+CompressionMiddleware для ?stream=true.
+
+Запуск:
+    SECRET_KEY=x python -m benchmarks.compression --sizes 4096,65536,1048576
+Сквозной замер (задержка и байты по сети) — benchmarks.load
+с --accept-encoding.
+"""
+# STDLIB
+import argparse
+import io
+import json
+import os
+import random
+import time
+
+
+WORDS = (
+    "договор стороны обязуются исполнить условия настоящего соглашения "
+    "в срок оплата производится по счёту в течение банковских дней "
+    "с момента подписания акта the parties agree that this document "
+    "shall be governed by applicable law invoice amount total tax "
+    "payment period 2024 2025 пункт статья приложение №"
+).split()
+
+
+def document_json(size: int, seed: int = 0) -> bytes:
+    """JSON-ответ v1/docs/<id>/text/ с текстом не короче size байт."""
+    rng = random.Random(seed)
+    words, length = [], 0
+    while length < size:
+        word = rng.choice(WORDS)
+        if rng.random() < 0.05:
+            word = str(rng.randint(1, 100000))
+        words.append(word)
+        length += len(word.encode()) + 1
+    return json.dumps({"text": " ".join(words)}, ensure_ascii=False).encode()
+
+
+def _median(values: list[float]) -> float:
+    return sorted(values)[len(values) // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--sizes", default="4096,65536,1048576", help="Размеры текста, байт."
+    )
+    parser.add_argument(
+        "--levels",
+        help="Уровни через запятую (по умолчанию из RESPONSE_COMPRESSION).",
+    )
+    parser.add_argument("--chunk-bytes", type=int, default=16 * 1024)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    # THIRDPARTY
+    import django
+
+    django.setup()
+
+    # THIRDPARTY
+    from django.conf import settings
+
+    # FIRSTPARTY
+    from api.compression import COMPRESSORS
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",") if s):
+        body = document_json(size)
+        stream = io.BytesIO(body)
+        chunks = list(iter(lambda: stream.read(args.chunk_bytes), b""))
+        for encoding, compressor_class in COMPRESSORS.items():
+            if args.levels:
+                levels = [int(level) for level in args.levels.split(",")]
+            else:
+                levels = [settings.RESPONSE_COMPRESSION["LEVELS"][encoding]]
+            for level in levels:
+                timings, stream_timings = [], []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    compressor = compressor_class(level)
+                    compressed = (
+                        compressor.compress(body) + compressor.finish()
+                    )
+                    timings.append(time.perf_counter() - started)
+
+                    started = time.perf_counter()
+                    compressor = compressor_class(level)
+                    streamed = b"".join(
+                        compressor.compress(chunk) + compressor.flush()
+                        for chunk in chunks
+                    )
+                    streamed += compressor.finish()
+                    stream_timings.append(time.perf_counter() - started)
+
+                elapsed = _median(timings)
+                results.append(
+                    {
+                        "encoding": encoding,
+                        "level": level,
+                        "body_bytes": len(body),
+                        "compressed_bytes": len(compressed),
+                        "saved_pct": round(
+                            (1 - len(compressed) / len(body)) * 100, 1
+                        ),
+                        "compress_ms": round(elapsed * 1000, 3),
+                        "throughput_mb_s": round(len(body) / elapsed / 1e6, 1),
+                        "stream_compressed_bytes": len(streamed),
+                        "stream_compress_ms": round(
+                            _median(stream_timings) * 1000, 3
+                        ),
+                    }
+                )
+
+    print(
+        json.dumps(
+            {"chunk_bytes": args.chunk_bytes, "results": results}, indent=2
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/fake_upstream.py
+"""
+Фиктивный FastAPI для нагрузочных тестов: ASGI-приложение с теми же
+маршрутами, что использует прокси (documents, analyze, text, delete).
+
+Параметры задаются переменными окружения:
+    FAKE_LATENCY_MS    — задержка ответа, мс (по умолчанию 20);
+    FAKE_ERROR_RATE    — доля ответов 503, от 0 до 1 (по умолчанию 0);
+    FAKE_PAYLOAD_BYTES — размер текста документа, байт (по умолчанию 4096;
+                         слова в случайном порядке, см.
+                         benchmarks.compression).
+
+Также принимает события Sentry (POST /api/<project>/envelope/) без задержки,
+чтобы замерять накладные расходы SDK без внешней сети.
+
+Запуск: uvicorn benchmarks.fake_upstream:app --port 8100
+"""
+# STDLIB
+import asyncio
+import os
+import random
+import re
+
+# FIRSTPARTY
+from benchmarks.compression import document_json
+
+
+LATENCY = float(os.getenv("FAKE_LATENCY_MS", "20")) / 1000
+ERROR_RATE = float(os.getenv("FAKE_ERROR_RATE", "0"))
+SENTRY_ENVELOPE = re.compile(r"^/api/\d+/envelope/$")
+# Текст из слов, а не повторяющийся символ: сжимается как извлечённый текст
+PAYLOAD = document_json(int(os.getenv("FAKE_PAYLOAD_BYTES", "4096")))
+
+ROUTES = [
+    ("POST", re.compile(r"^/documents$"), 201, b'{"id": 1}'),
+    (
+        "POST",
+        re.compile(r"^/documents/\d+/analyze$"),
+        200,
+        b'{"status": "analyzed"}',
+    ),
+    ("GET", re.compile(r"^/documents/\d+/text$"), 200, PAYLOAD),
+    ("DELETE", re.compile(r"^/documents/\d+$"), 204, b""),
+]
+
+
+async def _drain(receive) -> None:
+    """Читает тело запроса целиком (как FastAPI при разборе формы)."""
+    more_body = True
+    while more_body:
+        message = await receive()
+        more_body = message.get("more_body", False)
+
+
+async def _respond(send, status: int, body: bytes) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    await _drain(receive)
+    if SENTRY_ENVELOPE.match(scope["path"]):
+        return await _respond(send, 200, b"{}")
+    await asyncio.sleep(LATENCY)
+
+    if ERROR_RATE and random.random() < ERROR_RATE:
+        return await _respond(send, 503, b'{"message": "Service Unavailable"}')
+
+    for method, pattern, status, body in ROUTES:
+        if scope["method"] == method and pattern.match(scope["path"]):
+            return await _respond(send, status, body)
+    await _respond(send, 404, b'{"message": "Not Found"}')
@@ -0,0 +1,557 @@
+# benchmarks/load.py
+"""
+Нагрузочный тест эндпоинтов прокси с фиктивным FastAPI.
+
+Запускает benchmarks.fake_upstream (uvicorn) и прокси (config.asgi под
+uvicorn, gunicorn или runserver) в отдельных процессах, нагружает каждый
+сценарий с заданной конкурентностью и сохраняет результаты в JSON:
+пропускную способность, p50/p95/p99 задержки, коды ответов и пиковый RSS
+каждого воркера прокси.
+
+Сценарии: text, poll (без БД) и analyze, upload, delete, batch, register,
+login, refresh, verify (нужна БД с применёнными миграциями: python manage.py
+migrate; analyze, upload и batch обновляют таблицу документов). poll — опрос
+текста с If-None-Match, как у клиентов, ждущих изменений; refresh —
+обновление токенов с ротацией, каждый refresh-токен используется один раз.
+
+Запуск:
+    SECRET_KEY=x python -m benchmarks.load --scenarios text,analyze \\
+        --concurrency 64 --duration 10 --workers 2 --output bench.json
+Сравнение серверов при одинаковой нагрузке:
+    SECRET_KEY=x python -m benchmarks.load --server runserver \\
+        --output runserver.json
+    SECRET_KEY=x python -m benchmarks.load --server gunicorn --workers 2 \\
+        --baseline runserver.json
+Сравнение с предыдущим прогоном:
+    SECRET_KEY=x python -m benchmarks.load --baseline bench.json
+Подключение к Postgres на каждый запрос и пул соединений (register, login;
+перед запуском: USE_SQLITE=False python manage.py migrate):
+    SECRET_KEY=x USE_SQLITE=False DB_POOL=False python -m benchmarks.load \
+        --scenarios register,login --output no-pool.json
+    SECRET_KEY=x USE_SQLITE=False python -m benchmarks.load \
+        --scenarios register,login --baseline no-pool.json
+Сжатие ответов (байты по сети и задержка по кодировкам; FAKE_PAYLOAD_BYTES
+— размер текста; экономия и время сжатия без сети — benchmarks.compression):
+    SECRET_KEY=x python -m benchmarks.load --scenarios text,batch \\
+        --payload-bytes 65536 --output identity.json
+    SECRET_KEY=x python -m benchmarks.load --scenarios text,batch \\
+        --payload-bytes 65536 --accept-encoding gzip --baseline identity.json
+Накладные расходы Sentry (события принимает фиктивный FastAPI):
+    SECRET_KEY=x python -m benchmarks.load --output no-sentry.json
+    SECRET_KEY=x python -m benchmarks.load --sentry-traces-rate 0.01 \\
+        --baseline no-sentry.json
+"""
+# STDLIB
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+import time
+import uuid
+
+# THIRDPARTY
+import httpx
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SCENARIOS = [
+    "text",
+    "poll",
+    "analyze",
+    "upload",
+    "delete",
+    "batch",
+    "register",
+    "login",
+    "refresh",
+    "verify",
+]
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def _children(pid: int) -> list[int]:
+    """PID дочерних процессов (воркеров gunicorn или uvicorn), по /proc."""
+    children = []
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(stat.parent.name))
+    return children
+
+
+def _rss_mb(pid: int) -> float:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def _worker_pids(
+    server: subprocess.Popen, kind: str, workers: int
+) -> list[int]:
+    # Запросы обрабатывают дочерние процессы мастера gunicorn или uvicorn
+    # --workers
+    if kind == "gunicorn" or (kind == "uvicorn" and workers > 1):
+        return _children(server.pid) or [server.pid]
+    return [server.pid]
+
+
+def _start(
+    module: str, port: int, env: dict, workers: int = 1, kind: str = "uvicorn"
+) -> subprocess.Popen:
+    address = f"127.0.0.1:{port}"
+    if kind == "gunicorn":
+        command = [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            module,
+            "-c",
+            "config/gunicorn.conf.py",
+            "--bind",
+            address,
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ]
+    elif kind == "runserver":
+        command = [
+            sys.executable,
+            "manage.py",
+            "runserver",
+            address,
+            "--noreload",
+        ]
+    else:
+        command = [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            module,
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ]
+    return subprocess.Popen(command, cwd=BASE_DIR, env=env)
+
+
+async def _wait_ready(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"Сервер {url} не запустился за {timeout} с.")
+
+
+def _request_factory(scenario: str, upload: bytes):
+    """Возвращает функцию, отправляющую один запрос сценария."""
+    counter = iter(range(1, 1 << 62))
+    # Неиспользованные refresh-токены (сценарий refresh)
+    refresh_tokens: list[str] = []
+    # ETag последнего полученного текста каждого документа (сценарий poll)
+    etags: dict[int, str] = {}
+
+    async def run(
+        client: httpx.AsyncClient, token: str, user: dict
+    ) -> httpx.Response:
+        headers = {"Authorization": f"Bearer {token}"}
+        doc_id = next(counter)
+        if scenario == "text":
+            # Небольшой набор id, чтобы участвовали кэш и объединение запросов
+            return await client.get(
+                f"/api/v1/docs/{doc_id % 100 + 1}/text/", headers=headers
+            )
+        if scenario == "poll":
+            doc_id = doc_id % 100 + 1
+            if doc_id in etags:
+                headers["If-None-Match"] = etags[doc_id]
+            response = await client.get(
+                f"/api/v1/docs/{doc_id}/text/", headers=headers
+            )
+            if "ETag" in response.headers:
+                etags[doc_id] = response.headers["ETag"]
+            return response
+        if scenario == "analyze":
+            return await client.post(
+                f"/api/v1/docs/{doc_id}/analyze/", headers=headers
+            )
+        if scenario == "upload":
+            files = {"file": ("bench.bin", upload, "application/octet-stream")}
+            return await client.post(
+                "/api/v1/docs/", headers=headers, files=files
+            )
+        if scenario == "delete":
+            return await client.delete(
+                f"/api/v1/docs/{doc_id}/", headers=headers
+            )
+        if scenario == "batch":
+            operations = [{"op": "analyze", "doc_id": i} for i in range(1, 21)]
+            return await client.post(
+                "/api/v1/docs/batch/",
+                headers=headers,
+                json={"operations": operations},
+            )
+        if scenario == "refresh":
+            if refresh_tokens:
+                refresh = refresh_tokens.pop()
+            else:
+                # THIRDPARTY
+                from django.contrib.auth.models import User
+
+                # FIRSTPARTY
+                from api.tokens import RefreshToken
+
+                refresh = str(RefreshToken.for_user(User(id=user["id"])))
+            response = await client.post(
+                "/api/v1/auth/token/refresh/", data={"refresh": refresh}
+            )
+            if response.status_code == 200:
+                refresh_tokens.append(response.json()["refresh"])
+            return response
+        if scenario == "verify":
+            return await client.post(
+                "/api/v1/auth/token/verify/", data={"token": token}
+            )
+        if scenario == "register":
+            data = {
+                "username": f"bench-{uuid.uuid4().hex}",
+                "password": "bench-password-1",
+            }
+            return await client.post("/api/v1/auth/register/", data=data)
+        return await client.post("/api/v1/auth/token/", data=user)
+
+    return run
+
+
+async def _run_scenario(
+    scenario: str, base_url: str, token: str, user: dict, args, pids: list[int]
+) -> dict:
+    send = _request_factory(scenario, os.urandom(args.upload_bytes))
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    received_bytes = 0
+    peak_rss = {pid: _rss_mb(pid) for pid in pids}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    timeout = httpx.Timeout(60)
+
+    headers = {"Accept-Encoding": args.accept_encoding}
+
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=timeout, headers=headers
+    ) as client:
+        # Прогрев: соединения, кэши, JIT-подобные эффекты первых запросов
+        for _ in range(min(args.concurrency, 10)):
+            await send(client, token, user)
+
+        deadline = time.perf_counter() + args.duration
+
+        async def worker() -> None:
+            nonlocal received_bytes
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await send(client, token, user)
+                    key = str(response.status_code)
+                    # Байты по сети (сжатые, если ответ сжат)
+                    received_bytes += response.num_bytes_downloaded
+                except httpx.HTTPError as e:
+                    key = type(e).__name__
+                latencies.append(time.perf_counter() - started)
+                statuses[key] = statuses.get(key, 0) + 1
+
+        async def sample_rss() -> None:
+            while time.perf_counter() < deadline:
+                for pid in pids:
+                    peak_rss[pid] = max(peak_rss[pid], _rss_mb(pid))
+                await asyncio.sleep(0.25)
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            sample_rss(), *(worker() for _ in range(args.concurrency))
+        )
+        elapsed = time.perf_counter() - started
+
+    ok = sum(
+        n for code, n in statuses.items() if code.isdigit() and int(code) < 400
+    )
+    average_bytes = round(received_bytes / len(latencies)) if latencies else 0
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "success_rate": round(ok / len(latencies), 4) if latencies else 0.0,
+        "status_codes": statuses,
+        "response_bytes_avg": average_bytes,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50) * 1000, 2),
+            "p95": round(_percentile(latencies, 95) * 1000, 2),
+            "p99": round(_percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies, default=0) * 1000, 2),
+        },
+        "peak_rss_mb": {
+            str(pid): round(rss, 1) for pid, rss in peak_rss.items()
+        },
+    }
+
+
+def _compare(current: dict, baseline: dict) -> dict:
+    """
+    Изменение пропускной способности и p99 относительно baseline, в процентах.
+    """
+
+    def delta(new: float, old: float) -> float | None:
+        return round((new - old) / old * 100, 1) if old else None
+
+    diff = {}
+    for scenario, result in current["scenarios"].items():
+        old = baseline["scenarios"].get(scenario)
+        if old is None:
+            continue
+        diff[scenario] = {
+            "throughput_rps_pct": delta(
+                result["throughput_rps"], old["throughput_rps"]
+            ),
+            "p99_ms_pct": delta(
+                result["latency_ms"]["p99"], old["latency_ms"]["p99"]
+            ),
+            "response_bytes_pct": delta(
+                result["response_bytes_avg"], old["response_bytes_avg"]
+            ),
+        }
+    return diff
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _database_config() -> dict:
+    """
+    Движок БД и параметры соединений прокси (из тех же переменных окружения).
+    """
+    # THIRDPARTY
+    from django.db import connection
+
+    config = connection.settings_dict
+    return {
+        "engine": config["ENGINE"].rsplit(".", 1)[-1],
+        "conn_max_age": config["CONN_MAX_AGE"],
+        "pool": config["OPTIONS"].get("pool"),
+    }
+
+
+async def _run(args) -> dict:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    # THIRDPARTY
+    import django
+
+    django.setup()
+
+    # THIRDPARTY
+    from django.contrib.auth.models import User
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    token = str(AccessToken.for_user(User(id=1, username="bench")))
+    upstream_url = f"http://127.0.0.1:{args.upstream_port}/"
+    proxy_url = f"http://127.0.0.1:{args.proxy_port}"
+
+    env = {
+        **os.environ,
+        "FAKE_LATENCY_MS": str(args.latency_ms),
+        "FAKE_ERROR_RATE": str(args.error_rate),
+        "FAKE_PAYLOAD_BYTES": str(args.payload_bytes),
+        "FASTAPI_URL": upstream_url,
+        "ALLOWED_HOSTS": "127.0.0.1,localhost",
+        # Все запросы идут от одного пользователя: лимиты включаются явно
+        "RATE_LIMIT": str(args.rate_limit),
+        # Без --sentry-traces-rate SDK не инициализируется (DSN из .env не
+        # используется)
+        "SENTRY_DSN": "",
+    }
+    if args.sentry_traces_rate is not None:
+        env.update(
+            {
+                "SENTRY_DSN": f"http://bench@127.0.0.1:{args.upstream_port}/1",
+                "SENTRY_TRACES_SAMPLE_RATE": str(args.sentry_traces_rate),
+                "SENTRY_PROFILES_SAMPLE_RATE": str(args.sentry_profiles_rate),
+            }
+        )
+    fake = _start("benchmarks.fake_upstream:app", args.upstream_port, env)
+    proxy = _start(
+        "config.asgi:application",
+        args.proxy_port,
+        env,
+        args.workers,
+        args.server,
+    )
+    try:
+        await _wait_ready(upstream_url)
+        await _wait_ready(f"{proxy_url}/metrics")
+        # Воркеры gunicorn запускаются после ответа мастера не сразу все
+        await asyncio.sleep(1)
+        pids = _worker_pids(proxy, args.server, args.workers)
+
+        user = {
+            "username": f"bench-{uuid.uuid4().hex}",
+            "password": "bench-password-1",
+        }
+        if {"login", "refresh"} & set(args.scenarios):
+            async with httpx.AsyncClient(
+                base_url=proxy_url, timeout=60
+            ) as client:
+                response = await client.post(
+                    "/api/v1/auth/register/", data=user
+                )
+            # refresh-токены для сценария refresh выпускаются локально по id
+            user["id"] = AccessToken(response.json()["access"])["user_id"]
+
+        results = {}
+        for scenario in args.scenarios:
+            results[scenario] = await _run_scenario(
+                scenario, proxy_url, token, user, args, pids
+            )
+            print(
+                f"{scenario}: {json.dumps(results[scenario])}", file=sys.stderr
+            )
+    finally:
+        for process in (proxy, fake):
+            process.terminate()
+            process.wait(timeout=30)
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "server": args.server,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "workers": args.workers,
+            "upstream_latency_ms": args.latency_ms,
+            "upstream_error_rate": args.error_rate,
+            "payload_bytes": args.payload_bytes,
+            "rate_limit": args.rate_limit,
+            "accept_encoding": args.accept_encoding,
+            "sentry_traces_rate": args.sentry_traces_rate,
+            "sentry_profiles_rate": args.sentry_profiles_rate,
+            "upload_bytes": args.upload_bytes,
+            "database": _database_config(),
+        },
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--scenarios", default="text,analyze,upload,delete")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument(
+        "--duration", type=float, default=10, help="Секунд на сценарий."
+    )
+    parser.add_argument(
+        "--server",
+        choices=["uvicorn", "gunicorn", "runserver"],
+        default="uvicorn",
+        help=(
+            "Сервер прокси: uvicorn, gunicorn с воркерами uvicorn "
+            "или runserver."
+        ),
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Воркеры прокси."
+    )
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--payload-bytes", type=int, default=4096)
+    parser.add_argument("--upload-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--upstream-port", type=int, default=8100)
+    parser.add_argument("--proxy-port", type=int, default=8101)
+    parser.add_argument(
+        "--rate-limit",
+        action="store_true",
+        help="Не отключать RATE_LIMIT в прокси.",
+    )
+    parser.add_argument(
+        "--accept-encoding",
+        default="identity",
+        help="Заголовок Accept-Encoding запросов (например gzip, br, zstd).",
+    )
+    parser.add_argument(
+        "--sentry-traces-rate",
+        type=float,
+        help=(
+            "Включить Sentry с этой долей трассировки "
+            "(по умолчанию Sentry отключён)."
+        ),
+    )
+    parser.add_argument(
+        "--sentry-profiles-rate",
+        type=float,
+        default=0.0,
+        help="Доля профилируемых транзакций при включённом Sentry.",
+    )
+    parser.add_argument("--output", help="Файл для результатов в JSON.")
+    parser.add_argument(
+        "--baseline", help="JSON предыдущего прогона для сравнения."
+    )
+    args = parser.parse_args()
+
+    args.scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(_run(args))
+    if args.baseline:
+        report["baseline"] = {
+            "file": args.baseline,
+            "diff": _compare(
+                report, json.loads(Path(args.baseline).read_text())
+            ),
+        }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/login_burst.py
+"""
+Задержка цикла событий во время всплеска хэширования паролей: хэширование
+в цикле событий (как раньше) и в пуле хэширования.
+
+Пока выполняется --logins хэширований, в том же цикле работает «пульс»
+с интервалом 10 мс, имитирующий проксируемые запросы к документам; измеряется
+его максимальная задержка.
+
+Запуск: SECRET_KEY=x python -m benchmarks.login_burst --logins 20
+"""
+# STDLIB
+import argparse
+import asyncio
+import json
+import os
+import time
+
+
+TICK = 0.01
+
+
+async def _heartbeat(stop: asyncio.Event) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        worst = max(worst, time.perf_counter() - started - TICK)
+    return worst
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    # THIRDPARTY
+    import django
+
+    django.setup()
+
+    # THIRDPARTY
+    from django.conf import settings
+    from django.contrib.auth.hashers import make_password
+
+    # FIRSTPARTY
+    from api.hashing import get_hash_pool
+
+    async def inline() -> None:
+        make_password("password")
+
+    async def pooled() -> None:
+        await get_hash_pool().run(make_password, "password")
+
+    async def run(hash_once) -> dict:
+        stop = asyncio.Event()
+        heartbeat = asyncio.create_task(_heartbeat(stop))
+        await asyncio.sleep(TICK)
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(hash_once() for _ in range(args.logins)), return_exceptions=True
+        )
+        elapsed = time.perf_counter() - started
+        stop.set()
+        worst = await heartbeat
+        return {
+            "total_s": round(elapsed, 3),
+            "rejected_429": sum(isinstance(r, Exception) for r in results),
+            "max_loop_stall_ms": round(worst * 1000, 1),
+        }
+
+    results = {
+        "inline": asyncio.run(run(inline)),
+        "pool": asyncio.run(run(pooled)),
+    }
+    print(
+        json.dumps(
+            {
+                "logins": args.logins,
+                "pool": settings.PASSWORD_HASHING,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/token_auth.py
+"""
+Стоимость проверки JWT в token_required на один запрос: с кэшем проверенных
+токенов и без него.
+
+Запуск: SECRET_KEY=x python -m benchmarks.token_auth --iterations 20000
+"""
+# STDLIB
+import argparse
+import asyncio
+import json
+import os
+import time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    # THIRDPARTY
+    import django
+
+    django.setup()
+
+    # THIRDPARTY
+    from django.contrib.auth.models import User
+    from django.test import override_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    # FIRSTPARTY
+    from api.decorators import token_required
+    from api.token_cache import token_cache
+
+    token = str(AccessToken.for_user(User(id=1, username="bench")))
+
+    class Request:
+        headers = {"Authorization": f"Bearer {token}"}
+
+    class View:
+        @token_required
+        async def get(self, request):
+            return None
+
+    view, request = View(), Request()
+
+    async def run() -> float:
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            await view.get(request)
+        return (time.perf_counter() - started) / args.iterations * 1e6
+
+    results = {}
+    for enabled in (False, True):
+        token_cache.clear()
+        with override_settings(
+            JWT_VERIFY_CACHE={"ENABLED": enabled, "MAX_SIZE": 10000}
+        ):
+            results["cached" if enabled else "uncached"] = round(
+                asyncio.run(run()), 2
+            )
+
+    print(
+        json.dumps(
+            {"iterations": args.iterations, "us_per_request": results},
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/upload_rss.py
+"""
+Сравнение пикового RSS при загрузке документа в FastAPI: буферизованный
+режим (file_obj.read() + files=) против потокового (MultipartFileStream).
+
+Запуск: SECRET_KEY=x python -m benchmarks.upload_rss --sizes 16 64 256
+"""
+# STDLIB
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+
+
+CHUNK = 1024 * 1024
+
+
+def _max_rss_mb() -> float:
+    """Пиковый RSS текущего процесса в МБ (Linux отдаёт значение в КБ)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_case(mode: str, size_mb: int) -> dict:
+    """
+    Загружает файл размером size_mb в фиктивный upstream и измеряет прирост
+    RSS.
+
+    :param mode: "streaming" или "buffered".
+    :param size_mb: Размер файла в МБ.
+    :return: Результат замера.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    # THIRDPARTY
+    import django
+
+    django.setup()
+
+    # THIRDPARTY
+    from django.core.files.uploadedfile import TemporaryUploadedFile
+    import httpx
+
+    # FIRSTPARTY
+    from api.streaming import MultipartFileStream
+
+    file_obj = TemporaryUploadedFile(
+        "bench.bin", "application/octet-stream", 0, None
+    )
+    for _ in range(size_mb):
+        file_obj.write(os.urandom(CHUNK))
+    file_obj.size = size_mb * CHUNK
+    file_obj.seek(0)
+
+    class SinkTransport(httpx.AsyncBaseTransport):
+        """Транспорт, который читает и отбрасывает тело, как сетевой сокет."""
+
+        async def handle_async_request(
+            self, request: httpx.Request
+        ) -> httpx.Response:
+            async for _ in request.stream:
+                pass
+            return httpx.Response(201, json={"id": 1})
+
+    async def upload():
+        async with httpx.AsyncClient(transport=SinkTransport()) as client:
+            if mode == "streaming":
+                stream = MultipartFileStream(file_obj)
+                await client.post(
+                    "http://upstream/documents",
+                    content=stream,
+                    headers=stream.headers,
+                )
+            else:
+                content = file_obj.read()
+                await client.post(
+                    "http://upstream/documents",
+                    files={"file": (file_obj.name, content)},
+                )
+
+    baseline = _max_rss_mb()
+    asyncio.run(upload())
+    return {
+        "mode": mode,
+        "size_mb": size_mb,
+        "rss_growth_mb": round(_max_rss_mb() - baseline, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--case", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case[0], int(args.case[1]))))
+        return
+
+    # Каждый замер выполняется в отдельном процессе, т.к. ru_maxrss не убывает
+    results = []
+    for size in args.sizes:
+        for mode in ("buffered", "streaming"):
+            output = subprocess.check_output(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.upload_rss",
+                    "--case",
+                    mode,
+                    str(size),
+                ]
+            )
+            results.append(
+                json.loads(output.decode().strip().splitlines()[-1])
+            )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
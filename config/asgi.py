@@ -1,7 +1,18 @@
+# STDLIB
 import os
 
+# THIRDPARTY
 from django.core.asgi import get_asgi_application
 
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# FIRSTPARTY
+from api.lifespan import LifespanMiddleware  # noqa: E402
+from api.ratelimit import RateLimitMiddleware  # noqa: E402
+
+
+# Ограничение частоты запросов до Django: отклонённый запрос не читает тело
+application = LifespanMiddleware(RateLimitMiddleware(django_application))
@@ -0,0 +1,51 @@
+# config/gunicorn.conf.py
+"""
+Продакшен-запуск: gunicorn управляет процессами, каждый воркер — uvicorn
+(uvloop и httptools используются, если установлены).
+
+Запуск: gunicorn config.asgi:application -c config/gunicorn.conf.py
+"""
+# STDLIB
+import multiprocessing
+import os
+import shutil
+
+
+# Воркеры асинхронные: одного на ядро достаточно, чтобы загрузить CPU
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Очередь соединений, ожидающих accept()
+backlog = int(os.getenv("GUNICORN_BACKLOG", "2048"))
+# Время удержания keep-alive соединения клиента (передаётся в uvicorn)
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+# Воркер, не отвечающий мастеру дольше timeout, перезапускается
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+# Время на завершение текущих запросов и фоновых задач при остановке
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+# Периодический перезапуск воркеров (0 — отключён); jitter разводит перезапуски
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "0"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def on_starting(server):
+    # Метрики Prometheus прошлого запуска не должны попасть в /metrics
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Воркер мог завершиться аварийно, без lifespan shutdown
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # THIRDPARTY
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
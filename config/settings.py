@@ -1,11 +1,16 @@
-import os
-import sys
+# STDLIB
 from datetime import timedelta
+import json
+import os
 from pathlib import Path
+import sys
+
+# THIRDPARTY
 from dotenv import load_dotenv
 import sentry_sdk
 from sentry_sdk.integrations.django import DjangoIntegration
 
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -24,12 +29,15 @@ INSTALLED_APPS = [
     "api.apps.ApiConfig",
     "rest_framework",
     "rest_framework_simplejwt",
+    "rest_framework_simplejwt.token_blacklist",
     "django_extensions",
-    # "django_prometheus"
+    "django_prometheus",
 ]
 
 MIDDLEWARE = [
-    # "django_prometheus.middleware.PrometheusBeforeMiddleware",
+    "django_prometheus.middleware.PrometheusBeforeMiddleware",
+    "api.middleware.LoggingMiddleware",
+    "api.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -37,24 +45,54 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    # 'api.middleware.LoggingMiddleware',
-    # "django_prometheus.middleware.PrometheusAfterMiddleware"
-
+    "api.middleware.MetricsMiddleware",
+    "django_prometheus.middleware.PrometheusAfterMiddleware",
 ]
 
-sentry_sdk.init(
-    dsn="https://27d41c3ff0b4cc1ef9a6d1e28030b856@o4508543732023296.ingest.de.sentry.io/4508543733596240",
-    # Set traces_sample_rate to 1.0 to capture 100%
-    # of transactions for tracing.
-    traces_sample_rate=1.0,
-    debug=True,
-    _experiments={
-        # Set continuous_profiling_auto_start to True
-        # to automatically start the profiler on when
-        # possible.
-        "continuous_profiling_auto_start": True,
+# Sentry: без SENTRY_DSN SDK не инициализируется (тесты, локальный запуск).
+# Трассируется доля запросов TRACES_SAMPLE_RATE, для отдельных маршрутов — своя
+# доля (ROUTE_SAMPLE_RATES, по имени маршрута; JSON в SENTRY_ROUTE_SAMPLE_RATES
+# дополняет значения по умолчанию), ответы 5xx — ERROR_TRACES_SAMPLE_RATE, см.
+# api.tracing. Ошибки отправляются с долей ERROR_SAMPLE_RATE независимо от
+# трассировки
+SENTRY = {
+    "DSN": os.getenv("SENTRY_DSN", ""),
+    "ENVIRONMENT": os.getenv("SENTRY_ENVIRONMENT", "production"),
+    "RELEASE": os.getenv("SENTRY_RELEASE") or None,
+    "DEBUG": os.getenv("SENTRY_DEBUG", "False").lower()
+    in ["true", "1", "yes"],
+    "ERROR_SAMPLE_RATE": float(os.getenv("SENTRY_ERROR_SAMPLE_RATE", "1.0")),
+    "TRACES_SAMPLE_RATE": float(
+        os.getenv("SENTRY_TRACES_SAMPLE_RATE", "0.01")
+    ),
+    "ERROR_TRACES_SAMPLE_RATE": float(
+        os.getenv("SENTRY_ERROR_TRACES_SAMPLE_RATE", "0")
+    ),
+    # Профилируется доля трассируемых транзакций
+    "PROFILES_SAMPLE_RATE": float(
+        os.getenv("SENTRY_PROFILES_SAMPLE_RATE", "0")
+    ),
+    "ROUTE_SAMPLE_RATES": {
+        "prometheus-django-metrics": 0.0,
+        **json.loads(os.getenv("SENTRY_ROUTE_SAMPLE_RATES", "{}")),
     },
-)
+}
+
+if SENTRY["DSN"]:
+    # FIRSTPARTY
+    from api.tracing import before_send_transaction, traces_sampler
+
+    sentry_sdk.init(
+        dsn=SENTRY["DSN"],
+        environment=SENTRY["ENVIRONMENT"],
+        release=SENTRY["RELEASE"],
+        debug=SENTRY["DEBUG"],
+        sample_rate=SENTRY["ERROR_SAMPLE_RATE"],
+        traces_sampler=traces_sampler,
+        before_send_transaction=before_send_transaction,
+        profiles_sample_rate=SENTRY["PROFILES_SAMPLE_RATE"],
+        integrations=[DjangoIntegration()],
+    )
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (),
@@ -69,7 +107,6 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     # "UPDATE_LAST_LOGIN": False,
-
     "ALGORITHM": "HS256",
     "SIGNING_KEY": SECRET_KEY,
     # "VERIFYING_KEY": "",
@@ -78,12 +115,12 @@ SIMPLE_JWT = {
     # "JSON_ENCODER": None,
     # "JWK_URL": None,
     # "LEEWAY": 0,
-
     # "AUTH_HEADER_TYPES": ("Bearer",),
     # "AUTH_HEADER_NAME": "HTTP_AUTHORIZATION",
     # "USER_ID_FIELD": "id",
     # "USER_ID_CLAIM": "user_id",
-    # "USER_AUTHENTICATION_RULE": "rest_framework_simplejwt.authentication.default_user_authentication_rule",
+    # "USER_AUTHENTICATION_RULE":
+    # "rest_framework_simplejwt.authentication.default_user_authentication_rule",
     #
     # "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
     # "TOKEN_TYPE_CLAIM": "token_type",
@@ -95,14 +132,246 @@ SIMPLE_JWT = {
     # "SLIDING_TOKEN_LIFETIME": timedelta(minutes=30),
     # "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
     #
-    # "TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainPairSerializer",
-    # "TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSerializer",
-    # "TOKEN_VERIFY_SERIALIZER": "rest_framework_simplejwt.serializers.TokenVerifySerializer",
-    # "TOKEN_BLACKLIST_SERIALIZER": "rest_framework_simplejwt.serializers.TokenBlacklistSerializer",
-    # "SLIDING_TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainSlidingSerializer",
-    # "SLIDING_TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer",
+    # "TOKEN_OBTAIN_SERIALIZER":
+    # "rest_framework_simplejwt.serializers.TokenObtainPairSerializer",
+    # "TOKEN_REFRESH_SERIALIZER":
+    # "rest_framework_simplejwt.serializers.TokenRefreshSerializer",
+    # "TOKEN_VERIFY_SERIALIZER":
+    # "rest_framework_simplejwt.serializers.TokenVerifySerializer",
+    # "TOKEN_BLACKLIST_SERIALIZER":
+    # "rest_framework_simplejwt.serializers.TokenBlacklistSerializer",
+    # "SLIDING_TOKEN_OBTAIN_SERIALIZER":
+    # "rest_framework_simplejwt.serializers.TokenObtainSlidingSerializer",
+    # "SLIDING_TOKEN_REFRESH_SERIALIZER":
+    # "rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer",
+}
+
+# Чёрный список refresh-токенов (api.tokens). FILTER — фильтр Блума jti в
+# памяти воркера: БД проверяется только при возможном попадании; его ёмкость
+# растёт вместе с таблицей, FILTER_CAPACITY — её нижняя граница. Токены,
+# занесённые в список другими воркерами, подгружаются раз в SYNC_INTERVAL
+# секунд; повторную ротацию токена отклоняет БД независимо от фильтра.
+# Истёкшие токены удаляются пачками раз в PURGE_INTERVAL секунд (0 — только
+# командой purge_expired_tokens, например из cron)
+TOKEN_BLACKLIST = {
+    "FILTER": os.getenv("TOKEN_BLACKLIST_FILTER", "True").lower()
+    in ["true", "1", "yes"],
+    "FILTER_CAPACITY": int(
+        os.getenv("TOKEN_BLACKLIST_FILTER_CAPACITY", "1000000")
+    ),
+    "FILTER_ERROR_RATE": float(
+        os.getenv("TOKEN_BLACKLIST_FILTER_ERROR_RATE", "0.001")
+    ),
+    "SYNC_INTERVAL": float(os.getenv("TOKEN_BLACKLIST_SYNC_INTERVAL", "1")),
+    "PURGE_INTERVAL": float(
+        os.getenv("TOKEN_BLACKLIST_PURGE_INTERVAL", "3600")
+    ),
+    "PURGE_BATCH_SIZE": int(
+        os.getenv("TOKEN_BLACKLIST_PURGE_BATCH_SIZE", "1000")
+    ),
+}
+
+# Кэш проверенных JWT-токенов в token_required (запись живёт до exp токена, но
+# не дольше TTL секунд). Кэш свой у каждого воркера и не сверяется с чёрным
+# списком: отозванный токен остаётся в кэше до TTL
+JWT_VERIFY_CACHE = {
+    "ENABLED": os.getenv("JWT_VERIFY_CACHE", "True").lower()
+    in ["true", "1", "yes"],
+    "MAX_SIZE": int(os.getenv("JWT_VERIFY_CACHE_MAX_SIZE", "10000")),
+    "TTL": float(os.getenv("JWT_VERIFY_CACHE_TTL", "60")),
+}
+
+# HTTP-клиент FastAPI: общий пул соединений на воркер
+FASTAPI_CLIENT = {
+    "MAX_CONNECTIONS": int(os.getenv("FASTAPI_MAX_CONNECTIONS", "100")),
+    "MAX_KEEPALIVE_CONNECTIONS": int(
+        os.getenv("FASTAPI_MAX_KEEPALIVE_CONNECTIONS", "20")
+    ),
+    "KEEPALIVE_EXPIRY": float(os.getenv("FASTAPI_KEEPALIVE_EXPIRY", "30")),
+    "HTTP2": os.getenv("FASTAPI_HTTP2", "False").lower()
+    in ["true", "1", "yes"],
+}
+
+# Устойчивость запросов к FastAPI: таймауты операций (сек), повторы
+# идемпотентных запросов (text, delete), бюджет повторов и выключатель
+FASTAPI_RESILIENCE = {
+    "CONNECT_TIMEOUT": float(os.getenv("FASTAPI_CONNECT_TIMEOUT", "3")),
+    "DEFAULT_TIMEOUT": float(os.getenv("FASTAPI_TIMEOUT", "30")),
+    "TIMEOUTS": {
+        "upload": float(os.getenv("FASTAPI_UPLOAD_TIMEOUT", "300")),
+        "analyze": float(os.getenv("FASTAPI_ANALYZE_TIMEOUT", "120")),
+        "text": float(os.getenv("FASTAPI_TEXT_TIMEOUT", "15")),
+        "delete": float(os.getenv("FASTAPI_DELETE_TIMEOUT", "15")),
+    },
+    "RETRIES": int(os.getenv("FASTAPI_RETRIES", "2")),
+    "BACKOFF_BASE": float(os.getenv("FASTAPI_BACKOFF_BASE", "0.1")),
+    "BACKOFF_MAX": float(os.getenv("FASTAPI_BACKOFF_MAX", "2")),
+    "RETRY_BUDGET_RATIO": float(
+        os.getenv("FASTAPI_RETRY_BUDGET_RATIO", "0.2")
+    ),
+    "RETRY_BUDGET_MIN": float(os.getenv("FASTAPI_RETRY_BUDGET_MIN", "10")),
+    "RETRY_BUDGET_MAX": float(os.getenv("FASTAPI_RETRY_BUDGET_MAX", "100")),
+    "BREAKER_FAILURE_THRESHOLD": int(
+        os.getenv("FASTAPI_BREAKER_THRESHOLD", "5")
+    ),
+    "BREAKER_RESET_TIMEOUT": float(
+        os.getenv("FASTAPI_BREAKER_RESET_TIMEOUT", "30")
+    ),
+}
+
+# Загрузка документов: потоковая передача файла в FastAPI фиксированными
+# чанками
+DOCUMENT_UPLOAD = {
+    "STREAMING": os.getenv("UPLOAD_STREAMING", "True").lower()
+    in ["true", "1", "yes"],
+    "CHUNK_SIZE": int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024))),
+    # Повторная загрузка файла с тем же SHA-256 возвращает ID уже загруженного
+    # документа без отправки в FastAPI (api.models.DocumentHash)
+    "DEDUPLICATE": os.getenv("UPLOAD_DEDUPLICATE", "False").lower()
+    in ["true", "1", "yes"],
+}
+
+# Владельцы документов (api.models.Document). ENFORCE — операции с документом
+# другого пользователя возвращают 404; документы без записи в таблице
+# (загруженные до её появления) доступны, как раньше. CACHE_SIZE — число
+# владельцев в кэше воркера. PAGE_SIZE и MAX_PAGE_SIZE — размер страницы списка
+# v1/docs/
+DOCUMENT_OWNERSHIP = {
+    "ENFORCE": os.getenv("DOCUMENT_OWNERSHIP_ENFORCE", "True").lower()
+    in ["true", "1", "yes"],
+    "CACHE_SIZE": int(os.getenv("DOCUMENT_OWNER_CACHE_SIZE", "100000")),
+    "PAGE_SIZE": int(os.getenv("DOCUMENT_LIST_PAGE_SIZE", "50")),
+    "MAX_PAGE_SIZE": int(os.getenv("DOCUMENT_LIST_MAX_PAGE_SIZE", "200")),
+}
+
+# Возобновляемая загрузка по частям (v1/uploads/): части хранятся в DIR до
+# завершения загрузки. При нескольких хостах DIR — общий том для всех воркеров.
+# Размер части — от MIN_CHUNK_SIZE до MAX_CHUNK_SIZE (последняя может быть
+# меньше), частей — не больше MAX_CHUNK_COUNT. У пользователя не больше
+# MAX_ACTIVE_PER_USER незавершённых загрузок; загрузки, не завершённые за
+# EXPIRE_AFTER секунд, удаляются вместе с частями раз в PURGE_INTERVAL секунд
+# (0 — только командой purge_expired_uploads)
+CHUNKED_UPLOAD = {
+    "DIR": os.getenv("CHUNKED_UPLOAD_DIR", str(BASE_DIR / "uploads")),
+    "CHUNK_SIZE": int(
+        os.getenv("CHUNKED_UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024))
+    ),
+    "MIN_CHUNK_SIZE": int(
+        os.getenv("CHUNKED_UPLOAD_MIN_CHUNK_SIZE", str(1024 * 1024))
+    ),
+    "MAX_CHUNK_SIZE": int(
+        os.getenv("CHUNKED_UPLOAD_MAX_CHUNK_SIZE", str(64 * 1024 * 1024))
+    ),
+    "MAX_CHUNK_COUNT": int(
+        os.getenv("CHUNKED_UPLOAD_MAX_CHUNK_COUNT", "10000")
+    ),
+    "MAX_SIZE": int(os.getenv("CHUNKED_UPLOAD_MAX_SIZE", str(10 * 1024**3))),
+    "MAX_ACTIVE_PER_USER": int(
+        os.getenv("CHUNKED_UPLOAD_MAX_ACTIVE_PER_USER", "10")
+    ),
+    "EXPIRE_AFTER": float(os.getenv("CHUNKED_UPLOAD_EXPIRE_AFTER", "86400")),
+    "PURGE_INTERVAL": float(
+        os.getenv("CHUNKED_UPLOAD_PURGE_INTERVAL", "3600")
+    ),
+    "PURGE_BATCH_SIZE": int(
+        os.getenv("CHUNKED_UPLOAD_PURGE_BATCH_SIZE", "100")
+    ),
+}
+
+# Текст документов: потоковая передача ответа FastAPI по умолчанию
+# (?stream=true)
+DOCUMENT_TEXT = {
+    "STREAMING": os.getenv("TEXT_STREAMING", "False").lower()
+    in ["true", "1", "yes"],
+}
+
+# Объединение одновременных одинаковых запросов к FastAPI (single-flight).
+# REDIS=True объединяет запросы между воркерами через блокировку в CACHES
+# (CACHE_ALIAS должен быть кэшем django-redis, иначе воркер не стартует)
+SINGLE_FLIGHT = {
+    "ENABLED": os.getenv("SINGLE_FLIGHT", "True").lower()
+    in ["true", "1", "yes"],
+    "REDIS": os.getenv("SINGLE_FLIGHT_REDIS", "False").lower()
+    in ["true", "1", "yes"],
+    "CACHE_ALIAS": os.getenv("SINGLE_FLIGHT_CACHE_ALIAS", "default"),
+    "LOCK_TIMEOUT": float(os.getenv("SINGLE_FLIGHT_LOCK_TIMEOUT", "30")),
+    "POLL_INTERVAL": float(os.getenv("SINGLE_FLIGHT_POLL_INTERVAL", "0.05")),
+}
+
+# Пакетные операции с документами (v1/docs/batch/)
+DOCUMENT_BATCH = {
+    "MAX_OPERATIONS": int(os.getenv("BATCH_MAX_OPERATIONS", "1000")),
+    "CONCURRENCY": int(os.getenv("BATCH_CONCURRENCY", "50")),
+}
+
+# Асинхронный анализ документов (202 + задача, v1/jobs/<id>/). По умолчанию
+# включается заголовком "Prefer: respond-async" или параметром ?async=true.
+# callback_url — только https; с CALLBACK_ALLOWED_HOSTS (через запятую,
+# ".example.com" — домен и поддомены) допускаются только эти хосты, без него —
+# хосты с публичными IP-адресами. Задачи pending/running без изменений дольше
+# STALE_TIMEOUT секунд завершаются с ошибкой при старте воркера
+ANALYSIS_JOBS = {
+    "ASYNC_BY_DEFAULT": os.getenv("ANALYSIS_ASYNC_BY_DEFAULT", "False").lower()
+    in ["true", "1", "yes"],
+    "CONCURRENCY": int(os.getenv("ANALYSIS_JOBS_CONCURRENCY", "20")),
+    "CALLBACK_TIMEOUT": float(os.getenv("ANALYSIS_CALLBACK_TIMEOUT", "10")),
+    "SHUTDOWN_TIMEOUT": float(os.getenv("ANALYSIS_SHUTDOWN_TIMEOUT", "30")),
+    "CALLBACK_ALLOWED_HOSTS": [
+        host.strip().lower()
+        for host in os.getenv("ANALYSIS_CALLBACK_ALLOWED_HOSTS", "").split(",")
+        if host.strip()
+    ],
+    "STALE_TIMEOUT": float(os.getenv("ANALYSIS_JOBS_STALE_TIMEOUT", "3600")),
 }
 
+# Кэш текстов документов: "locmem" (LRU в памяти процесса), "django" (CACHES,
+# например Redis) или "none"
+DOCUMENT_TEXT_CACHE = {
+    "BACKEND": os.getenv("TEXT_CACHE_BACKEND", "locmem"),
+    "CACHE_ALIAS": os.getenv("TEXT_CACHE_ALIAS", "default"),
+    "MAX_BYTES": int(os.getenv("TEXT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    "TTL": float(os.getenv("TEXT_CACHE_TTL", "300")),
+    "STALE_TTL": float(os.getenv("TEXT_CACHE_STALE_TTL", "60")),
+}
+
+# Сжатие ответов (api.middleware.CompressionMiddleware): кодировка выбирается
+# по Accept-Encoding из ALGORITHMS (при равном q — в порядке списка; br и zstd
+# — если установлены пакеты brotli и zstandard). Сжимаются ответы с типом из
+# CONTENT_TYPES (по префиксу) от MIN_SIZE байт и потоковые ответы; тела и чанки
+# от OFFLOAD_MIN_SIZE байт сжимаются в потоке, а не в цикле событий
+RESPONSE_COMPRESSION = {
+    "ENABLED": os.getenv("RESPONSE_COMPRESSION", "True").lower()
+    in ["true", "1", "yes"],
+    "ALGORITHMS": [
+        name.strip()
+        for name in os.getenv(
+            "RESPONSE_COMPRESSION_ALGORITHMS", "zstd,br,gzip"
+        ).split(",")
+        if name.strip()
+    ],
+    "LEVELS": {
+        "gzip": int(os.getenv("RESPONSE_COMPRESSION_GZIP_LEVEL", "4")),
+        "br": int(os.getenv("RESPONSE_COMPRESSION_BROTLI_LEVEL", "4")),
+        "zstd": int(os.getenv("RESPONSE_COMPRESSION_ZSTD_LEVEL", "3")),
+    },
+    "MIN_SIZE": int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "1024")),
+    "OFFLOAD_MIN_SIZE": int(
+        os.getenv("RESPONSE_COMPRESSION_OFFLOAD_MIN_SIZE", str(128 * 1024))
+    ),
+    "CONTENT_TYPES": [
+        "text/",
+        "application/json",
+        "application/problem+json",
+        "application/xml",
+        "application/javascript",
+    ],
+}
+
+# Файлы больше этого размера Django сохраняет во временный файл на диске
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(
+    os.getenv("FILE_UPLOAD_MAX_MEMORY_SIZE", str(2 * 1024 * 1024))
+)
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -138,6 +407,39 @@ elif os.getenv("USE_SQLITE", "True").lower() in ["true", "1", "yes"]:
         }
     }
 else:
+    # Соединения с Postgres. При DB_POOL["ENABLED"] каждый воркер держит пул
+    # psycopg 3 (OPTIONS["pool"]): запрос берёт соединение из пула и возвращает
+    # его по завершении, а не открывает новое. MAX_SIZE ограничивает число
+    # соединений воркера (итого WEB_CONCURRENCY * MAX_SIZE), запрос ждёт
+    # свободного соединения не дольше TIMEOUT секунд. Без пула соединение
+    # переиспользуется в течение DB_CONN_MAX_AGE секунд (0 — новое на каждый
+    # запрос). DB_CONN_HEALTH_CHECKS проверяет соединение перед повторным
+    # использованием (в том числе при выдаче из пула)
+    DB_POOL = {
+        "ENABLED": os.getenv("DB_POOL", "True").lower()
+        in ["true", "1", "yes"],
+        "MIN_SIZE": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        "MAX_SIZE": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "MAX_WAITING": int(os.getenv("DB_POOL_MAX_WAITING", "0")),
+        "MAX_IDLE": float(os.getenv("DB_POOL_MAX_IDLE", "600")),
+        "MAX_LIFETIME": float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+    }
+    DB_OPTIONS = {"connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "5"))}
+    if DB_POOL["ENABLED"]:
+        DB_OPTIONS["pool"] = {
+            "min_size": DB_POOL["MIN_SIZE"],
+            "max_size": DB_POOL["MAX_SIZE"],
+            "timeout": DB_POOL["TIMEOUT"],
+            "max_waiting": DB_POOL["MAX_WAITING"],
+            "max_idle": DB_POOL["MAX_IDLE"],
+            "max_lifetime": DB_POOL["MAX_LIFETIME"],
+        }
+
+    DB_CONN_MAX_AGE = (
+        0 if DB_POOL["ENABLED"] else int(os.getenv("DB_CONN_MAX_AGE", "0"))
+    )
+
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.postgresql",
@@ -146,9 +448,35 @@ else:
             "PASSWORD": os.getenv("DB_PASSWORD", "postgres"),
             "HOST": os.getenv("DB_HOST", "localhost"),
             "PORT": os.getenv("DB_PORT", "5432"),
+            # Пул несовместим с постоянными соединениями Django
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": os.getenv(
+                "DB_CONN_HEALTH_CHECKS", "True"
+            ).lower()
+            in ["true", "1", "yes"],
+            "OPTIONS": DB_OPTIONS,
         }
     }
 
+# Хэширование паролей. Стоимость PBKDF2 (число итераций) задаётся для каждого
+# окружения; существующие хэши с другой стоимостью обновляются при входе
+PASSWORD_HASHERS = [
+    "api.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+# Пул потоков для хэширования паролей при регистрации и входе. Запросы сверх
+# WORKERS + MAX_QUEUE отклоняются с 429
+PASSWORD_HASHING = {
+    "ITERATIONS": int(os.getenv("PASSWORD_HASH_ITERATIONS", "0")) or None,
+    "WORKERS": int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+    "MAX_QUEUE": int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "16")),
+    "RETRY_AFTER": int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "1")),
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -167,7 +495,11 @@ AUTH_PASSWORD_VALIDATORS = [
 if "test" in sys.argv or "test_coverage" in sys.argv:
     USE_SQLITE = False
 else:
-    USE_SQLITE = os.getenv("USE_SQLITE", "True").lower() in ["true", "1", "yes"]
+    USE_SQLITE = os.getenv("USE_SQLITE", "True").lower() in [
+        "true",
+        "1",
+        "yes",
+    ]
 
 LANGUAGE_CODE = "en-us"
 
@@ -187,51 +519,96 @@ if not os.path.exists(LOGS_DIR):
 
 # LOKI_URL = os.getenv('LOKI_URL')
 
-# LOGGING = {
-#     'version': 1,
-#     'disable_existing_loggers': False,
-#     'formatters': {
-#         'verbose': {
-#             'format': '{levelname} {asctime} {module} {message}',
-#             'style': '{',
-#         },
-#     },
-#     'handlers': {
-#         'loki': {
-#             'level': 'INFO',
-#             'class': 'logging_loki.LokiHandler',
-#             'url': LOKI_URL,
-#             'formatter': 'verbose',
-#         },
-#     },
-#     'loggers': {
-#         'django': {
-#             'handlers': ['loki'],
-#             'level': 'INFO',
-#             'propagate': False,
-#         },
-#         'django.request': {
-#             'handlers': ['loki'],
-#             'level': 'INFO',
-#             'propagate': False,
-#         },
-#         'rest_framework': {
-#             'handlers': ['loki'],
-#             'level': 'INFO',
-#             'propagate': False,
-#         },
-#     },
-# }
-#
-# CACHES = {
-#     "default": {
-#         "BACKEND": "django_redis.cache.RedisCache",
-#         "LOCATION": "redis://redis:6379/1",
-#         "OPTIONS": {
-#             "CLIENT_CLASS": "django_redis.client.DefaultClient",
-#         },
-#         "KEY_PREFIX": "your_project",
-#     }
-# }
-#
+# Структурированные логи: записи передаются в очередь и выводятся фоновым
+# потоком (api.log.NonBlockingHandler), в формате JSON или text. Тела ответов
+# FastAPI логируются только на уровне DEBUG для доли BODY_SAMPLE_RATE запросов
+LOG_SETTINGS = {
+    "LEVEL": os.getenv("LOG_LEVEL", "INFO"),
+    "FORMAT": os.getenv("LOG_FORMAT", "json"),
+    "QUEUE_SIZE": int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+    "BODY_SAMPLE_RATE": float(os.getenv("LOG_BODY_SAMPLE_RATE", "0")),
+    "BODY_MAX_LENGTH": int(os.getenv("LOG_BODY_MAX_LENGTH", "1024")),
+    "MESSAGE_MAX_LENGTH": int(os.getenv("LOG_MESSAGE_MAX_LENGTH", "4096")),
+    "REDACT_FIELDS": {
+        "password",
+        "token",
+        "access",
+        "refresh",
+        "authorization",
+        "secret",
+        "signing_key",
+    },
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "filters": {
+        "request_id": {"()": "api.log.RequestIdFilter"},
+    },
+    "handlers": {
+        "default": {
+            "()": "api.log.build_handler",
+            "queue_size": LOG_SETTINGS["QUEUE_SIZE"],
+            "output_format": LOG_SETTINGS["FORMAT"],
+            "filters": ["request_id"],
+        },
+    },
+    "root": {
+        "handlers": ["default"],
+        "level": LOG_SETTINGS["LEVEL"],
+    },
+    "loggers": {
+        "django": {
+            "handlers": ["default"],
+            "level": LOG_SETTINGS["LEVEL"],
+            "propagate": False,
+        },
+    },
+}
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": REDIS_URL,
+            "OPTIONS": {
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            },
+            "KEY_PREFIX": "proxy_service",
+        }
+    }
+
+# Ограничение частоты запросов к документам по user_id из JWT (token bucket:
+# RATE токенов в секунду, ёмкость BURST) и числа одновременных запросов
+# пользователя. BACKEND: "memory" (лимиты в каждом воркере) или "redis"
+# (общие). Ключ "маршрут:МЕТОД" задаёт отдельный лимит метода ("IN_FLIGHT":
+# False — без учёта в MAX_IN_FLIGHT). Лимиты маршрутов можно переопределить
+# JSON в RATE_LIMIT_ROUTES
+RATE_LIMIT = {
+    "ENABLED": os.getenv("RATE_LIMIT", "True").lower() in ["true", "1", "yes"],
+    "BACKEND": os.getenv("RATE_LIMIT_BACKEND", "memory"),
+    "REDIS_URL": os.getenv("RATE_LIMIT_REDIS_URL", REDIS_URL),
+    "ROUTES": {
+        "upload_doc": {"RATE": 2, "BURST": 10},
+        # Список документов (GET v1/docs/) — лёгкий запрос к БД, не загрузка
+        "upload_doc:GET": {"RATE": 10, "BURST": 30, "IN_FLIGHT": False},
+        "analyze_doc": {"RATE": 5, "BURST": 20},
+        "batch_docs": {"RATE": 1, "BURST": 5},
+        "get_text": {"RATE": 20, "BURST": 50},
+        "delete_doc": {"RATE": 5, "BURST": 20},
+        "create_upload": {"RATE": 2, "BURST": 10},
+        "upload_chunk": {"RATE": 50, "BURST": 100},
+        "complete_upload": {"RATE": 2, "BURST": 10},
+        **json.loads(os.getenv("RATE_LIMIT_ROUTES", "{}")),
+    },
+    "MAX_IN_FLIGHT": int(os.getenv("RATE_LIMIT_MAX_IN_FLIGHT", "8")),
+    "IN_FLIGHT_RETRY_AFTER": int(
+        os.getenv("RATE_LIMIT_IN_FLIGHT_RETRY_AFTER", "1")
+    ),
+    "IN_FLIGHT_TTL": int(os.getenv("RATE_LIMIT_IN_FLIGHT_TTL", "300")),
+}
+
 # CACHE_TTL = 60 * 150
@@ -1,6 +1,7 @@
 # congif/urls.py
+# THIRDPARTY
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import include, path
 
 
 def trigger_error(request):
@@ -9,7 +10,9 @@ def trigger_error(request):
 
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path('sentry-debug/', trigger_error),
+    path("sentry-debug/", trigger_error),
     path("api/", include("api.urls")),
-
+    # Метрики Prometheus (/metrics); при нескольких воркерах объединяются
+    # через PROMETHEUS_MULTIPROC_DIR
+    path("", include("django_prometheus.urls")),
 ]